@@ -0,0 +1,356 @@
+"""
+카피 트레이딩 hot path 벤치마크
+
+실제 WhaleCopyBot 코드(run_iteration)를 합성 API(mock_polymarket) 또는 기록된 API 응답(http_replay)에 붙여
+고래 수 / 보유 포지션 수 / 대기 주문 수를 바꿔가며 측정한다. 네트워크 접속 없음.
+
+측정 항목 (측정 지점마다 별도 프로세스 → 모듈 싱글톤 / peak RSS가 서로 섞이지 않음):
+    loop_ms           루프 1회 소요 시간 분위수 (모든 고래 조회 + 대기열 + 정산 + 대시보드)
+    copy_latency      고래 체결 → 감지 → 필터 → VWAP → 체결 구간별 지연 분위수
+    http_per_loop     루프당 HTTP 요청 수 (엔드포인트별 내역 포함)
+    cpu_per_loop_ms   루프당 CPU 시간 (user + sys)
+    peak_rss_mb       최대 메모리 사용량
+
+이벤트 캐시: 실전 루프는 정산을 5초 간격으로 돌아 outcomePrices TTL(5초)이 매번 만료되므로,
+루프 사이마다 캐시 엔트리를 --cache-age 초만큼 과거로 돌려 같은 상태를 재현한다 (0 = 캐시 유지, CPU만 측정).
+
+사용:
+    python benchmark.py                                   # 기본 sweep → benchmark_results.json
+    python benchmark.py --quick                           # 축별 2단계만
+    python benchmark.py --out baseline.json               # 기준 결과 저장
+    python benchmark.py --compare baseline.json           # 기준 대비 회귀 시 exit 1
+    python benchmark.py --replay capture.jsonl.gz         # 기록된 응답으로 1회 측정 (아카이브의 고래 사용)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import clock
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(BASE_DIR, "benchmark_results.json")
+
+# 기준점에서 한 축씩 늘려가며 측정
+BASE_POINT = {"whales": 30, "positions": 30, "pending": 0}
+SWEEPS = {
+    "whales": [30, 300, 1000, 3000],
+    "positions": [30, 300, 1000],
+    "pending": [0, 100, 500],
+}
+QUICK_SWEEPS = {
+    "whales": [30, 300],
+    "positions": [30, 300],
+    "pending": [0, 100],
+}
+
+# 회귀 판정 대상 (값이 클수록 나쁨)과 노이즈 하한 (이보다 작은 절대 차이는 무시)
+COMPARE_METRICS = {
+    "loop_ms.p50": 1.0,
+    "loop_ms.p95": 2.0,
+    "cpu_per_loop_ms": 1.0,
+    "http_per_loop": 0.5,
+    "peak_rss_mb": 5.0,
+}
+
+
+def _summary(values):
+    from bot_metrics import percentile
+
+    values = sorted(values)
+    if not values:
+        return {"n": 0}
+    return {
+        "n": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 0.5), 3),
+        "p95": round(percentile(values, 0.95), 3),
+        "p99": round(percentile(values, 0.99), 3),
+        "max": round(values[-1], 3),
+    }
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss 단위: macOS는 바이트, Linux는 KB
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _seed_positions(bot, mock, count):
+    """mock 마켓에 실제 진입 경로(_execute_copy_trade)로 포지션 생성"""
+    markets = [m for m in mock.markets if not m.closed]
+    for i in range(count):
+        market = markets[i % len(markets)]
+        outcome_index = (i // len(markets)) % 2
+        tx = {
+            "conditionId": market.condition_id,
+            "outcomeIndex": outcome_index,
+            "outcome": "Yes" if outcome_index == 0 else "No",
+            "asset": market.token_ids[outcome_index],
+            "slug": market.slug,
+            "title": market.title,
+            "marketId": market.id,
+        }
+        bot._execute_copy_trade(tx, "BenchSeed", 100, market.outcome_price(outcome_index))
+
+
+def _seed_pending(bot, mock, count, whale_addrs):
+    """목표가가 낮아 체결되지 않고 대기열에 남는 주문 생성"""
+    markets = [m for m in mock.markets if not m.closed]
+    now = int(clock.time())
+    for i in range(count):
+        market = markets[i % len(markets)]
+        price = market.outcome_price(0)
+        tx = {"conditionId": market.condition_id, "outcomeIndex": 0, "outcome": "Yes",
+              "asset": market.token_ids[0], "slug": market.slug, "title": market.title,
+              "transactionHash": f"bench-pending-{i}"}
+        bot.pending_orders.append({
+            "tx": tx,
+            "whale_name": "BenchPending",
+            "whale_addr": whale_addrs[i % len(whale_addrs)],
+            "score": 80,
+            "whale_price": price,
+            "target_price": round(price * 0.5, 3),
+            "bet_size": 10.0,
+            "expires_at": now + 3600,
+        })
+
+
+def run_point(params):
+    """측정 지점 1개 (자식 프로세스에서 실행, 작업 디렉터리는 종료 시 삭제)"""
+    from market_cache import market_cache, resolution_store
+
+    # 모듈 싱글톤 캐시가 실전 파일(market_cache.json / resolved_markets.jsonl)에 쓰지 않도록 분리
+    market_cache.cache_path = None
+    resolution_store.path = None
+
+    with tempfile.TemporaryDirectory(prefix="whalebench-") as work_dir:
+        return _run_point(params, work_dir)
+
+
+def _run_point(params, work_dir):
+    import http_client
+    from bot_metrics import request_metrics
+    from http_replay import ReplayArchive
+    from market_cache import market_cache
+    from mock_polymarket import MockPolymarket
+    from sim_replay import archive_whales
+    from whale_copy_bot import WhaleCopyBot
+    from whale_db import WhaleDB
+
+    db = WhaleDB(os.path.join(work_dir, "whales.db"), legacy_json=None)
+    mock = None
+    if params.get("replay"):
+        archive = ReplayArchive(params["replay"])
+        http_client.use_replay(archive.respond, params["speed"])
+        addrs = archive_whales(params["replay"])
+        now = int(clock.time())
+        db.upsert_many({addr: {"name": f"Recorded{i}", "status": "active", "score": 80.0,
+                               "added_at": now, "last_updated": now}
+                        for i, addr in enumerate(addrs)})
+        params["whales"] = len(addrs)
+    else:
+        mock = MockPolymarket(whales=params["whales"], markets=max(50, params["whales"] // 10),
+                              trades_per_sec=params["tps"], latency=params["latency"], seed=params["seed"])
+        mock.seed_whale_db(db)
+        http_client.use_replay(mock.respond, params["speed"])
+
+    bot = WhaleCopyBot(base_dir=work_dir, db=db, top_n=max(1, params["whales"]), maintenance=False)
+    bot.MAX_POSITIONS = 10 ** 6
+    bot.bankroll = bot.peak_bankroll = 10 ** 9
+    if mock is not None:
+        _seed_positions(bot, mock, params["positions"])
+        _seed_pending(bot, mock, params["pending"], [w["address"] for w in mock.whales])
+
+    for _ in range(params["warmup"]):
+        market_cache.age_entries(params["cache_age"])
+        bot.run_iteration(poll_all=True, force_housekeeping=True)
+
+    requests_before = sum(ep["count"] for ep in request_metrics.snapshot().values())
+    by_endpoint_before = {label: ep["count"] for label, ep in request_metrics.snapshot().items()}
+    bets_before = bot.stats["total_bets"]
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    loop_ms = []
+    for _ in range(params["iterations"]):
+        market_cache.age_entries(params["cache_age"])
+        start = time.perf_counter()
+        bot.run_iteration(poll_all=True, force_housekeeping=True)
+        loop_ms.append((time.perf_counter() - start) * 1000)
+        if params["interval"]:
+            time.sleep(params["interval"])
+    cpu = time.process_time() - cpu_before
+    wall = time.perf_counter() - wall_before
+
+    snapshot = request_metrics.snapshot()
+    requests_total = sum(ep["count"] for ep in snapshot.values()) - requests_before
+    iterations = max(1, params["iterations"])
+    result = {
+        "params": params,
+        "loop_ms": _summary(loop_ms),
+        "copy_latency": bot.copy_latency.summary().get("*", {}),
+        "copies": bot.stats["total_bets"] - bets_before,
+        "positions_after": len(bot.positions),
+        "pending_after": len(bot.pending_orders),
+        "http_per_loop": round(requests_total / iterations, 2),
+        "http_by_endpoint": {
+            label: round((ep["count"] - by_endpoint_before.get(label, 0)) / iterations, 2)
+            for label, ep in snapshot.items() if ep["count"] > by_endpoint_before.get(label, 0)
+        },
+        "cpu_s": round(cpu, 3),
+        "cpu_per_loop_ms": round(cpu / iterations * 1000, 3),
+        "wall_s": round(wall, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    if mock is not None:
+        result["mock"] = mock.stats()
+    bot.trade_log.flush()
+    bot.journal.close()
+    return result
+
+
+def _spawn_point(params, verbose=False):
+    """측정 지점을 자식 프로세스에서 실행하고 결과 dict 반환"""
+    fd, result_path = tempfile.mkstemp(prefix="whalebench-", suffix=".json")
+    os.close(fd)
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), "--point", json.dumps(params), "--result-file", result_path]
+        # 봇 콘솔 출력은 측정값과 섞이지 않도록 버림 (--verbose 시 그대로 출력)
+        proc = subprocess.run(cmd, cwd=BASE_DIR, stdout=None if verbose else subprocess.DEVNULL,
+                              stderr=None if verbose else subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"측정 실패 ({params}): {(proc.stderr or '').strip()[-2000:]}")
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def sweep_points(sweeps):
+    """기준점 + 축별 변화 지점 (중복 제거, 순서 유지)"""
+    points = [dict(BASE_POINT)]
+    for axis, values in sweeps.items():
+        for value in values:
+            point = dict(BASE_POINT, **{axis: value})
+            if point not in points:
+                points.append(point)
+    return points
+
+
+def point_key(result):
+    p = result["params"]
+    if p.get("replay"):
+        return f"replay={os.path.basename(p['replay'])}"
+    return f"whales={p['whales']},positions={p['positions']},pending={p['pending']}"
+
+
+def _metric(result, path):
+    value = result
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def compare(current, baseline, tolerance):
+    """기준 대비 tolerance 비율 이상 나빠진 항목 목록 [(지점, 항목, 기준값, 현재값)]"""
+    base_by_key = {point_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        base = base_by_key.get(point_key(result))
+        if base is None:
+            continue
+        for metric, floor in COMPARE_METRICS.items():
+            now_value, base_value = _metric(result, metric), _metric(base, metric)
+            if now_value is None or base_value is None:
+                continue
+            if now_value > base_value * (1 + tolerance) and now_value - base_value > floor:
+                regressions.append((point_key(result), metric, base_value, now_value))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'지점':<42} {'loop p50':>9} {'p95':>9} {'cpu/loop':>9} {'http/loop':>10} {'copies':>7} {'rss MB':>8}")
+    for r in results:
+        print(f"{point_key(r):<42} {r['loop_ms'].get('p50', 0):>9.2f} {r['loop_ms'].get('p95', 0):>9.2f} "
+              f"{r['cpu_per_loop_ms']:>9.2f} {r['http_per_loop']:>10.1f} {r['copies']:>7} "
+              f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WhaleCopyBot hot path 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="축별 2단계만 측정")
+    parser.add_argument("--iterations", type=int, default=20, help="지점별 측정 루프 수")
+    parser.add_argument("--warmup", type=int, default=3, help="측정 전 워밍업 루프 수")
+    parser.add_argument("--tps", type=float, default=20.0, help="합성 고래 거래 발생량 (초당, 전체)")
+    parser.add_argument("--latency", type=float, default=0.0, help="합성 API 응답 지연 (초)")
+    parser.add_argument("--speed", type=float, default=1.0, help="응답 지연 배속 (0=지연 없음)")
+    parser.add_argument("--interval", type=float, default=0.0, help="루프 사이 대기 (초, 측정값에서 제외)")
+    parser.add_argument("--cache-age", type=float, default=5.0,
+                        help="루프 사이 이벤트 캐시 경과 시간 (초, 기본 = 실전 정산 간격 / 0 = 캐시 유지)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="합성 데이터 대신 기록 아카이브(.jsonl.gz)로 1회 측정")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="결과 JSON 경로")
+    parser.add_argument("--compare", help="기준 결과 JSON (회귀 시 exit 1)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀 판정 허용 비율 (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="봇 콘솔 출력 표시")
+    parser.add_argument("--point", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.point:
+        result = run_point(json.loads(args.point))
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os._exit(0)  # 봇 데몬 스레드 / atexit 정리 대기 없이 종료
+
+    common = {"iterations": args.iterations, "warmup": args.warmup, "tps": args.tps, "latency": args.latency,
+              "speed": args.speed, "interval": args.interval, "cache_age": args.cache_age, "seed": args.seed}
+    if args.replay:
+        points = [dict(BASE_POINT, replay=os.path.abspath(args.replay))]
+    else:
+        points = sweep_points(QUICK_SWEEPS if args.quick else SWEEPS)
+
+    baseline = None
+    if args.compare:  # --out과 같은 파일이어도 덮어쓰기 전 값과 비교
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    results = []
+    for point in points:
+        params = dict(common, **point)
+        print(f"▶ {point} ...", flush=True)
+        results.append(_spawn_point(params, args.verbose))
+
+    report = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+              "settings": common, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    print_table(results)
+    print(f"\n✅ 결과 저장: {args.out}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 성능 회귀 {len(regressions)}건 (허용 {args.tolerance:.0%}):")
+            for key, metric, base_value, now_value in regressions:
+                print(f"  {key:<42} {metric:<16} {base_value} → {now_value}")
+            sys.exit(1)
+        print(f"\n✅ 기준({args.compare}) 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
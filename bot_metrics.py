@@ -0,0 +1,346 @@
+"""
+봇 내장 메트릭 / 상태 HTTP 엔드포인트 (localhost 전용, 선택 기능)
+
+    GET /status   → 메모리 상 상태 스냅샷 (JSON)
+    GET /metrics  → Prometheus text format
+
+- HTTP 요청 지표는 requests Session의 response hook으로 수집 (엔드포인트별 건수 / 상태코드 / 지연 히스토그램)
+- 응답은 전부 메모리 카운터로 조립 (디스크 읽기 없음) → 봇 여러 대를 자주 scrape 해도 부담 없음
+- profiler: 루프 단계 / HTTP 호출 종류별 소요 시간 분위수 (StageProfiler)
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# 지연 히스토그램 bucket 상한 (초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_ID_SEGMENT = re.compile(r"^(0x[0-9a-fA-F]+|\d+)$")
+
+
+def endpoint_label(url):
+    """URL → 엔드포인트 라벨 (예: data-api/activity, gamma-api/events, clob/book)
+
+    주소 / 숫자 id 경로 조각은 ':id'로 치환해 라벨 수가 고래 / 마켓 수만큼 늘지 않게 한다.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    service = host.split(".")[0] if host.endswith("polymarket.com") else host
+    segments = [":id" if _ID_SEGMENT.match(seg) else seg for seg in parts.path.split("/") if seg]
+    return "/".join([service] + segments)
+
+
+class RequestMetrics:
+    """엔드포인트별 HTTP 요청 건수 / 상태코드 / 지연 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}  # label -> {'count', 'errors', 'status': {code: n}, 'latency_sum', 'buckets': [...]}
+
+    def instrument(self, session):
+        """Session의 모든 응답을 집계 (중복 등록 방지)"""
+        hooks = session.hooks.setdefault("response", [])
+        if self._on_response not in hooks:
+            hooks.append(self._on_response)
+        return session
+
+    def _on_response(self, response, *args, **kwargs):
+        try:
+            self.observe(endpoint_label(response.url), response.elapsed.total_seconds(), response.status_code)
+        except Exception:
+            pass
+        return response
+
+    def observe(self, label, seconds, status_code):
+        with self._lock:
+            ep = self._endpoints.get(label)
+            if ep is None:
+                ep = self._endpoints[label] = {
+                    "count": 0, "errors": 0, "status": {}, "latency_sum": 0.0,
+                    "buckets": [0] * len(LATENCY_BUCKETS),
+                }
+            ep["count"] += 1
+            if status_code >= 400:
+                ep["errors"] += 1
+            ep["status"][status_code] = ep["status"].get(status_code, 0) + 1
+            ep["latency_sum"] += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    ep["buckets"][i] += 1
+                    break
+
+    def snapshot(self):
+        """{label: {'count', 'errors', 'status', 'avg_ms', 'latency_sum', 'buckets'}} (복사본)"""
+        with self._lock:
+            result = {}
+            for label, ep in self._endpoints.items():
+                result[label] = {
+                    "count": ep["count"],
+                    "errors": ep["errors"],
+                    "status": dict(ep["status"]),
+                    "avg_ms": round(ep["latency_sum"] / ep["count"] * 1000, 1) if ep["count"] else 0.0,
+                    "latency_sum": ep["latency_sum"],
+                    "buckets": list(ep["buckets"]),
+                }
+            return result
+
+
+def escape_label(value):
+    """Prometheus 라벨 값 이스케이프"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(gauges, requests_snapshot, prefix="whalebot"):
+    """gauges: {이름: 값 또는 {라벨 문자열: 값}} → Prometheus text format"""
+    lines = []
+    for name, value in gauges.items():
+        metric = f"{prefix}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        if isinstance(value, dict):
+            for labels, v in value.items():
+                lines.append(f"{metric}{{{labels}}} {float(v)}")
+        else:
+            lines.append(f"{metric} {float(value)}")
+
+    total = f"{prefix}_http_requests_total"
+    latency = f"{prefix}_http_request_duration_seconds"
+    lines.append(f"# TYPE {total} counter")
+    for label, ep in requests_snapshot.items():
+        for code, n in sorted(ep["status"].items()):
+            lines.append(f'{total}{{endpoint="{escape_label(label)}",code="{code}"}} {n}')
+    lines.append(f"# TYPE {latency} histogram")
+    for label, ep in requests_snapshot.items():
+        ep_label = f'endpoint="{escape_label(label)}"'
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, ep["buckets"]):
+            cumulative += n
+            lines.append(f'{latency}_bucket{{{ep_label},le="{bound}"}} {cumulative}')
+        lines.append(f'{latency}_bucket{{{ep_label},le="+Inf"}} {ep["count"]}')
+        lines.append(f"{latency}_sum{{{ep_label}}} {ep['latency_sum']}")
+        lines.append(f"{latency}_count{{{ep_label}}} {ep['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def percentile(sorted_values, q):
+    """정렬된 값 리스트의 q 분위수 (0~1, 선형 보간)"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class RollingWindow:
+    """최근 maxlen개 관측값의 분위수 요약 (스레드 안전)"""
+
+    def __init__(self, maxlen=500):
+        self._values = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, value):
+        with self._lock:
+            self._values.append(value)
+            self.total += 1
+
+    def summary(self):
+        with self._lock:
+            values = sorted(self._values)
+        if not values:
+            return {"n": 0}
+        return {
+            "n": len(values),
+            "p50": round(percentile(values, 0.50), 4),
+            "p95": round(percentile(values, 0.95), 4),
+            "p99": round(percentile(values, 0.99), 4),
+            "max": round(values[-1], 4),
+        }
+
+
+# 카피 지연 구간: (이름, 시작 시점, 끝 시점)
+LATENCY_STAGES = (
+    ("detect", "whale_ts", "seen"),       # 고래 체결 → 우리 폴링 응답 수신
+    ("filter", "seen", "filtered"),       # 수신 → 필터 통과 (Gamma 조회 포함)
+    ("price", "filtered", "priced"),      # 필터 통과 → 호가창 VWAP 산출 (대기열 체결은 대기 시간 포함)
+    ("fill", "priced", "executed"),       # VWAP 산출 → 체결 기록
+    ("total", "whale_ts", "executed"),    # 고래 체결 → 우리 체결
+)
+
+
+class LatencyTracker:
+    """카피 거래별 단계 시각(trace) → 고래별 / 전체 구간 지연 분위수"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._windows = {}  # (고래, 구간) -> RollingWindow
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def stage_deltas(trace):
+        """trace {'whale_ts', 'seen', 'filtered', 'priced', 'executed'} → {구간: 초}"""
+        deltas = {}
+        for stage, start, end in LATENCY_STAGES:
+            if trace.get(start) is not None and trace.get(end) is not None:
+                deltas[stage] = round(trace[end] - trace[start], 3)
+        return deltas
+
+    def _window(self, key, stage):
+        with self._lock:
+            window = self._windows.get((key, stage))
+            if window is None:
+                window = self._windows[(key, stage)] = RollingWindow(self.window)
+            return window
+
+    def record(self, key, trace):
+        deltas = self.stage_deltas(trace)
+        for stage, seconds in deltas.items():
+            self._window(key, stage).add(seconds)
+            self._window("*", stage).add(seconds)
+        return deltas
+
+    def summary(self):
+        """{고래 이름 또는 '*'(전체): {구간: {n, p50, p95, p99, max}}}"""
+        with self._lock:
+            items = list(self._windows.items())
+        result = {}
+        for (key, stage), window in items:
+            result.setdefault(key, {})[stage] = window.summary()
+        return result
+
+    def slowest(self, stage="total", limit=5):
+        """구간 p50 기준 가장 늦게 카피하는 고래 목록 [(고래, p50)]"""
+        rows = [
+            (key, stages[stage]["p50"])
+            for key, stages in self.summary().items()
+            if key != "*" and stages.get(stage, {}).get("n")
+        ]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+
+class StageProfiler:
+    """구간별 소요 시간 프로파일러 (루프 단계 / HTTP 호출 종류별)
+
+    with profiler.stage("settle"):
+        ...
+    측정 비용은 perf_counter 2회 + deque append (수 μs) 라 운영 중에도 켜둘 수 있다.
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._windows = {}
+        self._totals = {}  # 구간 -> 누적 소요 시간 (초)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            window = self._windows.get(name)
+            if window is None:
+                window = self._windows[name] = RollingWindow(self.window)
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+        window.add(seconds)
+
+    def summary(self):
+        """{구간: {n, p50, p95, p99, max, calls, total_s, share}} (share: 전체 경과 시간 대비 누적 비중)"""
+        with self._lock:
+            items = list(self._windows.items())
+            totals = dict(self._totals)
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        result = {}
+        for name, window in sorted(items):
+            row = window.summary()
+            row["calls"] = window.total
+            row["total_s"] = round(totals.get(name, 0.0), 3)
+            row["share"] = round(totals.get(name, 0.0) / elapsed, 4)
+            result[name] = row
+        return result
+
+    def report(self):
+        """콘솔 출력용 표 (누적 소요 시간 큰 순)"""
+        rows = sorted(self.summary().items(), key=lambda kv: kv[1]["total_s"], reverse=True)
+        lines = [f"{'stage':<16}{'calls':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'total s':>10}{'share':>7}"]
+        for name, row in rows:
+            if not row.get("n"):
+                continue
+            lines.append(
+                f"{name:<16}{row['calls']:>8}{row['p50'] * 1000:>9.1f}{row['p95'] * 1000:>9.1f}"
+                f"{row['p99'] * 1000:>9.1f}{row['total_s']:>10.1f}{row['share'] * 100:>6.1f}%"
+            )
+        return "\n".join(lines)
+
+    def export(self, path):
+        """요약을 JSON 파일로 저장 (원자적 교체)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"exported_at": time.time(), "stages": self.summary()}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+class MetricsServer:
+    """localhost HTTP 서버 (데몬 스레드)
+
+    Args:
+        status_fn: () -> dict, /status 응답 (메모리 상태만 사용)
+        metrics_fn: () -> str, /metrics 응답 (Prometheus text)
+    """
+
+    def __init__(self, status_fn, metrics_fn, port, host="127.0.0.1"):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                try:
+                    if path == "/status":
+                        body = json.dumps(server.status_fn(), ensure_ascii=False).encode("utf-8")
+                        ctype = "application/json; charset=utf-8"
+                    elif path == "/metrics":
+                        body = server.metrics_fn().encode("utf-8")
+                        ctype = "text/plain; version=0.0.4; charset=utf-8"
+                    else:
+                        self.send_error(404)
+                        return
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 콘솔 로그 오염 방지
+
+        self.status_fn = status_fn
+        self.metrics_fn = metrics_fn
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="metrics-http")
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+request_metrics = RequestMetrics()
+profiler = StageProfiler()
@@ -3,17 +3,21 @@ Polymarket CLOB 클라이언트 래퍼
 
 기능:
 - UPDOWN 마켓 탐색 (5분/15분)
-- 호가창(Order Book) 조회
+- 호가창(Order Book) 조회 및 VWAP 체결 시뮬레이션
 - Limit Order 주문 (실전 모드)
 """
 
 from config import config
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 import time
-import math
-import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+import clock
+from market_cache import market_winner_from_payload, resolution_store
+from rate_budget import CRITICAL
+from http_client import HttpClient
+from bot_metrics import profiler
 
 # Try importing types safely
 try:
@@ -27,7 +31,122 @@ except ImportError:
     OrderArgs = None
 
 
+class OrderBook:
+    """호가창 스냅샷
+
+    1회 파싱으로 가격 정렬 배열과 누적 물량(shares) / 누적 금액(USDC)을 만들어 두고,
+    매수 VWAP(USDC 금액 기준)과 매도 VWAP(shares 기준)을 이진 탐색으로 계산한다.
+    """
+
+    def __init__(self, asks, bids):
+        ask_prices, ask_sizes = self._levels(asks)
+        order = np.argsort(ask_prices, kind="stable")          # 싼 ask부터 체결
+        self.ask_prices = ask_prices[order]
+        self.ask_sizes = ask_sizes[order]
+        self.ask_cum_shares = np.cumsum(self.ask_sizes)
+        self.ask_cum_usdc = np.cumsum(self.ask_prices * self.ask_sizes)
+
+        bid_prices, bid_sizes = self._levels(bids)
+        order = np.argsort(-bid_prices, kind="stable")         # 비싼 bid부터 체결
+        self.bid_prices = bid_prices[order]
+        self.bid_sizes = bid_sizes[order]
+        self.bid_cum_shares = np.cumsum(self.bid_sizes)
+        self.bid_cum_usdc = np.cumsum(self.bid_prices * self.bid_sizes)
+
+    @staticmethod
+    def _levels(levels):
+        levels = levels or []
+        prices = np.array([float(l['price']) for l in levels], dtype=float)
+        sizes = np.array([float(l['size']) for l in levels], dtype=float)
+        return prices, sizes
+
+    @classmethod
+    def from_payload(cls, book: dict):
+        return cls(book.get('asks'), book.get('bids'))
+
+    @property
+    def best_ask(self):
+        return float(self.ask_prices[0]) if self.ask_prices.size else None
+
+    @property
+    def best_bid(self):
+        return float(self.bid_prices[0]) if self.bid_prices.size else None
+
+    def buy_fill(self, usdc_amounts):
+        """USDC 금액별 시장가 매수 결과 (벡터화)
+
+        Returns: (체결 shares 배열, 미체결 잔액 배열)
+        """
+        amounts = np.atleast_1d(np.asarray(usdc_amounts, dtype=float))
+        if not self.ask_prices.size:
+            return np.zeros_like(amounts), amounts
+        spend = np.minimum(amounts, self.ask_cum_usdc[-1])
+        idx = np.minimum(np.searchsorted(self.ask_cum_usdc, spend, side="left"), self.ask_prices.size - 1)
+        prev_usdc = np.where(idx > 0, self.ask_cum_usdc[idx - 1], 0.0)
+        prev_shares = np.where(idx > 0, self.ask_cum_shares[idx - 1], 0.0)
+        shares = prev_shares + (spend - prev_usdc) / self.ask_prices[idx]
+        return shares, amounts - spend
+
+    def buy_vwap(self, usdc_amount: float):
+        """USDC 금액만큼 시장가 매수 시 VWAP. 유동성 부족(미체결 > $0.01) 시 None"""
+        shares, remaining = self.buy_fill(usdc_amount)
+        if remaining[0] > 0.01 or shares[0] <= 0:
+            return None
+        return float((usdc_amount - remaining[0]) / shares[0])
+
+    def buy_slippage_curve(self, usdc_amounts):
+        """금액별 매수 VWAP / best ask 대비 슬리피지 곡선 (유동성 부족 구간은 NaN)"""
+        amounts = np.atleast_1d(np.asarray(usdc_amounts, dtype=float))
+        shares, remaining = self.buy_fill(amounts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwaps = np.where((remaining <= 0.01) & (shares > 0), (amounts - remaining) / shares, np.nan)
+        best = self.best_ask
+        slippage = vwaps / best - 1.0 if best else np.full_like(vwaps, np.nan)
+        return vwaps, slippage
+
+    def sell(self, shares_to_sell: float):
+        """shares 시장가 매도 시 (수령 USDC, VWAP, 호가창 초과 잔량). 체결 불가 시 None
+
+        호가창 물량을 초과한 잔량(> 0.01)은 최저 bid 가격으로 강제 체결한 것으로 계산한다.
+        """
+        if not self.bid_prices.size:
+            return None
+        fill = min(shares_to_sell, float(self.bid_cum_shares[-1]))
+        if fill <= 0:
+            return None
+        idx = min(int(np.searchsorted(self.bid_cum_shares, fill, side="left")), self.bid_prices.size - 1)
+        prev_usdc = float(self.bid_cum_usdc[idx - 1]) if idx > 0 else 0.0
+        prev_shares = float(self.bid_cum_shares[idx - 1]) if idx > 0 else 0.0
+        received = prev_usdc + (fill - prev_shares) * float(self.bid_prices[idx])
+        sold = fill
+
+        remaining = shares_to_sell - fill
+        if remaining > 0.01:
+            received += float(self.bid_prices[-1]) * remaining
+            sold += remaining
+        return received, received / sold, max(remaining, 0.0)
+
+    def sell_slippage_curve(self, share_amounts):
+        """shares 수량별 매도 VWAP / best bid 대비 슬리피지 곡선 (호가창 초과분은 NaN)"""
+        amounts = np.atleast_1d(np.asarray(share_amounts, dtype=float))
+        if not self.bid_prices.size:
+            nan = np.full_like(amounts, np.nan)
+            return nan, nan
+        fill = np.minimum(amounts, self.bid_cum_shares[-1])
+        idx = np.minimum(np.searchsorted(self.bid_cum_shares, fill, side="left"), self.bid_prices.size - 1)
+        prev_usdc = np.where(idx > 0, self.bid_cum_usdc[idx - 1], 0.0)
+        prev_shares = np.where(idx > 0, self.bid_cum_shares[idx - 1], 0.0)
+        received = prev_usdc + (fill - prev_shares) * self.bid_prices[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwaps = np.where((amounts - fill <= 0.01) & (fill > 0), received / fill, np.nan)
+        return vwaps, vwaps / self.best_bid - 1.0
+
+
 class PolymarketClient:
+    BOOK_TTL = 2.0          # 호가창 스냅샷 캐시 유효시간 (초)
+    BOOK_BATCH_SIZE = 50    # POST /books 1회당 최대 토큰 수
+    BOOK_CACHE_MAX = 2000   # 호가창 / 파싱 스냅샷 캐시 최대 토큰 수 (LRU 축출)
+
     def __init__(self):
         self.gamma_url = "https://gamma-api.polymarket.com"
         self.clob_url = "https://clob.polymarket.com"
@@ -63,22 +182,18 @@ class PolymarketClient:
                 print(f"[Client] Authentication failed: {e}")
                 self.client = None
         
-        # === [Network Optimization] Session & Retry Strategy ===
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=5,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
-        self.session.headers.update({
+        # === [Network Optimization] 공용 전송 계층 (호스트별 풀 / jitter 재시도 / 요청 예산) ===
+        self.http = HttpClient(CRITICAL, retries=5, headers={
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) HATEBOT/3.0",
-            "Accept": "application/json",
         })
 
+        # === 호가창 캐시 (token_id -> (조회 시각, book)) + 동일 토큰 동시 요청 병합(single-flight) ===
+        self._book_cache = OrderedDict()  # LRU (BOOK_CACHE_MAX)
+        self._book_inflight = {}  # token_id -> Future (조회 중인 요청)
+        self._book_snapshots = OrderedDict()  # token_id -> (원본 book, OrderBook) — 같은 스냅샷은 1회만 파싱 (LRU)
+        self._book_lock = threading.Lock()
+        self.book_stats = {"hits": 0, "misses": 0, "coalesced": 0, "batch_requests": 0}
+
         # [CRITICAL CHECK] If Live Mode is on but client failed, we MUST stop.
         if not config.PAPER_TRADING and self.client is None:
             print("\n" + "="*60)
@@ -119,17 +234,127 @@ class PolymarketClient:
                 return 0.0
         return 0.0
 
-    def get_order_book(self, market_id: str) -> dict:
-        """실시간 호가창 데이터 조회 (세션 재사용)"""
+    def _fetch_order_book(self, token_id: str) -> dict:
         try:
-            url = f"{self.clob_url}/book?token_id={market_id}"
-            response = self.session.get(url, timeout=15)
-            if response.status_code == 200:
-                return response.json()
-            return None
+            url = f"{self.clob_url}/book?token_id={token_id}"
+            with profiler.stage("http.book"):
+                return self.http.get_json(url, "book")
         except Exception:
             return None
 
+    def _claim_books(self, token_ids, max_age):
+        """캐시 적중분 / 다른 스레드가 조회 중인 토큰 / 직접 조회할 토큰으로 분류
+
+        Returns: (cached {token: book}, waiting {token: Future}, owned {token: Future})
+        """
+        cached, waiting, owned = {}, {}, {}
+        now = clock.time()
+        with self._book_lock:
+            for token_id in token_ids:
+                entry = self._book_cache.get(token_id)
+                if entry is not None and now - entry[0] < max_age:
+                    cached[token_id] = entry[1]
+                    self._book_cache.move_to_end(token_id)
+                    self.book_stats["hits"] += 1
+                elif token_id in self._book_inflight:
+                    waiting[token_id] = self._book_inflight[token_id]
+                    self.book_stats["coalesced"] += 1
+                else:
+                    future = Future()
+                    self._book_inflight[token_id] = future
+                    owned[token_id] = future
+                    self.book_stats["misses"] += 1
+        return cached, waiting, owned
+
+    def _release_book(self, token_id, future, book):
+        with self._book_lock:
+            if book is not None:
+                self._book_cache[token_id] = (clock.time(), book)
+                self._book_cache.move_to_end(token_id)
+                while len(self._book_cache) > self.BOOK_CACHE_MAX:
+                    self._book_cache.popitem(last=False)
+            self._book_inflight.pop(token_id, None)
+        future.set_result(book)
+
+    def get_order_book(self, market_id: str, max_age: float = None) -> dict:
+        """실시간 호가창 데이터 조회 (BOOK_TTL 캐시, 동일 토큰 동시 요청은 HTTP 1회로 병합)
+
+        반환된 book은 캐시와 공유되므로 호출부에서 수정하지 말 것.
+        """
+        if max_age is None:
+            max_age = self.BOOK_TTL
+        cached, waiting, owned = self._claim_books([market_id], max_age)
+        if market_id in cached:
+            return cached[market_id]
+        if market_id in waiting:
+            return waiting[market_id].result()
+
+        book = None
+        try:
+            book = self._fetch_order_book(market_id)
+        finally:
+            self._release_book(market_id, owned[market_id], book)
+        return book
+
+    def get_order_books(self, token_ids, max_age: float = None) -> dict:
+        """여러 토큰 호가창 일괄 조회 (POST /books, 캐시 적중분 제외)
+
+        Returns: {token_id: book or None}
+        """
+        if max_age is None:
+            max_age = self.BOOK_TTL
+        token_ids = list(dict.fromkeys(t for t in token_ids if t))
+        cached, waiting, owned = self._claim_books(token_ids, max_age)
+        books = dict(cached)
+
+        pending = list(owned)
+        for i in range(0, len(pending), self.BOOK_BATCH_SIZE):
+            chunk = pending[i:i + self.BOOK_BATCH_SIZE]
+            fetched = {}
+            try:
+                url = f"{self.clob_url}/books"
+                with self._book_lock:
+                    self.book_stats["batch_requests"] += 1
+                with profiler.stage("http.books"):
+                    payload = self.http.post_json(url, "book", json=[{"token_id": t} for t in chunk])
+                for book in payload or []:
+                    asset_id = book.get('asset_id')
+                    if asset_id in owned:
+                        fetched[asset_id] = book
+            except Exception:
+                pass
+            for token_id in chunk:
+                book = fetched.get(token_id)
+                try:
+                    if book is None:
+                        # 일괄 조회 실패 / 응답 누락 토큰은 단건 조회로 폴백
+                        book = self._fetch_order_book(token_id)
+                finally:
+                    self._release_book(token_id, owned[token_id], book)
+                books[token_id] = book
+
+        for token_id, future in waiting.items():
+            books[token_id] = future.result()
+        return books
+
+    def get_book_snapshot(self, token_id: str, max_age: float = None):
+        """호가창 조회 후 OrderBook으로 변환 (캐시된 같은 스냅샷이면 재파싱 없음). 실패 시 None"""
+        orderbook = self.get_order_book(token_id, max_age)
+        if not orderbook:
+            return None
+        with self._book_lock:
+            cached = self._book_snapshots.get(token_id)
+            if cached is not None and cached[0] is orderbook:
+                self._book_snapshots.move_to_end(token_id)
+                return cached[1]
+        snapshot = OrderBook.from_payload(orderbook)
+        with self._book_lock:
+            self._book_snapshots[token_id] = (orderbook, snapshot)
+            self._book_snapshots.move_to_end(token_id)
+            while len(self._book_snapshots) > self.BOOK_CACHE_MAX:
+                self._book_snapshots.popitem(last=False)
+        return snapshot
+
     def simulate_market_buy_vwap(self, market_id: str, buy_usdc_amount: float) -> float:
         """
         주어진 USDC 금액만큼 시장가 매수(Market Buy)를 진행했을 때의
@@ -144,60 +369,38 @@ class PolymarketClient:
             물량이 부족하여 전체 금액을 체결할 수 없거나 에러 발생 시 None 반환.
         """
         try:
-            # 1. 호가창 조회
-            orderbook = self.get_order_book(market_id)
-            if not orderbook or 'asks' not in orderbook:
-                return None
-                
-            asks = orderbook['asks'] # 매도 물량(우리가 사야할 물량)
-            if not asks:
+            book = self.get_book_snapshot(market_id)
+            if book is None or book.best_ask is None:
                 return None
-                
-            # 가격 오름차순 정렬 (싼 것부터 체결)
-            asks.sort(key=lambda x: float(x['price']))
-            
-            remaining_usdc = buy_usdc_amount
-            total_shares_bought = 0.0
-            total_usdc_spent = 0.0
-            
-            for ask in asks:
-                price = float(ask['price'])
-                size_shares = float(ask['size'])
-                
-                # 이 호가에 있는 물량을 전부 샀을 때 필요한 USDC
-                cost_for_this_ask = price * size_shares
-                
-                if remaining_usdc >= cost_for_this_ask:
-                    # 물량 전부 소화
-                    total_shares_bought += size_shares
-                    total_usdc_spent += cost_for_this_ask
-                    remaining_usdc -= cost_for_this_ask
-                else:
-                    # 돈이 부족해서 일부만 매수
-                    shares_to_buy = remaining_usdc / price
-                    total_shares_bought += shares_to_buy
-                    total_usdc_spent += remaining_usdc
-                    remaining_usdc = 0
-                    break
-                    
-                if remaining_usdc <= 0:
-                    break
-                    
-            # 2. 결과 계산
-            if remaining_usdc > 0.01:
+
+            shares, remaining = book.buy_fill(buy_usdc_amount)
+            if remaining[0] > 0.01:
                 # 호가창에 존재하는 모든 물량을 다 사도 내가 원하는 금액을 못 채운 경우 (유동성 부족)
-                print(f"[Warning] 호가창 유동성 부족 (남은 주문 잔액: ${remaining_usdc:.2f})")
+                print(f"[Warning] 호가창 유동성 부족 (남은 주문 잔액: ${remaining[0]:.2f})")
                 return None
-                
-            if total_shares_bought > 0:
-                vwap_price = total_usdc_spent / total_shares_bought
-                return round(vwap_price, 4)
-            return None
-            
+            if shares[0] <= 0:
+                return None
+
+            # buy_vwap과 같은 계산을 위 체결 결과로 (호가창을 한 번만 탐색)
+            vwap_price = (buy_usdc_amount - remaining[0]) / shares[0]
+            return round(float(vwap_price), 4)
+
         except Exception as e:
             print(f"[Error] VWAP calculation failed: {e}")
             return None
 
+    def simulate_market_buy_curve(self, market_id: str, usdc_amounts):
+        """여러 매수 금액 후보를 한 스냅샷으로 일괄 평가 → [VWAP or None, ...] (유동성 부족 시 None)"""
+        try:
+            book = self.get_book_snapshot(market_id)
+            if book is None or book.best_ask is None:
+                return [None] * len(usdc_amounts)
+            vwaps, _ = book.buy_slippage_curve(usdc_amounts)
+            return [None if np.isnan(v) else round(float(v), 4) for v in vwaps]
+        except Exception as e:
+            print(f"[Error] VWAP curve calculation failed: {e}")
+            return [None] * len(usdc_amounts)
+
     def simulate_market_sell_vwap(self, token_id: str, shares_to_sell: float):
         """
         보유한 shares를 시장가로 매도했을 때 실제 수령 USDC와 평균 체결가(VWAP) 반환.
@@ -207,117 +410,58 @@ class PolymarketClient:
             (total_usdc_received, vwap_price) 튜플, 또는 None (오더북 조회 실패)
         """
         try:
-            orderbook = self.get_order_book(token_id)
-            if not orderbook or 'bids' not in orderbook:
+            book = self.get_book_snapshot(token_id)
+            if book is None:
                 return None
 
-            bids = orderbook['bids']
-            if not bids:
-                return None
-
-            # 가격 내림차순 정렬 (비싼 bid부터 체결)
-            bids.sort(key=lambda x: float(x['price']), reverse=True)
-
-            remaining_shares = shares_to_sell
-            total_usdc_received = 0.0
-            total_shares_sold = 0.0
-
-            for bid in bids:
-                price = float(bid['price'])
-                size_shares = float(bid['size'])
-
-                if remaining_shares >= size_shares:
-                    # 이 bid 물량 전부 소화
-                    total_usdc_received += price * size_shares
-                    total_shares_sold += size_shares
-                    remaining_shares -= size_shares
-                else:
-                    # 마지막 bid에서 일부만 체결
-                    total_usdc_received += price * remaining_shares
-                    total_shares_sold += remaining_shares
-                    remaining_shares = 0
-                    break
-
-                if remaining_shares <= 0:
-                    break
-
-            if total_shares_sold <= 0:
+            result = book.sell(shares_to_sell)
+            if result is None:
                 return None
 
+            total_usdc_received, vwap, remaining_shares = result
             # 유동성 부족: 팔 수 없는 shares는 최저 bid 가격으로 강제 체결
             if remaining_shares > 0.01:
-                lowest_bid_price = float(bids[-1]['price']) if bids else 0.0
-                total_usdc_received += lowest_bid_price * remaining_shares
-                total_shares_sold += remaining_shares
-                print(f"[Warning] bid 유동성 부족 — 잔여 {remaining_shares:.1f}shares를 최저가 ${lowest_bid_price:.4f}에 강제 체결")
+                print(f"[Warning] bid 유동성 부족 — 잔여 {remaining_shares:.1f}shares를 최저가 ${float(book.bid_prices[-1]):.4f}에 강제 체결")
 
-            vwap = total_usdc_received / total_shares_sold
             return (round(total_usdc_received, 4), round(vwap, 4))
 
         except Exception as e:
             print(f"[Error] simulate_market_sell_vwap failed: {e}")
             return None
 
-    def get_market_winner(self, market_id: str) -> str:
+    def get_market_winner(self, market_id: str, market: dict = None) -> str:
         """
-        Gamma API를 통해 마켓의 승자(Winner) 조회.
+        마켓의 승자(Winner) 조회.
         Args:
             market_id: Gamma Market ID (e.g., "239826")
+            market: 이미 받아둔 Gamma 마켓 payload (events?slug= 응답의 markets 항목).
+                    주어지면 미종료 마켓은 추가 HTTP 없이 payload로 판정한다.
         Return: 'YES', 'NO', 'WAITING' or None (Error)
+
+        결과가 확정된 마켓 (market_is_final)은 resolution store에 영구 기록되어 다시 조회하지 않는다.
         """
+        record = resolution_store.get(
+            condition_id=(market or {}).get('conditionId'), market_id=market_id
+        )
+        if record is not None and record.get('winner'):
+            return record['winner']
+
+        if market is not None:
+            winner = market_winner_from_payload(market)
+            if not market.get('closed'):
+                return winner
+            if winner != "WAITING":
+                resolution_store.record(market, winner)
+                return winner
+            # 종료됐지만 payload만으로 승자 판정 불가 → /markets/{id} 1회 조회 (winnerOutcome, tokens 확인)
+
         try:
             url = f"{self.gamma_url}/markets/{market_id}"
-            r = self.session.get(url, timeout=10)
-            
-            if r.status_code == 200:
-                m = r.json()
-                
-                def normalize_outcome(res_str):
-                    if not res_str: return None
-                    res = str(res_str).upper()
-                    if any(k in res for k in ['YES', 'UP', 'ABOVE', 'HIGH']): return 'YES'
-                    if any(k in res for k in ['NO', 'DOWN', 'BELOW', 'LOW']): return 'NO'
-                    return res
-
-                # 1. outcomePrices 분석 (1.0 근접 정산 확인)
-                prices_raw = m.get('outcomePrices')
-                outcomes_raw = m.get('outcomes')
-                
-                # [Deep Parsing] JSON 문자열 대응
-                def robust_json_load(data):
-                    if not isinstance(data, str): return data
-                    try: return json.loads(data)
-                    except: return data
-
-                prices = robust_json_load(prices_raw)
-                outcomes = robust_json_load(outcomes_raw)
-
-                if isinstance(prices, list) and isinstance(outcomes, list):
-                    for i, p_str in enumerate(prices):
-                        try:
-                            if float(p_str) > 0.99 and i < len(outcomes):
-                                return normalize_outcome(outcomes[i])
-                        except: pass
-
-                # 2. winnerOutcome 필드 확인
-                winner_outcome = m.get('winnerOutcome') or m.get('winner_outcome')
-                if winner_outcome:
-                    return normalize_outcome(winner_outcome)
-
-                # 3. tokens 배열 분석
-                tokens = robust_json_load(m.get('tokens', []))
-                if isinstance(tokens, list):
-                    for t in tokens:
-                        if t.get('winner') is True:
-                            return normalize_outcome(t.get('outcome'))
-                        try:
-                            p = t.get('price') or t.get('outcomePrice')
-                            if p and float(p) > 0.99:
-                                return normalize_outcome(t.get('outcome'))
-                        except: pass
-                
-                return "WAITING"
-            return None
+            with profiler.stage("http.markets"):
+                m = self.http.get_json(url, "market")
+            winner = market_winner_from_payload(m)
+            resolution_store.record(m, winner)
+            return winner
         except Exception:
             return None
 
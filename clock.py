@@ -0,0 +1,131 @@
+"""
+봇 시계 (실제 시각 / 시뮬레이션 가상 시각)
+
+판단 로직이 쓰는 "현재 시각"과 대기를 한 곳에서 주입한다:
+    import clock
+    now = clock.time()      # 신선도 필터 / 대기 주문 만료 / 타임아웃 청산 / 캐시 TTL
+    clock.sleep(wait)       # 메인 루프 대기
+    clock.now()             # 로그 timestamp (datetime)
+
+기본은 SystemClock (time.time / time.sleep 그대로).
+clock.install(SimulatedClock(start)) 후에는 sleep이 가상 시각만 전진시키므로
+기록된 일주일치 API 응답을 몇 분 만에 같은 봇 코드로 재생할 수 있다 (sim_replay 참고).
+
+측정용 경과 시간 (루프 소요 / 프로파일)과 I/O 간격 (저널 fsync, status JSON, 로그 flush)은
+가상 시각과 무관하므로 time 모듈을 그대로 쓴다.
+"""
+
+import heapq
+import threading
+import time as _time
+from datetime import datetime
+
+
+class SystemClock:
+    simulated = False
+
+    def time(self):
+        return _time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+
+class SimulatedClock:
+    """sleep 시 실제로 기다리지 않고 가상 시각만 전진하는 시계 (스레드 안전)
+
+    실제 시간상 겹치는 sleep들은 한 그룹으로 묶어 같은 출발 시각(그룹 시작 시 가상 시각)에서 기상 시각을 계산하고,
+    가장 이른 기상 시각부터 순서대로 깨우며 가상 시각을 그 시각으로 전진시킨다.
+    → 병렬 조회 워커 N개가 각자 응답 지연만큼 sleep하면 가상 시각은 합이 아니라 최댓값만큼 전진하고,
+      스레드 실행 순서와 무관하게 결과가 같다. 같은 스레드가 그룹 안에서 다시 sleep하면 자기 직전 기상 시각에서 출발.
+    settle: 마지막 sleep 등록 / 기상 후 이만큼 (실제 초) 지나야 다음 sleeper를 깨움
+            (동시 출발 워커가 모두 등록될 때까지 대기 + 깨어난 워커가 기상 순서대로 완료되도록 간격 확보).
+            sleep하는 스레드가 하나뿐이면 0으로 둬도 결정적
+    """
+    simulated = True
+
+    def __init__(self, start=None, settle=0.001):
+        self._now = float(_time.time() if start is None else start)
+        self._cond = threading.Condition()
+        self._pending = []  # heap: (기상 시각, 등록 순번)
+        self._seq = 0
+        self._group = 0  # 현재 sleep 그룹 번호 (대기자가 없어지면 다음 그룹)
+        self._group_start = self._now
+        self._last_event = 0.0  # 마지막 등록 / 기상 (실제 monotonic 시각)
+        self._local = threading.local()  # 스레드별 (그룹 번호, 마지막 기상 시각)
+        self.settle = settle
+        self.slept = 0.0  # 누적 가상 대기 (초)
+
+    def time(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds <= 0:
+            return
+        with self._cond:
+            if not self._pending:
+                self._group += 1
+                self._group_start = self._now
+            start = self._group_start
+            last = getattr(self._local, "wake", None)
+            if last is not None and last[0] == self._group:
+                start = last[1]
+            entry = (start + seconds, self._seq)
+            self._seq += 1
+            heapq.heappush(self._pending, entry)
+            self._last_event = _time.monotonic()
+            self._cond.notify_all()
+            while True:
+                if self._pending[0] == entry:
+                    quiet = _time.monotonic() - self._last_event
+                    if quiet >= self.settle:
+                        break
+                    self._cond.wait(self.settle - quiet)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._pending)
+            target = entry[0]
+            if target > self._now:
+                self.slept += target - self._now
+                self._now = target
+            self._local.wake = (self._group, target)
+            self._last_event = _time.monotonic()
+            self._cond.notify_all()
+
+    def advance_to(self, ts):
+        """가상 시각을 ts로 이동 (과거로는 돌아가지 않음)"""
+        with self._cond:
+            self._now = max(self._now, float(ts))
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self._now, tz)
+
+
+_clock = SystemClock()
+
+
+def install(new_clock):
+    """프로세스 전역 시계 교체. 이전 시계 반환"""
+    global _clock
+    previous, _clock = _clock, new_clock
+    return previous
+
+
+def current():
+    return _clock
+
+
+def time():
+    return _clock.time()
+
+
+def sleep(seconds):
+    _clock.sleep(seconds)
+
+
+def now(tz=None):
+    return _clock.now(tz)
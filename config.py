@@ -25,6 +25,26 @@ class Config:
 
     # === 고래봇 설정 ===
     MAX_POSITIONS = int(os.getenv("MAX_POSITIONS", "30"))  # 동시 보유 최대 포지션 수
+    POLL_WORKERS = int(os.getenv("POLL_WORKERS", "8"))  # 고래 Activity 병렬 조회 워커 수
+    BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", "8"))  # 백테스터 이력 / 정산가 병렬 조회 워커 수 (요청 간격은 공용 요청 예산이 조절)
+    POLL_BUDGET_PER_SEC = float(os.getenv("POLL_BUDGET_PER_SEC", "6.0"))  # 고래 Activity 조회 예산 (초당 요청 수)
+    SEEN_TX_MAX = int(os.getenv("SEEN_TX_MAX", "10000"))  # 중복 방지 캐시 최근 tier 최대 건수
+    SEEN_TX_BLOOM_BITS = int(os.getenv("SEEN_TX_BLOOM_BITS", "0"))  # 과거 tier Bloom Filter 크기 (0=비활성, 고래 수천 명이면 1048576 권장)
+    SEEN_TX_HORIZON = int(os.getenv("SEEN_TX_HORIZON", "86400"))  # 중복 방지 캐시 최근 tier 보존 시간 (초, 이보다 오래된 tx는 축출. 최소 1800 = 신선도 필터, 0=크기 상한만)
+    STATE_FSYNC_INTERVAL = float(os.getenv("STATE_FSYNC_INTERVAL", "1.0"))  # 상태 저널 fsync 간격 (초)
+    STATE_COMPACT_BYTES = int(os.getenv("STATE_COMPACT_BYTES", "1000000"))  # 저널이 이 크기(byte)를 넘으면 스냅샷으로 압축
+    STATE_COMPACT_INTERVAL = int(os.getenv("STATE_COMPACT_INTERVAL", "3600"))  # 저널 압축 최대 간격 (초)
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))  # 거래/정산 로그 일괄 기록 간격 (초)
+    STATUS_JSON_INTERVAL = int(os.getenv("STATUS_JSON_INTERVAL", "30"))  # status_*.json 호환 파일 기록 간격 (초, 0=기록 안 함). 대시보드는 .shm 우선
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # localhost /status, /metrics HTTP 포트 (0=비활성)
+    PROFILE_REPORT_INTERVAL = int(os.getenv("PROFILE_REPORT_INTERVAL", "300"))  # 루프 단계별 소요 시간 요약 출력/저장 간격 (초, 0=비활성)
+    SETTLE_DEBUG_ROTATE_BYTES = int(os.getenv("SETTLE_DEBUG_ROTATE_BYTES", "5000000"))  # settle_debug.jsonl 로테이션 크기 (gzip 세그먼트로 압축)
+    RATE_LIMITS = os.getenv("RATE_LIMITS", "")  # 호스트별 요청 한도 덮어쓰기 ("host=초당요청:burst,..." 예: data-api.polymarket.com=5:10)
+    HTTP_RECORD = os.getenv("HTTP_RECORD", "")  # 요청/응답 기록 아카이브 경로 (.jsonl.gz, 비우면 기록 안 함)
+    HTTP_REPLAY = os.getenv("HTTP_REPLAY", "")  # 기록 아카이브로 프로세스 내 재생 (네트워크 접속 없음)
+    HTTP_REPLAY_SPEED = float(os.getenv("HTTP_REPLAY_SPEED", "1.0"))  # 재생 응답 지연 배속 (1=기록 그대로, 0=지연 없음)
+    API_BASE_URL = os.getenv("API_BASE_URL", "")  # API 요청을 <API_BASE_URL>/<host>/<path>로 우회 (localhost 재생 / mock 서버)
+    WHALE_DB_PATH = os.getenv("WHALE_DB_PATH", "")  # 고래 DB 경로 (비우면 whales.db, mock 서버가 시드한 DB를 쓸 때 지정)
 
     # === 시스템 ===
     PAPER_TRADING = os.getenv("PAPER_TRADING", "True").lower() == "true"
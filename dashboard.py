@@ -2,7 +2,10 @@ import json
 import os
 import time
 from datetime import datetime
-from collections import defaultdict
+from collections import deque
+from whale_registry import WhaleRegistry
+from whale_db import get_whale_db
+from status_channel import StatusReader
 
 def clear_console():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -14,16 +17,131 @@ def format_currency(value, width=0):
     reset = "\033[0m"
     return f"{color}{padded}{reset}"
 
+def offline_timeout(name):
+    # [FIX] Shadow Bot([R])은 거래가 없어도 켜져있는 것으로 간주 (가상 시뮬레이션)
+    # 또는 타임아웃을 길게 설정 (5분)
+    return 300 if name.startswith('[R] ') else 45
+
+def build_stat(data, default_name):
+    name = data.get('strategy', default_name)
+    return name, {
+        'pnl': float(data.get('pnl', 0.0)),
+        'trades': int(data.get('trades', 0)),
+        'win_rate': float(data.get('win_rate', 0.0)),
+        'total_bet': float(data.get('total_bet', 0.0)),
+        'active': int(data.get('active_bets', 0)),
+        'last_action': data.get('last_action', '-'),
+        'online': True
+    }
+
+def read_status_channels(base_dir, readers):
+    """status_*.shm 공유 메모리 채널 읽기 (재시도/sleep 없음, 생존 여부는 heartbeat 기준)
+
+    readers: {파일명: StatusReader} 캐시 (매핑은 한 번만 열고 재사용)
+    """
+    stats = {}
+    files = [f for f in os.listdir(base_dir) if f.startswith('status_') and f.endswith('.shm')]
+    for filename in [f for f in readers if f not in files]:
+        readers.pop(filename).close()
+    for filename in files:
+        try:
+            reader = readers.get(filename)
+            if reader is None:
+                reader = readers[filename] = StatusReader(os.path.join(base_dir, filename))
+            snap = reader.read()
+        except Exception:
+            # 봇이 세그먼트를 막 만드는 중 (크기 0) 등 → 다음 갱신 때 다시 시도
+            readers.pop(filename, None)
+            continue
+        if snap is None or not snap.data:
+            continue
+        try:
+            name, stat = build_stat(snap.data, filename[7:-4])
+        except Exception:
+            continue
+        stat['online'] = not snap.stopped and time.time() - snap.heartbeat <= offline_timeout(name)
+        stats[name] = stat
+    return stats
+
+class TradeTail:
+    """trade_history.jsonl 증분 tail 리더
+
+    처음 열 때는 파일 끝에서 initial_bytes만 읽어 최근 거래를 채우고,
+    이후에는 마지막으로 읽은 byte offset부터 추가된 부분만 읽는다.
+    파일 교체(inode 변경) / 잘림(크기 < offset, 예: reset_history.bat 후 재생성) 시 처음부터 다시 읽는다.
+    """
+
+    def __init__(self, path, maxlen=8, initial_bytes=64 * 1024):
+        self.path = path
+        self.initial_bytes = initial_bytes
+        self.recent = deque(maxlen=maxlen)  # 최근 거래 링 버퍼 (오래된 것 → 최신 순)
+        self._offset = None
+        self._inode = None
+        self._partial = b""  # 아직 줄바꿈이 안 들어온 마지막 줄
+
+    def _reset(self):
+        self.recent.clear()
+        self._offset = 0
+        self._partial = b""
+
+    def poll(self):
+        """새로 추가된 거래를 읽어 링 버퍼 갱신. 최근 거래 리스트(최신 순) 반환"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # 파일 삭제됨 (이력 초기화) → 다시 생기면 처음부터 읽음
+            if self._offset is not None:
+                self._reset()
+                self._inode = None
+            return list(reversed(self.recent))
+
+        first_open = self._offset is None
+        if not first_open and (st.st_ino != self._inode or st.st_size < self._offset):
+            self._reset()
+        self._inode = st.st_ino
+        if not first_open and st.st_size == self._offset:
+            return list(reversed(self.recent))
+
+        with open(self.path, 'rb') as f:
+            if first_open:
+                start = max(0, st.st_size - self.initial_bytes)
+                f.seek(start)
+                data = f.read()
+                if start > 0:
+                    # 중간부터 읽었으면 첫 줄은 잘린 줄이므로 버림
+                    data = data.split(b"\n", 1)[1] if b"\n" in data else b""
+            else:
+                f.seek(self._offset)
+                data = f.read()
+            self._offset = f.tell()
+
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self.recent.append(json.loads(line))
+            except Exception:
+                continue
+        return list(reversed(self.recent))
+
 def run_dashboard():
     # 스크립트 실행 위치 기준 절대 경로 설정
     base_dir = os.path.dirname(os.path.abspath(__file__))
     
     start_time = time.time()
+    # score 순 상위 30마리 (실제 트래킹 수와 동일), 고래 DB가 바뀐 경우에만 재로드
+    whale_registry = WhaleRegistry(get_whale_db(), top_n=30)
+    
+    status_readers = {}  # 공유 메모리 상태 채널 리더 캐시
+    trade_tail = TradeTail(os.path.join(base_dir, 'trade_history.jsonl'), maxlen=8)
     
     # [DEBUG] 디버깅용: 시작 시 경로와 파일 목록 한 번 확인
     print(f"Scanning directory: {base_dir}")
     try:
-        files = [f for f in os.listdir(base_dir) if f.startswith('status_') and f.endswith('.json')]
+        files = [f for f in os.listdir(base_dir) if f.startswith('status_') and (f.endswith('.json') or f.endswith('.shm'))]
         print(f"Found status files: {files}")
     except Exception as e:
         print(f"Error scanning directory: {e}")
@@ -33,11 +151,16 @@ def run_dashboard():
         stats = {}
         
         try:
-            # 절대 경로 사용하여 파일 목록 획득
+            # 1) 공유 메모리 채널 우선 (일관된 스냅샷 + heartbeat)
+            stats = read_status_channels(base_dir, status_readers)
+
+            # 2) 채널이 없는 봇만 status JSON 파일로 폴백
             files = [f for f in os.listdir(base_dir) if f.startswith('status_') and f.endswith('.json')]
             
             for filename in files:
                 full_path = os.path.join(base_dir, filename)
+                if filename[:-5] + '.shm' in status_readers:
+                    continue
                 
                 # 파일 읽기 시도 (Lock 경합 대비 재시도)
                 data = None
@@ -58,28 +181,15 @@ def run_dashboard():
 
                 # 데이터 파싱
                 try:
-                    name = data.get('strategy', filename[7:-5])
-                    stats[name] = {
-                        'pnl': float(data.get('pnl', 0.0)),
-                        'trades': int(data.get('trades', 0)),
-                        'win_rate': float(data.get('win_rate', 0.0)),
-                        'total_bet': float(data.get('total_bet', 0.0)),
-                        'active': int(data.get('active_bets', 0)),
-                        'last_action': data.get('last_action', '-'),
-                        'online': True
-                    }
+                    name, stat = build_stat(data, filename[7:-5])
+                    if name in stats:
+                        continue
+                    stats[name] = stat
                     
-                    # 파일 수정 시간이 60초 이상 지났으면 Offline 처리 (넉넉하게 잡음)
+                    # 파일 수정 시간이 타임아웃 이상 지났으면 Offline 처리 (넉넉하게 잡음)
                     mtime = os.path.getmtime(full_path)
-                    
-                    # [FIX] Shadow Bot([R])은 거래가 없어도 켜져있는 것으로 간주 (가상 시뮬레이션)
-                    # 또는 타임아웃을 길게 설정 (5분)
-                    if name.startswith('[R] '):
-                        if time.time() - mtime > 300: # 5분 이상 업데이트 없으면 OFF (봇이 죽었을 수도 있음)
-                            stats[name]['online'] = False
-                    else:
-                        if time.time() - mtime > 45:
-                            stats[name]['online'] = False
+                    if time.time() - mtime > offline_timeout(name):
+                        stats[name]['online'] = False
                 except Exception as parse_e:
                     # 데이터 형식이 깨진 경우 스킵
                     continue
@@ -143,43 +253,14 @@ def run_dashboard():
         print("=" * 55)
         
         # --- Active Whales Section (숫자만 표시) ---
-        whales_path = os.path.join(base_dir, 'whales.json')
-        active_whale_count = 0
-        try:
-            if os.path.exists(whales_path):
-                with open(whales_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        whales_data = json.loads(content)
-                        # score 순 상위 30마리만 카운트 (실제 트래킹 수와 동일하게)
-                        actives = sorted(
-                            [(k, v) for k, v in whales_data.items() if v.get('status') == 'active'],
-                            key=lambda x: x[1].get('score', 0), reverse=True
-                        )
-                        active_whale_count = min(len(actives), 30)
-        except Exception:
-            pass
+        active_whale_count = len(whale_registry.snapshot().top)
 
         print(f"\n🐳 [ACTIVE WHALES: {active_whale_count}]")
 
-        # --- Recent Trades Section ---
-        trade_log_path = os.path.join(base_dir, 'trade_history.jsonl')
+        # --- Recent Trades Section (추가된 부분만 읽는 tail) ---
         recent_trades = []
         try:
-            if os.path.exists(trade_log_path):
-                with open(trade_log_path, 'r', encoding='utf-8') as f:
-                    lines = f.readlines()
-                for line in reversed(lines[-50:]):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        t = json.loads(line)
-                        recent_trades.append(t)
-                        if len(recent_trades) >= 8:
-                            break
-                    except Exception:
-                        continue
+            recent_trades = trade_tail.poll()
         except Exception:
             pass
 
@@ -1,10 +1,14 @@
 import sys
 import os
 import json
-import time
-import requests
 from datetime import datetime
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import config
+from market_cache import market_cache
+from whale_db import get_whale_db
+from rate_budget import MAINTENANCE
+from http_client import get_client
 
 if hasattr(sys.stdout, 'reconfigure'):
     sys.stdout.reconfigure(encoding='utf-8', line_buffering=True)
@@ -13,90 +17,65 @@ if hasattr(sys.stderr, 'reconfigure'):
 from datetime import datetime
 from collections import defaultdict
 
-DB_FILE = "whales.json"
 SLIPPAGE_PCT = 0.03
 INITIAL_CAPITAL = 1000.0
+PRICE_MAX_AGE = 3600  # 백테스트 1회 동안 미정산 마켓 가격은 1시간 캐시 (정산 마켓은 영구)
 
 class DeepBacktester:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
-        self.market_cache = {} # conditionId -> final price or current price
+    def __init__(self, workers=None):
+        self.http = get_client(MAINTENANCE)  # 요청 간격은 공용 예산이 조절 (봇의 감지 요청이 항상 우선)
+        self.workers = workers or config.BACKTEST_WORKERS
         
     def load_whales(self):
-        if os.path.exists(DB_FILE):
-            with open(DB_FILE, "r", encoding="utf-8") as f:
-                db = json.load(f)
-            return {k: v for k, v in db.items() if v.get('status') == 'active'}
-        return {}
+        return get_whale_db().load_all(status='active')
 
     def fetch_all_trades(self, address, limit=2000):
         """특정 고래의 과거 트랜잭션을 가져옵니다. (최대 limit 지정)"""
         url = f"https://data-api.polymarket.com/activity?user={address}&limit={limit}"
         try:
-            r = self.session.get(url, timeout=15)
-            if r.status_code == 200:
-                activities = r.json()
-                print(f"[{address}] API에서 {len(activities)}건의 활동 정보를 가져왔습니다.")
-                
-                # 구매(BUY) 내역만 필터링
-                buys = []
-                for a in activities:
-                    if a.get('type') == 'TRADE' and a.get('side') == 'BUY':
-                        buys.append(a)
-                    elif a.get('action') == 'Buy': # Clob나 Activity V2 API 구조일 수 있음
-                        buys.append(a)
-                        
-                print(f"[{address}] BUY 필터링 후 {len(buys)}건의 매수 내역이 남았습니다.")
-                return buys
+            activities = self.http.get_json(url, "history")
+            print(f"[{address}] API에서 {len(activities)}건의 활동 정보를 가져왔습니다.")
+            
+            # 구매(BUY) 내역만 필터링
+            buys = []
+            for a in activities:
+                if a.get('type') == 'TRADE' and a.get('side') == 'BUY':
+                    buys.append(a)
+                elif a.get('action') == 'Buy': # Clob나 Activity V2 API 구조일 수 있음
+                    buys.append(a)
+                    
+            print(f"[{address}] BUY 필터링 후 {len(buys)}건의 매수 내역이 남았습니다.")
+            return buys
         except Exception as e:
             print(f"[{address}] 활동 내역 로드 에러: {e}")
         return []
 
-    def get_market_resolution_price(self, slug, conditionId, outcomeIndex):
-        """마켓의 최종 결과 (또는 현재 가격)을 캐싱하여 반환합니다."""
-        cache_key = f"{conditionId}_{outcomeIndex}"
-        if cache_key in self.market_cache:
-            return self.market_cache[cache_key]
-            
-        url = f"https://gamma-api.polymarket.com/events?slug={slug}"
-        try:
-            r = self.session.get(url, timeout=5)
-            if r.status_code == 200:
-                events = r.json()
-                if not events: return None
-                
-                for m in events[0].get('markets', []):
-                    if m.get('conditionId') == conditionId:
-                        prices = m.get('outcomePrices', [])
-                        if isinstance(prices, str):
-                            try: prices = json.loads(prices)
-                            except: pass
-                            
-                        if isinstance(prices, list) and len(prices) > outcomeIndex:
-                            price = float(prices[outcomeIndex])
-                            self.market_cache[cache_key] = price
-                            return price
-        except:
-            pass
-        return None
+    def _fetch_event_prices(self, slug, condition_ids):
+        """같은 이벤트(slug)에 속한 마켓들의 outcome 가격을 이벤트 조회 1회로 반환 {conditionId: [price] | None}"""
+        prices = {}
+        for cid in condition_ids:
+            try:
+                prices[cid] = market_cache.get_outcome_prices(slug, cid, self.http, max_age=PRICE_MAX_AGE)
+            except Exception as e:
+                print(f"[WARN] 정산가 조회 실패 ({slug}): {e}")
+                prices[cid] = None
+        return prices
 
-    def simulate(self):
-        print("=== 📈 Deep Backtesting Engine ===")
-        whales = self.load_whales()
-        if not whales:
-            print("활성화된 고래가 없습니다.")
-            return
+    def collect_trades(self, whales, executor):
+        """모든 고래의 매수 이력을 병렬 수집 (응답 도착 순서대로 진행 상황 출력)
 
-        all_trades = []
-        
-        # 1. 모든 고래의 과거 트랜잭션 수집
-        for addr, info in whales.items():
+        결과는 고래 입력 순서대로 이어 붙임 → 같은 시각 거래의 순서가 응답 도착 순서에 따라 바뀌지 않음
+        """
+        per_whale = [[] for _ in whales]
+        collected = 0
+        futures = {executor.submit(self.fetch_all_trades, addr): (i, addr) for i, addr in enumerate(whales)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i, addr = futures[future]
+            info = whales[addr]
             name = info.get('name', 'Unknown')
             score = info.get('score', 50)
-            print(f"⬇️ 과거 거래 내역 수집 중... {name} ({addr})")
-            
-            trades = self.fetch_all_trades(addr)
+            trades = future.result()
+            parsed = 0
             for t in trades:
                 # 타임스탬프 파싱
                 ts_val = t.get('timestamp')
@@ -109,16 +88,62 @@ class DeepBacktester:
                     t['parsed_time'] = ts
                     t['whale_name'] = name
                     t['whale_score'] = score
-                    all_trades.append(t)
+                    per_whale[i].append(t)
+                    parsed += 1
                 except Exception as e:
                     continue
-            time.sleep(1) # API Rate limit 보호
+            collected += parsed
+            print(f"⬇️ [{done}/{len(futures)}] {name} ({addr}) 매수 {parsed}건 수집 (누적 {collected}건)")
+        return [t for trades in per_whale for t in trades]
+
+    def resolve_prices(self, trades, executor):
+        """거래들의 마켓 결과를 conditionId 단위로 중복 제거 후 병렬 조회 {conditionId: [price] | None}
+
+        정산 완료 마켓(resolution store)은 HTTP 없이 바로 채우고, 나머지는 이벤트(slug) 단위로 묶어 1회씩 조회
+        """
+        slugs = {}
+        for t in trades:
+            cid = t.get('conditionId')
+            if cid and cid not in slugs:
+                slugs[cid] = t.get('slug')
 
-        if not all_trades:
-            print("분석할 거래 내역이 없습니다.")
+        prices = {}
+        by_slug = defaultdict(list)
+        for cid, slug in slugs.items():
+            record = market_cache.resolutions.get(cid) if market_cache.resolutions is not None else None
+            if record is not None and record.get('outcomePrices'):
+                prices[cid] = [float(p) for p in record['outcomePrices']]
+            elif slug:
+                by_slug[slug].append(cid)
+            else:
+                prices[cid] = None  # slug 없는 거래는 조회 불가
+        print(f"🔎 정산가 조회: 거래 {len(trades)}건 → 마켓 {len(slugs)}개 (정산 완료 {len(prices)}개, 이벤트 조회 {len(by_slug)}건)")
+
+        futures = [executor.submit(self._fetch_event_prices, slug, cids) for slug, cids in by_slug.items()]
+        step = max(1, len(futures) // 20)
+        for done, future in enumerate(as_completed(futures), 1):
+            prices.update(future.result())
+            if done % step == 0 or done == len(futures):
+                print(f"   이벤트 {done}/{len(futures)} 조회 완료 (캐시 hit {market_cache.hits} / miss {market_cache.misses})")
+        return prices
+
+    def simulate(self):
+        print("=== 📈 Deep Backtesting Engine ===")
+        whales = self.load_whales()
+        if not whales:
+            print("활성화된 고래가 없습니다.")
             return
 
-        # 2. 시간순 정렬 (타임라인 구축)
+        # 1. 모든 고래의 과거 트랜잭션 수집 및 마켓 결과 조회 (워커 풀 병렬, 요청 간격은 공용 예산이 조절)
+        print(f"⬇️ 고래 {len(whales)}명의 과거 거래 내역 수집 중... (워커 {self.workers}개)")
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backtest") as executor:
+            all_trades = self.collect_trades(whales, executor)
+            if not all_trades:
+                print("분석할 거래 내역이 없습니다.")
+                return
+            market_prices = self.resolve_prices(all_trades, executor)
+
+        # 2. 시간순 정렬 (타임라인 구축, 같은 시각은 고래 입력 순서 유지 → 실행마다 같은 결과)
         all_trades.sort(key=lambda x: x['parsed_time'])
         print(f"\n총 {len(all_trades)}개의 매수 트랜잭션을 시간순으로 시뮬레이션 합니다...")
 
@@ -154,11 +179,11 @@ class DeepBacktester:
             # (시간 엄밀성을 위해선 만기일(resolved time)을 추적하는 큐가 필요하지만, 
             # 여기서는 근사치 PnL 곡선을 그리기 위해 즉시 정산 처리)
             
-            res_price = self.get_market_resolution_price(t.get('slug'), t.get('conditionId'), int(t.get('outcomeIndex', 0)))
-            time.sleep(0.1) # 감마 API 레이트리밋
-            
-            if res_price is None:
+            prices = market_prices.get(t.get('conditionId'))
+            outcome_index = int(t.get('outcomeIndex', 0))
+            if not prices or len(prices) <= outcome_index:
                 continue
+            res_price = prices[outcome_index]
                 
             payout = shares * res_price
             profit = payout - bet_size
@@ -199,6 +224,7 @@ class DeepBacktester:
             
         with open("backtest_results.json", "w", encoding="utf-8") as f:
             json.dump(timeline_log, f, indent=2, ensure_ascii=False)
+        market_cache.persist(force=True)
             
         print("\n✅ 전체 타임라인 로그가 backtest_results.json 에 저장되었습니다.")
 
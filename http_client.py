@@ -0,0 +1,147 @@
+"""
+공용 HTTP 전송 계층
+
+봇 / CLOB 클라이언트 / 매니저 / 스코어러 / 백테스터가 각자 만들던 requests.Session 대신
+이 모듈의 HttpClient를 통해 요청한다.
+- 호스트별 커넥션 풀 (keep-alive 재사용, 병렬 조회 워커 수만큼 풀 크기 확보)
+- 연결 오류 / 5xx 재시도 (지수 백오프 + jitter → 여러 스레드가 동시에 재시도해도 몰리지 않음)
+- 429는 재시도하지 않고 공용 요청 예산(rate_budget)이 호스트 단위로 백오프
+- 엔드포인트 종류별 기본 timeout (connect, read)
+- get_json: 응답 JSON을 한 번만 파싱해서 반환
+
+우선순위(CRITICAL / SETTLEMENT / MAINTENANCE)별로 세션을 하나씩 공유한다:
+    http = get_client(MAINTENANCE)
+    data = http.get_json(url, endpoint="history")
+
+HTTP_RECORD / HTTP_REPLAY / API_BASE_URL 설정 시 모든 세션에 기록 hook / 재생 어댑터 / 주소 우회 적용 (http_replay 참고)
+"""
+
+import threading
+
+import requests
+from urllib3.util.retry import Retry
+
+from bot_metrics import request_metrics
+from config import config
+from http_replay import HttpRecorder, ReplayAdapter, ReplayArchive, mount_everywhere, rewrite_url
+from rate_budget import CRITICAL, BudgetAdapter
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
+
+# 엔드포인트 종류별 (connect, read) timeout (초)
+TIMEOUTS = {
+    "activity": (3.05, 5),   # 고래 최근 거래 감지 (짧게 끊고 다음 주기에 재조회)
+    "event": (3.05, 5),      # Gamma 이벤트 (마켓 상태 / 정산가)
+    "book": (3.05, 15),      # CLOB 호가창 (단건 / 배치)
+    "market": (3.05, 10),    # CLOB 마켓 조회 (정산 결과)
+    "history": (5, 15),      # 고래 거래 이력 / 리더보드 (유지보수 / 백테스트)
+    "default": (5, 10),
+}
+
+# 호스트별 커넥션 풀 크기 (목록에 없는 호스트는 DEFAULT_POOL_SIZE)
+# data-api는 고래 Activity 병렬 조회 워커 수만큼 확보 (풀 부족 시 커넥션 폐기/재생성 반복)
+POOL_SIZES = {
+    "data-api.polymarket.com": max(10, config.POLL_WORKERS),
+    "gamma-api.polymarket.com": 10,
+    "clob.polymarket.com": 10,
+}
+DEFAULT_POOL_SIZE = 4
+
+RETRY_STATUSES = (500, 502, 503, 504, 520, 524)  # 429 제외: 재시도 대신 rate_budget이 호스트 단위 백오프. 재시도마다 예산 토큰 소모 (BudgetAdapter)
+
+_session_setups = []  # 모든 HttpClient 세션에 적용할 함수 (기록 hook / 재생 어댑터)
+_all_clients = []
+
+
+class HttpClient:
+    def __init__(self, priority=CRITICAL, retries=3, headers=None, pool_sizes=None):
+        self.priority = priority
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            backoff_jitter=0.5,
+            backoff_max=10,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        # 호스트별 어댑터 = 호스트별 커넥션 풀 (requests는 가장 긴 prefix의 어댑터를 사용)
+        for host, size in (pool_sizes or POOL_SIZES).items():
+            self.session.mount(f"https://{host}", BudgetAdapter(
+                priority=priority, pool_connections=1, pool_maxsize=size, max_retries=retry))
+        fallback = BudgetAdapter(priority=priority, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=retry)
+        self.session.mount("https://", fallback)
+        self.session.mount("http://", fallback)
+        request_metrics.instrument(self.session)
+        self.base_url = config.API_BASE_URL
+        for setup in list(_session_setups):
+            setup(self.session)
+        with _clients_lock:
+            _all_clients.append(self)
+
+    def request(self, method, url, endpoint="default", **kwargs):
+        kwargs.setdefault("timeout", TIMEOUTS.get(endpoint, TIMEOUTS["default"]))
+        if self.base_url:
+            url = rewrite_url(url, self.base_url)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, endpoint="default", **kwargs):
+        return self.request("GET", url, endpoint, **kwargs)
+
+    def post(self, url, endpoint="default", **kwargs):
+        return self.request("POST", url, endpoint, **kwargs)
+
+    def get_json(self, url, endpoint="default", **kwargs):
+        """GET 후 JSON 1회 파싱. 2xx가 아니면 requests.HTTPError (e.response.status_code로 확인)"""
+        r = self.get(url, endpoint, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    def post_json(self, url, endpoint="default", **kwargs):
+        r = self.post(url, endpoint, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+
+_clients = {}
+_clients_lock = threading.RLock()  # get_client 안에서 HttpClient 생성 시 재진입
+
+
+def configure_sessions(setup):
+    """이미 만들어진 세션과 이후 만들어질 세션 모두에 setup(session) 적용"""
+    with _clients_lock:
+        _session_setups.append(setup)
+        clients = list(_all_clients)
+    for client in clients:
+        setup(client.session)
+
+
+def use_replay(responder, speed=1.0):
+    """모든 세션의 어댑터를 재생 어댑터로 교체 (responder: ReplayArchive.respond 등)"""
+    adapter = ReplayAdapter(responder, speed)
+    configure_sessions(lambda session: mount_everywhere(session, adapter))
+    return adapter
+
+
+def get_client(priority=CRITICAL):
+    """우선순위별 공유 HttpClient (프로세스 내 모든 모듈이 같은 커넥션 풀 사용)"""
+    with _clients_lock:
+        client = _clients.get(priority)
+        if client is None:
+            client = _clients[priority] = HttpClient(priority)
+        return client
+
+
+if config.HTTP_REPLAY:
+    replay_archive = ReplayArchive(config.HTTP_REPLAY)
+    use_replay(replay_archive.respond, config.HTTP_REPLAY_SPEED)
+    print(f"[HTTP] 재생 모드: {config.HTTP_REPLAY} ({replay_archive.records}건, speed={config.HTTP_REPLAY_SPEED})")
+elif config.HTTP_RECORD:
+    recorder = HttpRecorder(config.HTTP_RECORD)
+    configure_sessions(recorder.attach)
+    print(f"[HTTP] 기록 모드: {config.HTTP_RECORD}")
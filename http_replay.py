@@ -0,0 +1,363 @@
+"""
+HTTP 기록 / 재생 (네트워크 없이 봇 / 매니저 / 스코어러 / 백테스터를 반복 실행)
+
+기록: 실전 실행 중 http_client를 거치는 모든 요청/응답 쌍을 gzip JSONL 아카이브로 저장
+    HTTP_RECORD=capture.jsonl.gz python whale_copy_bot.py
+재생 (프로세스 내): 세션 어댑터를 ReplayAdapter로 교체 → 네트워크 접속 없음
+    HTTP_REPLAY=capture.jsonl.gz HTTP_REPLAY_SPEED=0 python whale_manager.py
+재생 (localhost 서버): 다른 프로세스 / 도구에서도 같은 아카이브 사용
+    python http_replay.py serve capture.jsonl.gz 8900 [speed]
+    API_BASE_URL=http://127.0.0.1:8900 python whale_copy_bot.py
+    (API_BASE_URL 지정 시 https://<host>/<path> → <API_BASE_URL>/<host>/<path> 로 요청)
+아카이브 요약:
+    python http_replay.py info capture.jsonl.gz
+
+아카이브 형식 (gzip JSONL):
+    1행: {"archive": "whalebot-http", "version": 1, "started_at": epoch}
+    이후: {"t": 시작 후 경과(초), "method", "url", "req": 요청 body, "status", "ctype", "elapsed": 응답 시간(초), "body"}
+
+재생 규칙:
+- 같은 요청(method + host + path + 정렬된 query + body)은 기록된 순서대로 응답, 다 쓰면 마지막 응답 반복
+  (기본 순서 기준 재생은 기록 시각 t를 보지 않음 → 요청 사이 간격은 재현되지 않고 재생 측 호출 속도를 따름)
+- 정확히 일치하는 요청이 없으면 변동 파라미터(start 등)를 뺀 키로 다시 찾고, 그래도 없으면 404
+- speed: 응답 1건당 지연(elapsed)만 조절. 1.0 = 기록된 응답 시간 그대로, 10 = 10배 빠르게, 0 = 지연 없음
+- 시각 기준 재생 (ReplayArchive(path, clock=SimulatedClock)): 순서 대신 가상 시각 시점에 기록돼 있던 응답
+  (started_at + t <= 현재 가상 시각인 마지막 기록, 그 이전이면 첫 기록)을 반환 → sim_replay 참고
+"""
+
+import atexit
+import bisect
+import gzip
+import json
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+import clock as bot_clock
+
+ARCHIVE_MAGIC = "whalebot-http"
+ARCHIVE_VERSION = 1
+
+# 호출 시점의 상태(커서 시각 등)에 따라 값이 달라지는 query 파라미터 (느슨한 매칭 시 제외)
+VOLATILE_PARAMS = ("start", "end", "_")
+
+
+def _canonical_body(body):
+    if body is None:
+        return ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return body
+
+
+def request_key(method, url, body=None, drop_params=()):
+    """재생 매칭 키: query 순서 / JSON body 공백 차이를 무시"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in drop_params)
+    return f"{method.upper()} {parts.hostname}{parts.path}?{urlencode(query)} {_canonical_body(body)}"
+
+
+class HttpRecorder:
+    """http_client 세션의 응답 hook → 백그라운드 스레드가 gzip 아카이브에 기록
+
+    요청 스레드는 응답 객체를 큐에 넣기만 한다 (직렬화 / 압축은 기록 스레드에서 수행).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.started = bot_clock.time()  # 시뮬레이션 시계로 돌린 실행도 가상 시각으로 기록
+        self.recorded = 0
+        self._queue = queue.SimpleQueue()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._file.write(json.dumps({"archive": ARCHIVE_MAGIC, "version": ARCHIVE_VERSION,
+                                     "started_at": self.started}) + "\n")
+        self._thread = threading.Thread(target=self._run, daemon=True, name="http-recorder")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def attach(self, session):
+        hooks = session.hooks.setdefault("response", [])
+        if self._on_response not in hooks:
+            hooks.append(self._on_response)
+        return session
+
+    def _on_response(self, response, *args, **kwargs):
+        # body는 요청 스레드에서 읽어 둔다 (호출부가 어차피 읽는 값, 기록 스레드와 동시에 읽으면 body가 비어버림)
+        response.content
+        self._queue.put((bot_clock.time(), response))
+        return response
+
+    def _run(self):
+        last_flush = time.time()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(*item)
+            except Exception as e:
+                print(f"[WARN] HTTP 기록 실패: {e}")
+            if time.time() - last_flush >= 1.0:
+                self._file.flush()
+                last_flush = time.time()
+        self._file.close()
+
+    def _write(self, ts, response):
+        request = response.request
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        record = {
+            "t": round(ts - self.started, 4),
+            "method": request.method,
+            "url": request.url,
+            "req": body,
+            "status": response.status_code,
+            "ctype": response.headers.get("Content-Type", "application/json"),
+            "elapsed": round(response.elapsed.total_seconds(), 4),
+            "body": response.content.decode("utf-8", "replace"),
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.recorded += 1
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(10)
+
+
+class ReplayArchive:
+    """아카이브를 메모리에 올려 요청 키별 응답 시퀀스로 재생 (스레드 안전)
+
+    clock: 지정 시 기록 순서 대신 clock.time() 시점 기준으로 응답 선택 (가상 시각 재생).
+           지정하지 않으면 기록 시각 t는 쓰지 않고 요청 키별 순서로만 응답
+    """
+
+    def __init__(self, path, volatile_params=VOLATILE_PARAMS, clock=None):
+        self.path = path
+        self.volatile_params = volatile_params
+        self.clock = clock
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._exact = {}
+        self._loose = {}
+        self._cursors = {}
+        self._lock = threading.Lock()
+        self.records = 0
+        self.hits = 0
+        self.loose_hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # 기록 도중 종료된 마지막 줄
+                if "archive" in rec:
+                    if rec.get("archive") != ARCHIVE_MAGIC:
+                        raise ValueError(f"HTTP 아카이브 형식이 아님: {self.path}")
+                    self.started_at = rec.get("started_at", 0.0)
+                    continue
+                self.add(rec)
+        # 기록 스레드는 응답 도착 순서로 쓰므로 거의 정렬돼 있음 (시각 기준 재생의 이분 탐색용)
+        for table in (self._exact, self._loose):
+            for seq in table.values():
+                seq.sort(key=lambda r: r.get("t", 0.0))
+
+    def add(self, rec):
+        exact = request_key(rec["method"], rec["url"], rec.get("req"))
+        loose = request_key(rec["method"], rec["url"], rec.get("req"), self.volatile_params)
+        self._exact.setdefault(exact, []).append(rec)
+        self._loose.setdefault(loose, []).append(rec)
+        self.records += 1
+        self.duration = max(self.duration, rec.get("t", 0.0))
+
+    def _next(self, table, key):
+        seq = table.get(key)
+        if not seq:
+            return None
+        if self.clock is not None:
+            elapsed = self.clock.time() - self.started_at
+            i = bisect.bisect_right(seq, elapsed, key=lambda r: r.get("t", 0.0))  # key=: Python 3.10+ (README 요구 버전)
+            return seq[max(i - 1, 0)]
+        cursor_key = (id(table), key)
+        i = self._cursors.get(cursor_key, 0)
+        self._cursors[cursor_key] = i + 1
+        return seq[min(i, len(seq) - 1)]
+
+    def lookup(self, method, url, body=None):
+        """기록된 응답 record (없으면 None)"""
+        with self._lock:
+            rec = self._next(self._exact, request_key(method, url, body))
+            if rec is not None:
+                self.hits += 1
+                return rec
+            rec = self._next(self._loose, request_key(method, url, body, self.volatile_params))
+            if rec is not None:
+                self.loose_hits += 1
+                return rec
+            self.misses += 1
+            return None
+
+    def respond(self, method, url, body=None):
+        """(status, content_type, body_bytes, elapsed) — 기록이 없으면 404"""
+        rec = self.lookup(method, url, body)
+        if rec is None:
+            return 404, "application/json", b'{"error": "not recorded"}', 0.0
+        return rec["status"], rec.get("ctype", "application/json"), rec["body"].encode("utf-8"), rec.get("elapsed", 0.0)
+
+    def stats(self):
+        return {"records": self.records, "hits": self.hits, "loose_hits": self.loose_hits, "misses": self.misses}
+
+
+class ReplayAdapter(HTTPAdapter):
+    """네트워크 대신 responder에서 응답을 만드는 어댑터
+
+    responder: (method, url, body) -> (status, content_type, body_bytes, elapsed)
+    """
+
+    def __init__(self, responder, speed=1.0):
+        super().__init__()
+        self.responder = responder
+        self.speed = speed
+
+    def send(self, request, **kwargs):
+        status, ctype, body, elapsed = self.responder(request.method, request.url, request.body)
+        if self.speed and elapsed:
+            bot_clock.sleep(elapsed / self.speed)  # 시뮬레이션 시계에서는 가상 시각만 전진
+        response = Response()
+        response.status_code = status
+        response.reason = "OK" if status < 400 else "Replay"
+        response.headers = CaseInsensitiveDict({"Content-Type": ctype, "Content-Length": str(len(body))})
+        response._content = body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+
+def mount_everywhere(session, adapter):
+    """세션에 등록된 모든 prefix(호스트별 풀 포함)를 adapter로 교체"""
+    for prefix in list(session.adapters) or ["https://", "http://"]:
+        session.mount(prefix, adapter)
+    return session
+
+
+def rewrite_url(url, base_url):
+    """https://<host>/<path>?q → <base_url>/<host>/<path>?q (localhost 재생 서버용)"""
+    parts = urlsplit(url)
+    rewritten = f"{base_url.rstrip('/')}/{parts.hostname}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+class ReplayServer:
+    """responder를 localhost HTTP로 노출 (데몬 스레드)
+
+    요청 경로의 첫 조각을 원래 호스트로 해석한다: /data-api.polymarket.com/activity?... → https://data-api.polymarket.com/activity?...
+    """
+
+    def __init__(self, responder, port=0, host="127.0.0.1", speed=1.0):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (클라이언트 커넥션 풀 재사용)
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                target = "https://" + self.path.lstrip("/")
+                try:
+                    status, ctype, payload, elapsed = server.responder(self.command, target, body)
+                except Exception as e:
+                    status, ctype, payload, elapsed = 500, "text/plain", str(e).encode("utf-8"), 0.0
+                if server.speed and elapsed:
+                    time.sleep(elapsed / server.speed)
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass  # 콘솔 로그 오염 방지
+
+        self.responder = responder
+        self.speed = speed
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.base_url = f"http://{host}:{self.port}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True, name="replay-http")
+        self._thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def archive_summary(path):
+    """엔드포인트별 기록 건수 / 상태코드 / 평균 응답 시간"""
+    from bot_metrics import endpoint_label
+
+    counts, statuses, elapsed = Counter(), Counter(), Counter()
+    duration = 0.0
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if "archive" in rec:
+                continue
+            label = endpoint_label(rec["url"])
+            counts[label] += 1
+            statuses[rec["status"]] += 1
+            elapsed[label] += rec.get("elapsed", 0.0)
+            duration = max(duration, rec.get("t", 0.0))
+    return {
+        "duration_s": round(duration, 1),
+        "requests": sum(counts.values()),
+        "status": dict(statuses),
+        "endpoints": {label: {"count": n, "avg_ms": round(elapsed[label] / n * 1000, 1)}
+                      for label, n in counts.most_common()},
+    }
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "serve" and len(sys.argv) > 2:
+        archive = ReplayArchive(sys.argv[2])
+        port = int(sys.argv[3]) if len(sys.argv) > 3 else 8900
+        speed = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+        server = ReplayServer(archive.respond, port=port, speed=speed)
+        print(f"▶ {archive.records}건 재생 서버 시작: API_BASE_URL={server.base_url} (speed={speed})")
+        try:
+            while True:
+                time.sleep(60)
+                print(f"[Replay] {archive.stats()}")
+        except KeyboardInterrupt:
+            server.close()
+    elif cmd == "info" and len(sys.argv) > 2:
+        print(json.dumps(archive_summary(sys.argv[2]), ensure_ascii=False, indent=2))
+    else:
+        print(__doc__)
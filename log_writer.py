@@ -0,0 +1,148 @@
+"""
+비동기 JSONL 로그 기록기
+
+거래 스레드는 dict를 큐에 넣기만 하고 (파일 open/write/close 없음),
+백그라운드 스레드가 flush_interval 마다 모아서 한 번에 기록한다.
+- 큐 크기 고정 (가득 차면 버리고 dropped 카운트 증가 → 거래 스레드가 디스크 때문에 멈추지 않음)
+- 크기 기준 로테이션: rotate_bytes 초과 시 현재 파일을 gzip 세그먼트(<이름>.<시각>.jsonl.gz)로 압축, 최근 backups개만 보관
+- 프로세스 종료 시 남은 로그 자동 flush (atexit)
+"""
+
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+_writers = []
+_writers_lock = threading.Lock()
+
+
+class JsonlLogWriter:
+    def __init__(self, path, flush_interval=1.0, max_queue=10000, rotate_bytes=None, backups=5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._flushed = threading.Condition()
+        self._pending = 0  # 큐에 넣었지만 아직 파일에 쓰지 않은 건수
+        self._pending_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name=f"log-{os.path.basename(path)}")
+        self._thread.start()
+        with _writers_lock:
+            _writers.append(self)
+
+    def write(self, record):
+        """record(dict)를 큐에 추가. 직렬화와 파일 기록은 백그라운드 스레드에서 수행"""
+        # 넣기 전에 세야 백그라운드 스레드가 먼저 꺼내 차감해도 _pending이 음수 / 0이 되지 않음 (flush 조기 반환 방지)
+        with self._pending_lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._pending_lock:
+                self._pending -= 1
+            self.dropped += 1
+            return False
+        return True
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def _drain(self, first):
+        batch = [first]
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # flush_interval 동안 쌓인 기록을 모아 한 번에 기록
+            if not self._stop.is_set():
+                self._stop.wait(self.flush_interval)
+            batch = self._drain(first)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"[WARN] 로그 기록 실패 ({self.path}, {len(batch)}건): {e}")
+            with self._pending_lock:
+                self._pending -= len(batch)
+            with self._flushed:
+                self._flushed.notify_all()
+
+    def _write_batch(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False))
+            except (TypeError, ValueError) as e:
+                print(f"[WARN] 로그 직렬화 실패 ({self.path}): {e}")
+        if not lines:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            size = f.tell()
+        self.written += len(lines)
+        if self.rotate_bytes and size >= self.rotate_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """현재 파일을 gzip 세그먼트로 압축하고 새 파일로 시작"""
+        base, ext = os.path.splitext(self.path)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        segment = f"{base}.{stamp}{ext}.gz"
+        counter = 1
+        while os.path.exists(segment):  # 같은 초에 여러 번 로테이션된 경우
+            segment = f"{base}.{stamp}-{counter}{ext}.gz"
+            counter += 1
+        rotating = self.path + ".rotating"
+        os.replace(self.path, rotating)
+        with open(rotating, "rb") as src, gzip.open(segment, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotating)
+        self.rotations += 1
+        segments = sorted(glob.glob(f"{glob.escape(base)}.*{ext}.gz"), key=os.path.getmtime)
+        for old in segments[:-self.backups] if self.backups else []:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def flush(self, timeout=5.0):
+        """큐에 쌓인 기록이 파일에 쓰일 때까지 대기 (테스트 / 종료용)"""
+        deadline = time.time() + timeout
+        with self._flushed:
+            while self._pending > 0 and self._thread.is_alive():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+@atexit.register
+def _close_all():
+    with _writers_lock:
+        writers = list(_writers)
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,411 @@
+"""
+Gamma 이벤트(events?slug=) 조회 공용 캐시
+
+봇 / 스코어러 / 매니저 / 백테스터가 같은 slug를 각자 조회하던 것을 한 곳으로 모음.
+- 필드별 TTL: tags, endDate는 길게 / outcomePrices, closed는 짧게 (기준 시각은 clock → 시뮬레이션 재생 시 가상 시각)
+  엔트리는 이벤트 단위라, 요청 필드 중 가장 짧은 TTL로 유효성을 판단하고 만료되면 이벤트 전체를 다시 조회한다
+- 결과가 확정된 마켓 (가격 0/1 또는 UMA 정산 완료)만으로 이뤄진 이벤트는 만료 없음 (closed만으로는 부족)
+- LRU 축출 (최대 엔트리 수 고정)
+- 디스크 warm start (재시작 시 market_cache.json에서 복구)
+- hit / miss 카운터
+- 결과 확정 마켓 최종 가격/승자 영구 저장소 (resolved_markets.jsonl, 재조회 없음)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import clock
+from bot_metrics import profiler
+
+GAMMA_API_BASE = "https://gamma-api.polymarket.com"
+
+# 필드별 TTL (초)
+FIELD_TTLS = {
+    "tags": 6 * 3600,
+    "endDate": 6 * 3600,
+    "title": 6 * 3600,
+    "outcomePrices": 5,
+    "closed": 5,
+}
+DEFAULT_TTL = 5
+EMPTY_TTL = 60  # 빈 응답(존재하지 않는 slug)은 1분만 캐싱
+
+# 캐시에 보관하는 필드 (이벤트 원본은 description 등으로 수십 KB라 필요한 필드만 남김)
+EVENT_KEYS = ("id", "slug", "title", "endDate", "closed")
+MARKET_KEYS = ("id", "conditionId", "question", "outcomes", "outcomePrices", "closed",
+               "resolved", "umaResolutionStatus", "winnerOutcome", "clobTokenIds", "endDate")
+
+
+def _slim_event(event):
+    slim = {k: event[k] for k in EVENT_KEYS if k in event}
+    slim["tags"] = [{"label": t.get("label")} for t in event.get("tags") or [] if t.get("label")]
+    slim["markets"] = [{k: m[k] for k in MARKET_KEYS if k in m} for m in event.get("markets") or []]
+    return slim
+
+
+def _robust_json_load(data):
+    if not isinstance(data, str):
+        return data
+    try:
+        return json.loads(data)
+    except Exception:
+        return data
+
+
+def parse_outcome_prices(market):
+    """market['outcomePrices'] (JSON 문자열 또는 리스트) → 리스트. 실패 시 None"""
+    prices = _robust_json_load(market.get("outcomePrices"))
+    return prices if isinstance(prices, list) else None
+
+
+def _normalize_outcome(res_str):
+    if not res_str:
+        return None
+    res = str(res_str).upper()
+    if any(k in res for k in ["YES", "UP", "ABOVE", "HIGH"]):
+        return "YES"
+    if any(k in res for k in ["NO", "DOWN", "BELOW", "LOW"]):
+        return "NO"
+    return res
+
+
+def market_winner_from_payload(m):
+    """Gamma 마켓 payload에서 승자 판정: 'YES' / 'NO' / 기타 outcome 문자열 / 'WAITING'"""
+    # 1. outcomePrices 분석 (1.0 근접 정산 확인)
+    prices = _robust_json_load(m.get("outcomePrices"))
+    outcomes = _robust_json_load(m.get("outcomes"))
+    if isinstance(prices, list) and isinstance(outcomes, list):
+        for i, p_str in enumerate(prices):
+            try:
+                if float(p_str) > 0.99 and i < len(outcomes):
+                    return _normalize_outcome(outcomes[i])
+            except Exception:
+                pass
+
+    # 2. winnerOutcome 필드 확인
+    winner_outcome = m.get("winnerOutcome") or m.get("winner_outcome")
+    if winner_outcome:
+        return _normalize_outcome(winner_outcome)
+
+    # 3. tokens 배열 분석
+    tokens = _robust_json_load(m.get("tokens", []))
+    if isinstance(tokens, list):
+        for t in tokens:
+            if t.get("winner") is True:
+                return _normalize_outcome(t.get("outcome"))
+            try:
+                p = t.get("price") or t.get("outcomePrice")
+                if p and float(p) > 0.99:
+                    return _normalize_outcome(t.get("outcome"))
+            except Exception:
+                pass
+
+    return "WAITING"
+
+
+def _is_final(prices, uma_status):
+    if str(uma_status or "").lower() == "resolved":
+        return True
+    try:
+        values = [float(p) for p in prices or []]
+    except (TypeError, ValueError):
+        return False
+    return bool(values) and all(v in (0.0, 1.0) for v in values) and values.count(1.0) == 1
+
+
+def market_is_final(m):
+    """결과가 확정된 마켓인지: closed + (가격이 정확히 0/1 또는 UMA 정산 완료)
+
+    closed만으로는 부족하다 (UMA 이의 제기 / 정산 대기 중에도 closed=True이고 가격이 계속 바뀔 수 있음).
+    """
+    return bool(m.get("closed")) and _is_final(parse_outcome_prices(m), m.get("umaResolutionStatus"))
+
+
+class ResolutionStore:
+    """결과가 확정된 마켓의 최종 가격/승자 영구 저장소 (market_is_final 참고)
+
+    append-only JSONL (1줄 = 마켓 1개)이라 기록 비용이 작고, 재시작 시 전체를 다시 읽어 복구한다.
+    확정 전 (closed만 된) 마켓은 기록하지 않는다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._by_condition = {}  # conditionId -> record
+        self._by_market_id = {}  # Gamma market id -> conditionId
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._index(json.loads(line))
+                    except Exception:
+                        continue
+        except Exception as e:
+            print(f"[WARN] resolution store 복구 실패: {e}")
+
+    def _index(self, record):
+        cid = record.get("conditionId")
+        if not cid or not record.get("winner"):
+            return
+        if not _is_final(record.get("outcomePrices"), record.get("umaResolutionStatus")):
+            return  # 이전 버전이 closed만 보고 남긴 미확정 기록
+        self._by_condition[cid] = record
+        if record.get("id"):
+            self._by_market_id[str(record["id"])] = cid
+
+    def __len__(self):
+        return len(self._by_condition)
+
+    def clear(self):
+        """메모리 인덱스 비우기 (파일은 유지)"""
+        with self._lock:
+            self._by_condition.clear()
+            self._by_market_id.clear()
+
+    def get(self, condition_id=None, market_id=None):
+        if condition_id is None and market_id is not None:
+            condition_id = self._by_market_id.get(str(market_id))
+        return self._by_condition.get(condition_id) if condition_id else None
+
+    def get_price(self, condition_id, outcome_index):
+        record = self.get(condition_id)
+        if record is None:
+            return None
+        prices = record.get("outcomePrices") or []
+        return float(prices[outcome_index]) if len(prices) > outcome_index else None
+
+    def record(self, market, winner=None):
+        """결과가 확정된 마켓 기록. 기록했으면 True
+
+        미확정 마켓 (market_is_final이 아님), 승자 판정 불가 마켓, 이미 기록된 마켓은 무시한다.
+        """
+        cid = market.get("conditionId")
+        if not cid or cid in self._by_condition or not market_is_final(market):
+            return False
+        if winner is None:
+            winner = market_winner_from_payload(market)
+        if winner == "WAITING":
+            return False
+
+        record = {
+            "conditionId": cid,
+            "id": market.get("id"),
+            "winner": winner,
+            "outcomes": _robust_json_load(market.get("outcomes")),
+            "outcomePrices": [float(p) for p in parse_outcome_prices(market) or []],
+            "umaResolutionStatus": market.get("umaResolutionStatus"),
+            "resolved_at": int(clock.time()),
+        }
+        with self._lock:
+            if cid in self._by_condition:
+                return False  # 다른 스레드가 먼저 기록 (위 검사는 락 밖이라 중복 가능)
+            self._index(record)
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                except Exception as e:
+                    print(f"[WARN] resolution store 기록 실패: {e}")
+        return True
+
+
+class MarketDataCache:
+    def __init__(self, max_entries=2000, cache_path=None, resolutions=None):
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self.resolutions = resolutions
+        self._entries = OrderedDict()  # slug -> {'event': dict | None, 'fetched_at': float, 'resolved': bool}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_persist = 0.0
+        self.hits = 0
+        self.misses = 0
+        if cache_path:
+            self._load()
+
+    def clear(self):
+        """메모리 캐시 비우기 (디스크 warm start 파일은 유지)"""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = False
+
+    # --- 조회 ---
+    @staticmethod
+    def _is_resolved(event):
+        """모든 마켓의 결과가 확정된 이벤트 (TTL 없이 유지). closed만 된 이벤트는 TTL대로 만료"""
+        if event is None:
+            return False
+        markets = event.get("markets") or []
+        return bool(markets) and all(market_is_final(m) for m in markets)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @staticmethod
+    def _max_age(fields):
+        return min(FIELD_TTLS.get(f, DEFAULT_TTL) for f in fields) if fields else DEFAULT_TTL
+
+    def _lookup(self, slug, max_age):
+        """유효한 캐시 엔트리 반환 (없거나 만료 시 None)"""
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                return None
+            event = entry["event"]
+            age = clock.time() - entry["fetched_at"]
+            if event is None:
+                valid = age < min(max_age, EMPTY_TTL) if max_age else False
+            else:
+                valid = entry.get("resolved") or age < max_age
+            if not valid:
+                return None
+            self._entries.move_to_end(slug)
+            return entry
+
+    def _store(self, slug, event):
+        resolved = self._is_resolved(event)  # 저장 시 1회만 판정 (조회 hot path에서 마켓 payload 재파싱 없음)
+        with self._lock:
+            self._entries[slug] = {"event": event, "fetched_at": clock.time(), "resolved": resolved}
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def age_entries(self, seconds):
+        """모든 엔트리의 조회 시각을 seconds만큼 과거로 이동 (벤치마크: 루프 사이에 그만큼 시간이 흐른 상태 재현)"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["fetched_at"] -= seconds
+
+    def is_fresh(self, slug, fields=None, max_age=None):
+        """네트워크 조회 없이 캐시로 응답 가능한지 여부"""
+        return self._lookup(slug, self._max_age(fields) if max_age is None else max_age) is not None
+
+    def get_event(self, slug, http, fields=None, max_age=None, timeout=None):
+        """slug에 해당하는 Gamma 이벤트(첫 번째) 반환. 이벤트가 없으면 None
+
+        Args:
+            http: http_client.HttpClient
+            fields: 호출부가 필요로 하는 필드. 필드별 부분 갱신은 없고, 요청 필드 TTL 중 최솟값을
+                    엔트리 나이에 적용해 만료 시 이벤트 전체를 다시 조회한다
+                    (예: ("tags",)만 요청하면 6시간, ("tags", "outcomePrices")면 5초)
+            max_age: TTL 직접 지정 (fields보다 우선)
+            timeout: 지정하지 않으면 "event" 엔드포인트 기본값
+        Raises:
+            네트워크 에러 / HTTP 에러는 호출부로 전파 (캐시에 저장하지 않음)
+        """
+        if max_age is None:
+            max_age = self._max_age(fields)
+        entry = self._lookup(slug, max_age)
+        if entry is not None:
+            self._count(True)
+            return entry["event"]
+
+        self._count(False)
+        with profiler.stage("http.events"):
+            url = f"{GAMMA_API_BASE}/events?slug={slug}"
+            events = http.get_json(url, "event", timeout=timeout) if timeout else http.get_json(url, "event")
+        event = _slim_event(events[0]) if events else None
+        self._store(slug, event)
+        if event is not None and self.resolutions is not None:
+            for m in event.get("markets", []):
+                self.resolutions.record(m)
+        return event
+
+    def get_outcome_price(self, slug, conditionId, outcomeIndex, http, max_age=None, timeout=None):
+        """conditionId 마켓의 outcomeIndex 현재가(0~1). 마켓/가격이 없으면 None
+
+        종료된 마켓은 resolution store에서 바로 응답 (HTTP 없음)
+        """
+        if self.resolutions is not None:
+            price = self.resolutions.get_price(conditionId, outcomeIndex)
+            if price is not None:
+                self._count(True)
+                return price
+        prices = self.get_outcome_prices(slug, conditionId, http, max_age=max_age, timeout=timeout)
+        if prices is not None and len(prices) > outcomeIndex:
+            return prices[outcomeIndex]
+        return None
+
+    def get_outcome_prices(self, slug, conditionId, http, max_age=None, timeout=None):
+        """conditionId 마켓의 전체 outcome 가격 리스트 [float]. 마켓/가격이 없으면 None
+
+        같은 마켓의 여러 outcome을 한 번에 평가할 때 사용 (정산된 마켓은 resolution store에서 바로 응답)
+        """
+        if self.resolutions is not None:
+            record = self.resolutions.get(conditionId)
+            if record is not None and record.get("outcomePrices"):
+                self._count(True)
+                return [float(p) for p in record["outcomePrices"]]
+        event = self.get_event(slug, http, fields=("outcomePrices",), max_age=max_age, timeout=timeout)
+        if not event:
+            return None
+        for m in event.get("markets", []):
+            if m.get("conditionId") == conditionId:
+                prices = parse_outcome_prices(m)
+                return [float(p) for p in prices] if prices is not None else None
+        return None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "resolved_markets": len(self.resolutions) if self.resolutions is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    # --- 디스크 warm start ---
+    def _load(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for slug, entry in data.items():
+                entry["resolved"] = self._is_resolved(entry.get("event"))  # 판정 기준이 바뀌었을 수 있으므로 다시 계산
+                self._entries[slug] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        except Exception as e:
+            print(f"[WARN] market cache 복구 실패 (빈 캐시로 시작): {e}")
+
+    def persist(self, min_interval=300, force=False):
+        """변경분이 있으면 디스크에 저장 (min_interval 초 이내 재저장 생략)"""
+        if not self.cache_path or not self._dirty:
+            return
+        if not force and time.time() - self._last_persist < min_interval:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+            self._dirty = False
+        try:
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+            self._last_persist = time.time()
+        except Exception as e:
+            print(f"[WARN] market cache 저장 실패: {e}")
+
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+resolution_store = ResolutionStore(os.path.join(_BASE_DIR, "resolved_markets.jsonl"))
+market_cache = MarketDataCache(cache_path=os.path.join(_BASE_DIR, "market_cache.json"), resolutions=resolution_store)
@@ -0,0 +1,349 @@
+"""
+로컬 Polymarket 대역 서버 (부하 테스트용 합성 데이터)
+
+봇 / 매니저 / 스코어러 / 백테스터가 호출하는 엔드포인트를 실제와 같은 응답 형태로 흉내낸다.
+    data-api  GET /activity?user=&limit=&start=     고래 거래 (transactionHash, timestamp, asset, outcomeIndex ...)
+              GET /v1/leaderboard?limit=&offset=     리더보드 (proxyWallet, userName, pnl)
+    gamma     GET /events?slug=                      이벤트 (endDate, tags, markets[].outcomePrices는 JSON 문자열)
+              GET /markets/{id}                      마켓 (closed, outcomes, outcomePrices)
+    clob      GET /book?token_id= / POST /books      호가창 (asks / bids, 가격 / 수량은 문자열)
+
+합성 데이터:
+- 고래 거래: 전체 초당 trades_per_sec건 (포아송 도착), 고래마다 활동량 가중치가 다름 (일부 고래에 거래 집중)
+- 마켓 가격: 요청 시점까지 랜덤 워크, 호가창은 현재가 주변 depth 단계로 매번 다시 생성
+- 마켓 정산: market_lifetime 초 후 현재가 확률로 승자 결정 → outcomePrices ["1","0"] / closed, 새 마켓으로 보충
+- 시간은 요청이 들어올 때 clock() 기준으로 진행 (백그라운드 스레드 없음), seed 고정 시 같은 시퀀스
+
+사용:
+    python mock_polymarket.py serve 8901 100 5 mock_whales.db
+    WHALE_DB_PATH=mock_whales.db API_BASE_URL=http://127.0.0.1:8901 python whale_copy_bot.py
+    (합성 고래 주소는 봇의 고래 DB에 있어야 조회되므로, 시드한 DB를 WHALE_DB_PATH로 같이 넘긴다.
+     기본 whales.db에 시드하면 실전 고래 명단에 합성 고래가 섞임)
+프로세스 내 사용 (네트워크 없음):
+    mock = MockPolymarket(whales=2000, trades_per_sec=200)
+    mock.seed_whale_db(WhaleDB(path, legacy_json=None))
+    http_client.use_replay(mock.respond, speed=0)
+"""
+
+import bisect
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+DATA_API_HOST = "data-api.polymarket.com"
+GAMMA_API_HOST = "gamma-api.polymarket.com"
+CLOB_HOST = "clob.polymarket.com"
+
+TAG_POOL = ("Politics", "Sports", "Crypto", "Economics", "Tech", "Culture", "Weather", "Elections")
+PRICE_TICK = 0.01
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticMarket:
+    def __init__(self, index, rng, now, lifetime):
+        self.id = str(500000 + index)
+        self.condition_id = "0x" + f"{rng.getrandbits(256):064x}"
+        self.slug = f"mock-market-{index}"
+        self.title = f"Mock market #{index}?"
+        self.token_ids = [str(rng.getrandbits(76)), str(rng.getrandbits(76))]
+        self.tags = rng.sample(TAG_POOL, 2)
+        self.price = rng.uniform(0.1, 0.9)  # outcome 0 (Yes) 가격
+        self.created = now
+        self.end_ts = now + lifetime * rng.uniform(0.5, 1.5)
+        self.closed = False
+        self.winner = None
+
+    def outcome_price(self, outcome_index):
+        return self.price if outcome_index == 0 else 1.0 - self.price
+
+    def outcome_prices(self):
+        if self.closed:
+            return ["1", "0"] if self.winner == 0 else ["0", "1"]
+        return [f"{self.price:.3f}", f"{1.0 - self.price:.3f}"]
+
+    def market_payload(self):
+        return {
+            "id": self.id,
+            "conditionId": self.condition_id,
+            "question": self.title,
+            "slug": self.slug,
+            "outcomes": json.dumps(["Yes", "No"]),
+            "outcomePrices": json.dumps(self.outcome_prices()),
+            "clobTokenIds": json.dumps(self.token_ids),
+            "closed": self.closed,
+            "endDate": _iso(self.end_ts),
+        }
+
+    def event_payload(self):
+        return {
+            "id": self.id,
+            "slug": self.slug,
+            "title": self.title,
+            "endDate": _iso(self.end_ts),
+            "closed": self.closed,
+            "tags": [{"id": str(i), "label": label} for i, label in enumerate(self.tags)],
+            "markets": [self.market_payload()],
+        }
+
+
+class MockPolymarket:
+    def __init__(self, whales=100, markets=50, trades_per_sec=5.0, market_lifetime=3600,
+                 book_depth=10, sell_ratio=0.2, latency=0.0, seed=0, clock=time.time):
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.trades_per_sec = trades_per_sec
+        self.market_lifetime = market_lifetime
+        self.book_depth = book_depth
+        self.sell_ratio = sell_ratio
+        self.latency = latency  # 응답 지연 (ReplayAdapter / ReplayServer의 speed로 배속)
+        self._lock = threading.Lock()
+
+        now = self.clock()
+        self.whales = []
+        for i in range(whales):
+            addr = "0x" + f"{self.rng.getrandbits(160):040x}"
+            self.whales.append({"address": addr, "name": f"MockWhale{i}",
+                                "pnl": round(self.rng.lognormvariate(10, 1.2), 2)})
+        # 고래별 활동량 가중치 (파레토 → 소수 고래에 거래 집중)
+        weights = [self.rng.paretovariate(1.5) for _ in self.whales]
+        total = sum(weights) or 1.0
+        self._whale_cum = []
+        acc = 0.0
+        for w in weights:
+            acc += w / total
+            self._whale_cum.append(acc)
+        self.activity = {w["address"]: deque(maxlen=500) for w in self.whales}
+
+        self.markets = []
+        self.by_slug = {}
+        self.by_id = {}
+        self.by_token = {}
+        self._next_market = 0
+        for _ in range(markets):
+            self._add_market(now)
+
+        self.last_tick = now
+        self._next_trade_at = now + self._interarrival()
+        self.generated = 0
+        self.resolved = 0
+        self.requests = 0
+
+    # --- 합성 데이터 생성 ---
+    def _add_market(self, now):
+        market = SyntheticMarket(self._next_market, self.rng, now, self.market_lifetime)
+        self._next_market += 1
+        self.markets.append(market)
+        self.by_slug[market.slug] = market
+        self.by_id[market.id] = market
+        for outcome_index, token_id in enumerate(market.token_ids):
+            self.by_token[token_id] = (market, outcome_index)
+        return market
+
+    def _interarrival(self):
+        return self.rng.expovariate(self.trades_per_sec) if self.trades_per_sec > 0 else math.inf
+
+    def _pick_whale(self):
+        i = bisect.bisect_left(self._whale_cum, self.rng.random())
+        return self.whales[min(i, len(self.whales) - 1)]
+
+    def _open_markets(self):
+        return [m for m in self.markets if not m.closed]
+
+    def _advance(self, now):
+        """now까지 가격 이동 / 정산 / 고래 거래 생성"""
+        dt = now - self.last_tick
+        if dt <= 0:
+            return
+        sigma = 0.01 * math.sqrt(dt)
+        closed_now = 0
+        for market in self.markets:
+            if market.closed:
+                continue
+            if now >= market.end_ts:
+                market.closed = True
+                market.winner = 0 if self.rng.random() < market.price else 1
+                closed_now += 1
+                continue
+            market.price = min(0.97, max(0.03, market.price + self.rng.gauss(0, sigma)))
+        self.resolved += closed_now
+        for _ in range(closed_now):
+            self._add_market(now)
+        # 정산된 마켓은 일정 시간 후 목록에서 제거 (slug / id 조회는 유지)
+        self.markets = [m for m in self.markets if not m.closed or now - m.end_ts < self.market_lifetime]
+
+        open_markets = self._open_markets()
+        while self._next_trade_at <= now and open_markets:
+            self._generate_trade(self._next_trade_at, open_markets)
+            self._next_trade_at += self._interarrival()
+        if not open_markets:
+            self._next_trade_at = now + self._interarrival()
+        self.last_tick = now
+
+    def _generate_trade(self, ts, open_markets):
+        whale = self._pick_whale()
+        market = self.rng.choice(open_markets)
+        outcome_index = self.rng.randrange(2)
+        side = "SELL" if self.rng.random() < self.sell_ratio else "BUY"
+        price = market.outcome_price(outcome_index)
+        size = round(self.rng.lognormvariate(5, 1.3), 2)
+        self.activity[whale["address"]].append({
+            "proxyWallet": whale["address"],
+            "name": whale["name"],
+            "timestamp": int(ts),
+            "conditionId": market.condition_id,
+            "type": "TRADE",
+            "side": side,
+            "size": size,
+            "usdcSize": round(size * price, 2),
+            "price": round(price, 3),
+            "asset": market.token_ids[outcome_index],
+            "outcomeIndex": outcome_index,
+            "outcome": "Yes" if outcome_index == 0 else "No",
+            "title": market.title,
+            "slug": market.slug,
+            "transactionHash": "0x" + f"{self.rng.getrandbits(256):064x}",
+        })
+        self.generated += 1
+
+    def book(self, token_id):
+        found = self.by_token.get(token_id)
+        if found is None:
+            return None
+        market, outcome_index = found
+        mid = market.outcome_price(outcome_index)
+        asks, bids = [], []
+        for k in range(1, self.book_depth + 1):
+            ask = mid + k * PRICE_TICK
+            bid = mid - k * PRICE_TICK
+            if ask < 1.0:
+                asks.append({"price": f"{ask:.2f}", "size": f"{self.rng.uniform(50, 2000):.2f}"})
+            if bid > 0.0:
+                bids.append({"price": f"{bid:.2f}", "size": f"{self.rng.uniform(50, 2000):.2f}"})
+        # 실제 CLOB처럼 asks는 비싼 가격부터, bids는 싼 가격부터 정렬되어 옴
+        asks.reverse()
+        bids.reverse()
+        return {"market": market.condition_id, "asset_id": token_id, "timestamp": str(int(self.clock() * 1000)),
+                "asks": asks, "bids": bids}
+
+    # --- 엔드포인트 ---
+    def _activity(self, query):
+        trades = self.activity.get(query.get("user", ""))
+        if trades is None:
+            return []
+        limit = int(query.get("limit", 100))
+        start = int(query.get("start", 0) or 0)
+        result = []
+        for tx in reversed(trades):  # 최신순
+            if tx["timestamp"] < start or len(result) >= limit:
+                break
+            result.append(tx)
+        return result
+
+    def _leaderboard(self, query):
+        limit = int(query.get("limit", 50))
+        offset = int(query.get("offset", 0))
+        ranked = sorted(self.whales, key=lambda w: -w["pnl"])[offset:offset + limit]
+        return [{"rank": offset + i + 1, "proxyWallet": w["address"], "userName": w["name"], "pnl": w["pnl"]}
+                for i, w in enumerate(ranked)]
+
+    def _route(self, method, host, path, query, body):
+        if host == DATA_API_HOST:
+            if path == "/activity":
+                return 200, self._activity(query)
+            if path == "/v1/leaderboard":
+                return 200, self._leaderboard(query)
+        elif host == GAMMA_API_HOST:
+            if path == "/events":
+                market = self.by_slug.get(query.get("slug"))
+                return 200, [market.event_payload()] if market else []
+            if path.startswith("/markets/"):
+                market = self.by_id.get(path.rsplit("/", 1)[-1])
+                return (200, market.market_payload()) if market else (404, {"error": "market not found"})
+        elif host == CLOB_HOST:
+            if path == "/book" and method == "GET":
+                book = self.book(query.get("token_id"))
+                return (200, book) if book else (404, {"error": "No orderbook exists for the requested token id"})
+            if path == "/books" and method == "POST":
+                requested = json.loads(body or "[]")
+                books = [self.book(item.get("token_id")) for item in requested]
+                return 200, [b for b in books if b]
+        return 404, {"error": "not implemented in mock"}
+
+    def respond(self, method, url, body=None):
+        """ReplayAdapter / ReplayServer responder: (status, content_type, body_bytes, elapsed)"""
+        parts = urlsplit(url)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        with self._lock:
+            self.requests += 1
+            self._advance(self.clock())
+            status, payload = self._route(method.upper(), parts.hostname, parts.path, query, body)
+        return status, "application/json", json.dumps(payload).encode("utf-8"), self.latency
+
+    # --- 봇 연동 ---
+    def whale_records(self, score=80.0):
+        """whales.json / WhaleDB 형식의 active 고래 목록 (모든 고래가 봇의 조회 대상이 되도록 score 동일)"""
+        now = int(self.clock())
+        records = {}
+        for w in self.whales:
+            tags = self.rng.sample(TAG_POOL, 3)
+            records[w["address"]] = {
+                "name": w["name"],
+                "status": "active",
+                "score": score,
+                "added_at": now,
+                "last_updated": now,
+                "metrics": {"30d_trades": 300, "win_rate": 75.0, "roi": 10.0,
+                            "top_categories": {tag: 10 for tag in tags}},
+            }
+        return records
+
+    def seed_whale_db(self, db, score=80.0):
+        db.upsert_many(self.whale_records(score))
+        return len(self.whales)
+
+    def stats(self):
+        with self._lock:
+            return {"whales": len(self.whales), "open_markets": len(self._open_markets()),
+                    "generated": self.generated, "resolved": self.resolved, "requests": self.requests}
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    if cmd == "serve":
+        from http_replay import ReplayServer
+
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8901
+        whales = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+        tps = float(sys.argv[4]) if len(sys.argv) > 4 else 5.0
+        mock = MockPolymarket(whales=whales, markets=max(50, whales // 10), trades_per_sec=tps)
+        db_path = None
+        if len(sys.argv) > 5:
+            import os
+            from whale_db import WhaleDB
+            db_path = os.path.abspath(sys.argv[5])
+            print(f"✅ {mock.seed_whale_db(WhaleDB(db_path, legacy_json=None))}명 → {db_path}")
+        server = ReplayServer(mock.respond, port=port, speed=1.0)
+        print(f"▶ mock Polymarket 시작: API_BASE_URL={server.base_url} (고래 {whales}명, 초당 {tps}건)")
+        if db_path:
+            print(f"  봇 실행: WHALE_DB_PATH={db_path} API_BASE_URL={server.base_url} python whale_copy_bot.py")
+        else:
+            print("  ⚠️ 고래 DB 경로를 주지 않아 합성 고래가 어느 DB에도 없음 → 봇은 합성 거래를 조회하지 않음")
+        try:
+            while True:
+                time.sleep(60)
+                print(f"[Mock] {mock.stats()}")
+        except KeyboardInterrupt:
+            server.close()
+    else:
+        print(__doc__)
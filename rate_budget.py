@@ -0,0 +1,253 @@
+"""
+API 호스트별 요청 예산 (token bucket + 우선순위)
+
+봇 메인 루프 / 유지보수 스레드(매니저, 스코어러) / 백테스터가 같은 IP 한도를 나눠 쓰므로
+흩어진 time.sleep 대신 호스트별 token bucket 하나를 공유한다.
+
+우선순위 (숫자가 작을수록 우선):
+    CRITICAL     고래 거래 감지, 호가창 가격 산출, 청산
+    SETTLEMENT   포지션 정산용 이벤트 / 마켓 조회
+    MAINTENANCE  고래 발굴 / 스코어링 / 백테스트
+
+- 낮은 우선순위는 bucket에 예비분(RESERVE 비율)을 남겨둔 상태에서만 토큰을 가져감
+  → 유휴 용량은 자동으로 채우되, 거래 감지가 몰릴 때는 항상 자리가 남아 있음
+- 429 응답 시 해당 호스트의 토큰을 비우고, SETTLEMENT/MAINTENANCE는 지수 백오프 (Retry-After 우선)
+- 예산은 프로세스 단위 (봇 + 유지보수 스레드 공유). 별도 프로세스로 띄운 매니저는 자기 예산을 따로 가짐
+
+사용:
+    session.mount("https://", BudgetAdapter(priority=MAINTENANCE))
+    with request_priority(SETTLEMENT):   # 이 스레드의 요청 우선순위 일시 변경
+        ...
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError
+
+CRITICAL = 0
+SETTLEMENT = 1
+MAINTENANCE = 2
+PRIORITY_NAMES = {CRITICAL: "critical", SETTLEMENT: "settlement", MAINTENANCE: "maintenance"}
+
+# 우선순위별로 bucket에 남겨둬야 하는 토큰 비율 (burst 대비)
+RESERVE = {CRITICAL: 0.0, SETTLEMENT: 0.25, MAINTENANCE: 0.5}
+
+# 호스트별 (초당 요청 수, burst). 목록에 없는 호스트는 제한 없음
+DEFAULT_LIMITS = {
+    "data-api.polymarket.com": (10.0, 20),
+    "gamma-api.polymarket.com": (10.0, 20),
+    "clob.polymarket.com": (20.0, 40),
+}
+
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+def parse_limits(spec):
+    """'host=rate:burst,host=rate' 형식 → {host: (rate, burst)}"""
+    limits = {}
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        host, value = item.split("=", 1)
+        rate, _, burst = value.partition(":")
+        rate = float(rate)
+        limits[host.strip()] = (rate, int(burst) if burst else max(1, int(rate * 2)))
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0  # 429 백오프 종료 시각 (SETTLEMENT/MAINTENANCE에만 적용)
+        self.retry_after_until = 0.0  # 서버가 Retry-After로 지정한 시각 (모든 우선순위에 적용)
+        self.consecutive_429 = 0
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateBudget:
+    def __init__(self, limits=None):
+        self._lock = threading.Lock()
+        self._buckets = {host: TokenBucket(rate, burst) for host, (rate, burst) in (limits or {}).items()}
+        self.waited = {p: 0.0 for p in PRIORITY_NAMES}  # 우선순위별 누적 대기 시간 (초)
+        self.granted = {p: 0 for p in PRIORITY_NAMES}
+        self.throttled = 0  # 429 응답 수
+
+    def set_limit(self, host, rate, burst):
+        with self._lock:
+            self._buckets[host] = TokenBucket(rate, burst)
+
+    def _wait_time(self, bucket, priority, now):
+        """지금 토큰을 가져갈 수 있으면 0, 아니면 대기해야 할 초"""
+        blocked_until = bucket.retry_after_until
+        if priority > CRITICAL:
+            blocked_until = max(blocked_until, bucket.cooldown_until)
+        if now < blocked_until:
+            return blocked_until - now
+        bucket.refill(now)
+        needed = 1.0 + RESERVE[priority] * bucket.burst
+        if bucket.tokens >= needed:
+            return 0.0
+        return (needed - bucket.tokens) / bucket.rate
+
+    def acquire(self, host, priority=CRITICAL, timeout=None):
+        """host 요청 1건 허가. 대기한 시간(초) 반환 (timeout 초과 시 허가 없이 반환)"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return 0.0
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._wait_time(bucket, priority, now)
+                if wait <= 0:
+                    bucket.tokens -= 1.0
+                    waited = now - start
+                    self.waited[priority] += waited
+                    self.granted[priority] += 1
+                    return waited
+            if timeout is not None and time.monotonic() - start + wait > timeout:
+                return time.monotonic() - start
+            # 다른 스레드가 먼저 가져갈 수 있으므로 짧게 나눠 재확인
+            time.sleep(min(wait, 0.25))
+
+    def on_response(self, host, status_code, retry_after=None):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            return
+        with self._lock:
+            if status_code == 429:
+                self.throttled += 1
+                bucket.consecutive_429 += 1
+                bucket.tokens = 0.0
+                backoff = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (bucket.consecutive_429 - 1)))
+                now = time.monotonic()
+                if retry_after:
+                    bucket.retry_after_until = max(bucket.retry_after_until, now + retry_after)
+                    backoff = max(backoff, retry_after)
+                bucket.cooldown_until = max(bucket.cooldown_until, now + backoff)
+            elif status_code < 500:
+                bucket.consecutive_429 = 0
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            hosts = {}
+            for host, bucket in self._buckets.items():
+                bucket.refill(now)
+                hosts[host] = {
+                    "rate": bucket.rate,
+                    "burst": bucket.burst,
+                    "tokens": round(bucket.tokens, 2),
+                    "cooldown_s": round(max(0.0, bucket.cooldown_until - now), 2),
+                }
+            return {
+                "hosts": hosts,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                "waited_s": {PRIORITY_NAMES[p]: round(s, 3) for p, s in self.waited.items()},
+                "throttled": self.throttled,
+            }
+
+
+_local = threading.local()
+
+
+def current_priority(default=CRITICAL):
+    priority = getattr(_local, "priority", None)
+    return default if priority is None else priority
+
+
+@contextmanager
+def request_priority(priority):
+    """이 스레드에서 보내는 요청의 우선순위를 일시적으로 지정 (세션 기본값보다 우선)"""
+    previous = getattr(_local, "priority", None)
+    _local.priority = priority
+    try:
+        yield
+    finally:
+        _local.priority = previous
+
+
+def call_with_priority(priority, fn, *args, **kwargs):
+    """워커 풀에 제출할 때 우선순위를 함께 넘기는 용도"""
+    with request_priority(priority):
+        return fn(*args, **kwargs)
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _without_429(retry):
+    """urllib3 Retry에서 429 처리를 제거 (status_forcelist의 429 + Retry-After 헤더 자동 재시도)
+
+    urllib3는 Retry-After가 붙은 429를 status_forcelist와 무관하게 어댑터 안에서 sleep 후 재시도하므로,
+    그대로 두면 예산이 429를 보지 못하고 다른 스레드는 같은 호스트로 계속 요청한다.
+    """
+    forcelist = frozenset(s for s in (retry.status_forcelist or ()) if s != 429)
+    return retry.new(status_forcelist=forcelist, respect_retry_after_header=False)
+
+
+class BudgetAdapter(HTTPAdapter):
+    """요청 전 호스트 예산에서 토큰을 받고, 429 응답을 예산에 반영하는 HTTPAdapter
+
+    - max_retries에 무엇을 넘기든 429는 재시도하지 않고 그대로 반환 → 예산이 호스트 단위로 백오프
+      (429 / Retry-After 처리는 여기 한 곳에서만 함. HttpClient의 Retry는 따로 끄지 않음)
+    - 상태 코드 재시도 (5xx 등)는 urllib3 대신 send에서 직접 수행 → 재시도 1회마다 토큰 1개
+      연결 / 읽기 에러 재시도는 urllib3 안에서 일어나 첫 시도의 토큰을 같이 씀
+    """
+
+    def __init__(self, priority=CRITICAL, budget=None, **kwargs):
+        self.priority = priority
+        self.budget = budget
+        super().__init__(**kwargs)
+        self.retry = _without_429(self.max_retries)
+        self.max_retries = self.retry.new(status_forcelist=frozenset())
+
+    def send(self, request, **kwargs):
+        budget = self.budget or rate_budget
+        host = urlsplit(request.url).hostname
+        retry = self.retry
+        while True:
+            budget.acquire(host, current_priority(self.priority))
+            response = super().send(request, **kwargs)
+            budget.on_response(host, response.status_code, _retry_after_seconds(response))
+            if not retry.is_retry(request.method, response.status_code):
+                return response
+            try:
+                retry = retry.increment(request.method, request.url, response=response.raw)
+            except MaxRetryError:
+                return response
+            response.close()
+            retry.sleep()
+
+
+def _configured_limits():
+    try:
+        from config import config
+        spec = getattr(config, "RATE_LIMITS", "")
+    except Exception:
+        spec = ""
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(parse_limits(spec))
+    return limits
+
+
+rate_budget = RateBudget(_configured_limits())
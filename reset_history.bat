@@ -6,8 +6,10 @@ echo ============================================
 echo.
 echo 다음 파일들이 삭제됩니다:
 echo   - status_WhaleCopy.json  (잔고 / 포지션 상태)
+echo   - state_WhaleCopy.json + state_WhaleCopy.journal.jsonl (봇 상태 스냅샷 + 변경분 저널)
 echo   - trade_history.jsonl    (거래 이력)
 echo   - bot_live.log           (로그)
+echo   - whales.db (+ -wal/-shm) (고래 DB, 아래에서 따로 선택)
 echo.
 set /p CONFIRM="정말 삭제하겠습니까? (y/N): "
 if /i not "%CONFIRM%"=="y" (
@@ -15,6 +17,7 @@ if /i not "%CONFIRM%"=="y" (
     pause
     exit /b
 )
+set /p RESET_WHALES="고래 DB(whales.db)도 초기화하겠습니까? 고래 평가 데이터가 사라집니다 (y/N): "
 
 echo.
 if exist "status_WhaleCopy.json" (
@@ -24,6 +27,16 @@ if exist "status_WhaleCopy.json" (
     echo [--] status_WhaleCopy.json 없음 (스킵)
 )
 
+rem 저널만 남으면 다음 시작 시 _load_state가 변경분을 다시 재생해 초기화가 일부 되돌려짐 → 스냅샷과 함께 삭제
+for %%F in ("state_WhaleCopy.json" "state_WhaleCopy.journal.jsonl") do (
+    if exist %%F (
+        del %%F
+        echo [OK] %%~F 삭제 완료
+    ) else (
+        echo [--] %%~F 없음 ^(스킵^)
+    )
+)
+
 if exist "trade_history.jsonl" (
     del "trade_history.jsonl"
     echo [OK] trade_history.jsonl 삭제 완료
@@ -38,8 +51,20 @@ if exist "bot_live.log" (
     echo [--] bot_live.log 없음 (스킵)
 )
 
+if /i "%RESET_WHALES%"=="y" (
+    for %%F in ("whales.db" "whales.db-wal" "whales.db-shm") do (
+        if exist %%F (
+            del %%F
+            echo [OK] %%~F 삭제 완료
+        )
+    )
+    echo [!!] whales.json 이 있으면 다음 실행 시 빈 DB로 다시 import 됨 ^(예전 데이터일 수 있음^)
+) else (
+    echo [--] whales.db 보존 - 고래 평가 데이터
+)
+
 echo.
 echo 이력 초기화 완료. 봇을 새로 시작하면 됩니다.
-echo (whales.json 은 보존됨 - 고래 평가 데이터)
+echo (고래 데이터는 whales.db 에 저장됨. whales.json 은 DB가 비어 있을 때 최초 1회 import용)
 echo.
 pause
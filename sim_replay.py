@@ -0,0 +1,191 @@
+"""
+가상 시각 재생 시뮬레이터 (기록된 API 응답으로 실제 봇 로직을 빠르게 재생)
+
+HTTP_RECORD로 기록한 아카이브(http_replay)를 clock.SimulatedClock 위에서 재생한다.
+- 봇 코드는 그대로 실행 (WhaleCopyBot.run_iteration)
+- 현재 시각 = 가상 시각: 30분 신선도 필터, 대기 주문 60초 만료, 72시간 타임아웃 청산, 30일 만기 필터,
+  startup_time, 마켓 / 호가창 캐시 TTL이 전부 기록 당시 시각 기준으로 판단됨
+- 루프 대기 / 기록된 응답 지연은 가상 시각만 전진 → 일주일치 기록을 수 분 만에 재생
+- 각 요청에는 그 가상 시각에 기록돼 있던 응답을 돌려줌 (고래 Activity / 가격 / 정산 결과가 시간 순서대로 드러남)
+
+사용:
+    HTTP_RECORD=week.jsonl.gz python whale_copy_bot.py          # 1) 실전 실행 중 기록
+    python sim_replay.py week.jsonl.gz                          # 2) 가상 시각 재생
+    python sim_replay.py week.jsonl.gz --db whales.db --hours 24 --out sim_out
+
+고래 명단: --db 지정 시 해당 고래 DB 복사본, 없으면 아카이브의 /activity 요청 주소 (score 80)
+결과: <out>/trade_history.jsonl (timestamp = 가상 시각) + 종료 시 성과 요약
+재현성: 조회 워커 풀 대신 메인 스레드에서 순서대로 조회 + 요청 순서대로 카피 판단 (ordered_polls)
+        → 같은 아카이브면 같은 결과 (응답 지연은 병렬로 겹치지 않고 순차 합산됨)
+"""
+
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import Executor, Future
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import clock
+from clock import SimulatedClock
+
+
+def archive_whales(path):
+    """기록 아카이브의 /activity 요청에서 고래 주소 추출"""
+    whales = set()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            url = rec.get("url", "")
+            if "/activity" in url:
+                user = parse_qs(urlsplit(url).query).get("user")
+                if user:
+                    whales.add(user[0])
+    return sorted(whales)
+
+
+class _InlineExecutor(Executor):
+    """submit 즉시 호출 스레드에서 실행하는 executor (가상 시각이 한 스레드에서만 흐르도록)"""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _prepare_whale_db(work_dir, archive_path, source_db, start):
+    from whale_db import WhaleDB
+
+    db = WhaleDB(os.path.join(work_dir, "whales.db"), legacy_json=None)
+    if source_db:
+        # 실전 DB는 건드리지 않고 JSON export → import로 복사
+        snapshot = os.path.join(work_dir, "whales_source.json")
+        WhaleDB(source_db, legacy_json=None).export_json(snapshot)
+        db.import_json(snapshot)
+    else:
+        db.upsert_many({addr: {"name": f"Recorded{i}", "status": "active", "score": 80.0,
+                               "added_at": int(start), "last_updated": int(start)}
+                        for i, addr in enumerate(archive_whales(archive_path))})
+    return db
+
+
+def _progress(bot, sim_clock, started_wall):
+    stats = bot.stats
+    print(f"[SIM] {sim_clock.now().strftime('%Y-%m-%d %H:%M')} | 진입 {stats['total_bets']}건 | "
+          f"승 {stats['wins']} / 패 {stats['losses']} | PnL ${stats['total_pnl']:.2f} | "
+          f"보유 {len(bot.positions)} | 대기 {len(bot.pending_orders)} | 실제 {time.time() - started_wall:.0f}s")
+
+
+def run_simulation(archive_path, work_dir=None, source_db=None, hours=None, speed=1.0, top_n=None,
+                   report_every=3600):
+    """아카이브 구간을 가상 시각으로 재생하고 성과 요약 반환
+
+    Args:
+        speed: 기록된 응답 지연 재현 배율 (1.0 = 그대로 가상 시각에 반영, 0 = 지연 없음)
+        hours: 재생 구간 (기본: 아카이브 전체)
+        report_every: 진행 상황 출력 간격 (가상 초)
+    """
+    import http_client
+    from http_replay import ReplayArchive
+    from market_cache import market_cache, resolution_store
+
+    started_wall = time.time()
+    archive = ReplayArchive(archive_path)
+    if not archive.started_at:
+        raise ValueError(f"아카이브 헤더에 started_at 없음: {archive_path}")
+    # 모든 요청이 메인 스레드에서 순차 실행 → sleep하는 스레드가 하나뿐이라 동시 출발 대기(settle) 불필요
+    sim_clock = SimulatedClock(archive.started_at, settle=0.0)
+    archive.clock = sim_clock  # 요청 순서 대신 가상 시각 기준으로 응답 선택
+    end = archive.started_at + archive.duration
+    if hours:
+        end = min(end, archive.started_at + hours * 3600)
+
+    # 봇 코드가 읽는 현재 시각 / 대기를 가상 시계로 교체 (봇 생성 전: startup_time = 기록 시작 시각)
+    previous_clock = clock.install(sim_clock)
+    # 실전 캐시 파일과 분리 + 실제 시각 기준으로 채워진 캐시 / 이미 알고 있는 정산 결과 제거 (미래 정보 유입 방지)
+    market_cache.cache_path = None
+    resolution_store.path = None
+    market_cache.clear()
+    resolution_store.clear()
+    http_client.use_replay(archive.respond, speed)
+
+    from whale_copy_bot import WhaleCopyBot
+
+    if work_dir and os.path.isdir(work_dir) and os.listdir(work_dir):
+        # 봇이 이전 실행의 상태 저널 / 거래 로그를 이어받으면 재생 결과가 섞임
+        raise ValueError(f"결과 디렉터리가 비어 있지 않음: {work_dir}")
+    work_dir = work_dir or tempfile.mkdtemp(prefix="whalesim-")
+    os.makedirs(work_dir, exist_ok=True)
+    db = _prepare_whale_db(work_dir, archive_path, source_db, archive.started_at)
+    if top_n is None:
+        top_n = 30 if source_db else max(1, db.count(status="active"))
+
+    try:
+        bot = WhaleCopyBot(base_dir=work_dir, db=db, top_n=top_n, maintenance=False)
+        bot.poll_executor.shutdown(wait=False)
+        bot.poll_executor = _InlineExecutor()
+        bot.ordered_polls = True  # 이미 끝난 future들의 as_completed 순서는 실행마다 다름
+        iterations = 0
+        next_report = sim_clock.time() + report_every
+        while sim_clock.time() < end:
+            sim_clock.sleep(bot.run_iteration())
+            iterations += 1
+            if sim_clock.time() >= next_report:
+                _progress(bot, sim_clock, started_wall)
+                next_report += report_every
+        bot.run_iteration(force_housekeeping=True)  # 마지막 정산 / 상태 저장
+        bot.trade_log.flush()
+        bot.journal.close()
+    finally:
+        clock.install(previous_clock)
+
+    wall = time.time() - started_wall
+    simulated = end - archive.started_at
+    settled = bot.stats["wins"] + bot.stats["losses"]
+    return {
+        "archive": archive_path,
+        "from": datetime.fromtimestamp(archive.started_at).isoformat()[:19],
+        "to": datetime.fromtimestamp(end).isoformat()[:19],
+        "simulated_hours": round(simulated / 3600, 2),
+        "wall_s": round(wall, 1),
+        "speedup": round(simulated / wall, 1) if wall > 0 else None,
+        "iterations": iterations,
+        "whales": top_n,
+        "bets": bot.stats["total_bets"],
+        "wins": bot.stats["wins"],
+        "losses": bot.stats["losses"],
+        "win_rate": round(bot.stats["wins"] / settled * 100, 1) if settled else 0.0,
+        "pnl": round(bot.stats["total_pnl"], 2),
+        "open_positions": len(bot.positions),
+        "bankroll": round(bot.bankroll, 2),
+        "replay": archive.stats(),
+        "trade_log": bot.trade_log_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="기록된 API 응답을 가상 시각으로 재생해 봇 전략 검증")
+    parser.add_argument("archive", help="HTTP_RECORD 아카이브 (.jsonl.gz)")
+    parser.add_argument("--db", help="고래 DB (기본: 아카이브의 고래 주소, score 80)")
+    parser.add_argument("--hours", type=float, help="재생 구간 (기본: 아카이브 전체)")
+    parser.add_argument("--speed", type=float, default=1.0, help="기록된 응답 지연 반영 배율 (0 = 지연 없음)")
+    parser.add_argument("--top-n", type=int, help="조회 대상 상위 고래 수")
+    parser.add_argument("--out", help="결과 디렉터리 (기본: 임시 디렉터리)")
+    args = parser.parse_args()
+
+    summary = run_simulation(os.path.abspath(args.archive), work_dir=args.out, source_db=args.db,
+                             hours=args.hours, speed=args.speed, top_n=args.top_n)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
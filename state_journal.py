@@ -0,0 +1,160 @@
+"""
+상태 저널 (write-ahead journal + 주기적 스냅샷)
+
+매 루프마다 state 파일 전체를 다시 쓰는 대신, 바뀐 부분만 한 줄짜리 op로 저널 파일에 append 한다.
+- op 종류: pos_open / pos_update / pos_close / account / tx_seen / cursor
+- 모든 op는 "절대값 설정" 형태라 같은 op를 여러 번 재생해도 결과가 같음 (idempotent)
+- write는 매 commit마다, fsync는 fsync_interval 초마다 묶어서 수행
+  (프로세스가 죽어도 OS 버퍼의 내용은 남고, 전원 장애 시에도 최대 fsync_interval 초만 유실)
+- 저널 크기(compact_bytes) 또는 경과 시간(compact_interval) 초과 시 스냅샷(state 파일)으로 압축 후 저널 비움
+- 시작 시 스냅샷 로드 → 스냅샷 이후 seq의 op만 순서대로 재생
+
+스냅샷 형식은 기존 state_WhaleCopy.json과 동일 (+ journal_seq) → 구버전 state 파일 그대로 읽힘
+"""
+
+import json
+import os
+import threading
+import time
+
+
+def apply_op(state, op):
+    """op 1개를 state dict에 반영"""
+    kind = op.get("op")
+    if kind == "pos_open":
+        state.setdefault("positions", {})[op["tid"]] = dict(op["pos"])
+    elif kind == "pos_update":
+        pos = state.setdefault("positions", {}).get(op["tid"])
+        if pos is not None:
+            pos.update(op["fields"])
+    elif kind == "pos_close":
+        state.setdefault("positions", {}).pop(op["tid"], None)
+    elif kind == "account":
+        state["bankroll"] = op["bankroll"]
+        state["peak_bankroll"] = op["peak_bankroll"]
+        state["stats"] = dict(op["stats"])
+    elif kind == "tx_seen":
+        seen = state.get("seen_txs")
+        if not isinstance(seen, dict):
+            # 구버전 state (transactionHash 리스트) → 현재 형식으로 변환
+            seen = {"recent": [[tx_id, 0] for tx_id in seen or []], "bloom": None, "bloom_max_ts": 0}
+            state["seen_txs"] = seen
+        seen.setdefault("recent", []).append([op["tx"], op.get("ts")])
+    elif kind == "cursor":
+        state.setdefault("activity_cursors", {})[op["addr"]] = op["cursor"]
+
+
+class StateJournal:
+    def __init__(self, snapshot_path, journal_path=None, fsync_interval=1.0,
+                 compact_bytes=1_000_000, compact_interval=3600):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        self.seq = 0
+        self._buffer = []
+        self._file = None
+        self._lock = threading.Lock()
+        self._last_fsync = 0.0
+        self._last_compact = time.time()
+        self.ops_written = 0
+        self.compactions = 0
+        self.replayed = 0
+
+    # --- 복구 ---
+    def load(self):
+        """스냅샷 + 저널 재생 결과 state dict 반환 (둘 다 없으면 None)"""
+        state = None
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        snapshot_seq = (state or {}).get("journal_seq", 0)
+        self.seq = snapshot_seq
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        continue  # 기록 도중 종료된 마지막 줄
+                    if op.get("seq", 0) <= snapshot_seq:
+                        continue  # 압축 직후 저널을 비우기 전에 종료된 경우 (이미 스냅샷에 반영됨)
+                    if state is None:
+                        state = {}
+                    apply_op(state, op)
+                    self.seq = max(self.seq, op["seq"])
+                    replayed += 1
+        self.replayed = replayed
+        return state
+
+    # --- 기록 ---
+    def record(self, kind, **fields):
+        """op 1개를 버퍼에 추가 (디스크 기록은 commit 시)"""
+        with self._lock:
+            self.seq += 1
+            op = {"seq": self.seq, "op": kind}
+            op.update(fields)
+            self._buffer.append(json.dumps(op, ensure_ascii=False))
+
+    def commit(self, force_fsync=False):
+        """버퍼의 op를 저널에 append. fsync는 fsync_interval 초마다 (또는 force_fsync)"""
+        with self._lock:
+            if self._buffer:
+                if self._file is None:
+                    self._file = open(self.journal_path, "a", encoding="utf-8")
+                self._file.write("\n".join(self._buffer) + "\n")
+                self._file.flush()
+                self.ops_written += len(self._buffer)
+                self._buffer = []
+                if force_fsync or time.time() - self._last_fsync >= self.fsync_interval:
+                    os.fsync(self._file.fileno())
+                    self._last_fsync = time.time()
+            elif force_fsync and self._file is not None:
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.time()
+
+    def journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except OSError:
+            return 0
+
+    def needs_compaction(self):
+        size = self.journal_size()
+        if size >= self.compact_bytes:
+            return True
+        return size > 0 and time.time() - self._last_compact >= self.compact_interval
+
+    def compact(self, state):
+        """현재 전체 state를 스냅샷으로 저장하고 저널 비움"""
+        with self._lock:
+            if self._buffer:
+                raise RuntimeError("commit되지 않은 op가 남아 있음")
+            snapshot = dict(state)
+            snapshot["journal_seq"] = self.seq
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # 스냅샷이 기록된 뒤에 저널 비움 (그 사이 종료돼도 seq 비교로 중복 재생 없음)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.journal_path, "w", encoding="utf-8"):
+                pass
+            self._last_compact = time.time()
+            self._last_fsync = time.time()
+            self.compactions += 1
+
+    def close(self):
+        self.commit(force_fsync=True)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
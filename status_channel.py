@@ -0,0 +1,138 @@
+"""
+봇 ↔ 대시보드 공유 메모리 상태 채널
+
+봇 인스턴스마다 고정 크기 mmap 세그먼트(status_<봇이름>.shm) 하나를 쓴다.
+
+레이아웃 (little endian, 64 byte 헤더 + JSON payload):
+    0   magic        4s   b"WSTS"
+    4   layout       H    레이아웃 버전
+    6   flags        H    bit0 = 정상 종료됨
+    8   seq          Q    seqlock 카운터 (홀수 = 기록 중)
+    16  heartbeat    d    마지막 생존 신호 (epoch 초)
+    24  updated_at   d    마지막 payload 기록 시각
+    32  pid          I
+    36  payload_len  I
+    64~ payload      JSON (utf-8)
+
+seqlock: 기록 측은 seq를 홀수로 올린 뒤 기록하고 다시 짝수로 올린다.
+읽는 측은 seq(짝수) → 세그먼트 복사 → seq 재확인, 두 값이 같으면 일관된 스냅샷.
+(기록은 수 μs라 충돌 시에도 즉시 다시 복사하면 되고 sleep이 필요 없음)
+봇 생존 여부는 파일 mtime 대신 heartbeat 필드로 판단한다.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from collections import namedtuple
+
+MAGIC = b"WSTS"
+LAYOUT_VERSION = 1
+SEGMENT_SIZE = 4096
+HEADER = struct.Struct("<4sHHQddII")
+HEADER_SIZE = 64
+MAX_PAYLOAD = SEGMENT_SIZE - HEADER_SIZE
+
+SEQ_OFFSET = 8
+FLAGS_OFFSET = 6
+FLAG_STOPPED = 0x1
+
+_SEQ = struct.Struct("<Q")
+_FLAGS = struct.Struct("<H")
+_DOUBLE = struct.Struct("<d")
+_PAYLOAD_LEN = struct.Struct("<I")
+
+StatusSnapshot = namedtuple("StatusSnapshot", ["seq", "heartbeat", "updated_at", "pid", "stopped", "data"])
+
+
+class StatusWriter:
+    """봇 측: 상태 payload 기록 + heartbeat"""
+
+    def __init__(self, path, size=SEGMENT_SIZE):
+        self.path = path
+        self.size = size
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self._file = open(path, mode)
+        if os.path.getsize(path) != size:
+            self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        seq = 0
+        if self._mm[:4] == MAGIC:
+            seq = _SEQ.unpack_from(self._mm, SEQ_OFFSET)[0]
+        self._seq = seq + (seq & 1)  # 이전 세션이 기록 도중 종료됐으면 짝수로 맞춤
+        now = time.time()
+        HEADER.pack_into(self._mm, 0, MAGIC, LAYOUT_VERSION, 0, self._seq, now, 0.0, os.getpid(), 0)
+
+    def _begin(self):
+        self._seq += 1
+        _SEQ.pack_into(self._mm, SEQ_OFFSET, self._seq)
+
+    def _end(self):
+        self._seq += 1
+        _SEQ.pack_into(self._mm, SEQ_OFFSET, self._seq)
+
+    def publish(self, data, now=None):
+        """상태 dict 기록 (heartbeat도 함께 갱신)"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(payload) > MAX_PAYLOAD:
+            raise ValueError(f"status payload 초과 ({len(payload)} > {MAX_PAYLOAD} bytes)")
+        now = time.time() if now is None else now
+        self._begin()
+        self._mm[HEADER_SIZE:HEADER_SIZE + len(payload)] = payload
+        _PAYLOAD_LEN.pack_into(self._mm, 36, len(payload))
+        _DOUBLE.pack_into(self._mm, 16, now)
+        _DOUBLE.pack_into(self._mm, 24, now)
+        self._end()
+
+    def beat(self, now=None):
+        """생존 신호만 갱신"""
+        self._begin()
+        _DOUBLE.pack_into(self._mm, 16, time.time() if now is None else now)
+        self._end()
+
+    def close(self):
+        """정상 종료 표시 후 매핑 해제 (대시보드는 heartbeat 타임아웃을 기다리지 않고 바로 OFF 표시)"""
+        if self._mm.closed:
+            return
+        self._begin()
+        _FLAGS.pack_into(self._mm, FLAGS_OFFSET, FLAG_STOPPED)
+        self._end()
+        self._mm.flush()
+        self._mm.close()
+        self._file.close()
+
+
+class StatusReader:
+    """대시보드 측: 일관된 스냅샷 읽기 (읽기 전용 매핑)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._last = None
+
+    def read(self, max_spins=1000):
+        """최신 스냅샷. 아직 기록 전이거나 형식이 다르면 None
+
+        기록과 겹친 경우 다시 복사한다 (max_spins회 실패 시 직전 스냅샷 반환).
+        """
+        mm = self._mm
+        for _ in range(max_spins):
+            seq1 = _SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if seq1 & 1:
+                continue
+            buf = mm[:]
+            if _SEQ.unpack_from(mm, SEQ_OFFSET)[0] != seq1:
+                continue
+            magic, layout, flags, seq, heartbeat, updated_at, pid, length = HEADER.unpack_from(buf, 0)
+            if magic != MAGIC or layout != LAYOUT_VERSION or seq != seq1:
+                return None
+            data = json.loads(buf[HEADER_SIZE:HEADER_SIZE + length]) if length else None
+            self._last = StatusSnapshot(seq, heartbeat, updated_at, pid, bool(flags & FLAG_STOPPED), data)
+            return self._last
+        return self._last
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
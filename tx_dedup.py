@@ -0,0 +1,138 @@
+"""
+트랜잭션 중복 방지 캐시
+
+- 최근 tier: OrderedDict (tx_id -> tx 시각), O(1) 삽입/조회, 삽입 순서대로 축출
+  (크기 상한 초과 시 + 봇 housekeeping에서 SEEN_TX_HORIZON보다 오래된 tx)
+- 과거 tier (선택): Bloom Filter, 최근 tier에서 밀려난 tx를 고정 메모리로 기억
+  → 고래 수천 명 추적 시에도 메모리 상한 고정
+"""
+
+import base64
+import hashlib
+import zlib
+from collections import OrderedDict
+
+
+class BloomFilter:
+    """고정 크기 Bloom Filter (double hashing, blake2b 기반)"""
+
+    def __init__(self, num_bits, num_hashes=7, data=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(data) if data is not None else bytearray((num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def to_state(self):
+        return {
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "data": base64.b64encode(zlib.compress(bytes(self.bits))).decode("ascii"),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        data = zlib.decompress(base64.b64decode(state["data"]))
+        return cls(state["bits"], state["hashes"], data)
+
+
+class SeenTxCache:
+    """이미 처리한 transactionHash 집합 (메모리 상한 고정)
+
+    Args:
+        max_recent: 최근 tier 최대 건수. 초과 시 가장 먼저 들어온 tx부터 축출
+        bloom_bits: 과거 tier Bloom Filter 크기 (bit). 0이면 과거 tier 비활성화
+    """
+
+    def __init__(self, max_recent=10000, bloom_bits=0, bloom_hashes=7):
+        self.max_recent = max_recent
+        self._recent = OrderedDict()
+        self._bloom = BloomFilter(bloom_bits, bloom_hashes) if bloom_bits else None
+        # Bloom에 들어간 tx 중 가장 최근 tx 시각.
+        # 이보다 새로운 tx는 Bloom을 보지 않음 → 오탐(false positive)으로 신규 거래를 놓치는 일 방지
+        self._bloom_max_ts = 0
+
+    def __len__(self):
+        return len(self._recent)
+
+    def __contains__(self, tx_id):
+        return self.contains(tx_id)
+
+    def contains(self, tx_id, tx_time=None):
+        if tx_id in self._recent:
+            return True
+        if self._bloom is None:
+            return False
+        if tx_time is not None and tx_time > self._bloom_max_ts:
+            return False
+        return tx_id in self._bloom
+
+    def add(self, tx_id, tx_time=None):
+        if tx_id in self._recent:
+            return
+        self._recent[tx_id] = tx_time or 0
+        while len(self._recent) > self.max_recent:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        tx_id, tx_time = self._recent.popitem(last=False)
+        if self._bloom is not None:
+            self._bloom.add(tx_id)
+            # 시각을 모르는 tx가 Bloom에 들어가면 시각 기반 우회를 쓸 수 없음
+            self._bloom_max_ts = max(self._bloom_max_ts, tx_time or float("inf"))
+
+    def evict_before(self, cutoff_ts):
+        """tx 시각이 cutoff_ts 이전인 항목을 앞(오래된 쪽)에서부터 축출
+
+        삽입 순서 기준으로 앞에서부터 보다가 cutoff 이후(또는 시각 미상) tx를 만나면 멈춤 → 호출 비용은 축출 건수에 비례
+        """
+        evicted = 0
+        while self._recent:
+            tx_time = next(iter(self._recent.values()))
+            if not tx_time or tx_time >= cutoff_ts:
+                break
+            self._evict_oldest()
+            evicted += 1
+        return evicted
+
+    def to_state(self, limit=None):
+        """state 파일 저장용 직렬화 (최근 tier는 최신 limit건만, [tx_id, tx 시각] 쌍)"""
+        items = list(self._recent.items())
+        if limit is not None:
+            items = items[-limit:]
+        return {
+            "recent": [[tx_id, tx_time] for tx_id, tx_time in items],
+            "bloom": self._bloom.to_state() if self._bloom is not None else None,
+            "bloom_max_ts": None if self._bloom_max_ts == float("inf") else self._bloom_max_ts,
+        }
+
+    @classmethod
+    def from_state(cls, state, max_recent=10000, bloom_bits=0):
+        """to_state() 결과 또는 구버전 state의 transactionHash 리스트에서 복구"""
+        cache = cls(max_recent=max_recent, bloom_bits=bloom_bits)
+        if not state:
+            return cache
+        if isinstance(state, list):
+            for tx_id in state:
+                cache.add(tx_id)
+            return cache
+
+        bloom_state = state.get("bloom")
+        if bloom_state and bloom_bits:
+            cache._bloom = BloomFilter.from_state(bloom_state)
+            bloom_max_ts = state.get("bloom_max_ts", 0)
+            cache._bloom_max_ts = float("inf") if bloom_max_ts is None else bloom_max_ts
+        for tx_id, tx_time in state.get("recent", []):
+            cache.add(tx_id, tx_time)
+        return cache
@@ -1,31 +1,18 @@
-import requests
-import json
-import time
+from market_cache import market_cache
+from rate_budget import MAINTENANCE
+from http_client import get_client
+
+http = get_client(MAINTENANCE)  # 요청 간격은 공용 예산이 조절
 
 def fetch_market_current_value(slug, conditionId, outcomeIndex):
     """
     Gamma API에서 slug를 통해 마켓을 찾고, 해당 outcome의 현재 가치(0~1)를 반환.
-    정산(Resolved)된 경우 승리했으면 1.0, 패배했으면 0.0이 됨.
+    정산(Resolved)된 경우 승리했으면 1.0, 패배했으면 0.0이 됨. (공용 캐시 사용)
     """
-    url = f"https://gamma-api.polymarket.com/events?slug={slug}"
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            events = r.json()
-            if not events: return None
-            
-            for m in events[0].get('markets', []):
-                if m.get('conditionId') == conditionId:
-                    prices = m.get('outcomePrices', [])
-                    if isinstance(prices, str):
-                        try: prices = json.loads(prices)
-                        except: pass
-                        
-                    if isinstance(prices, list) and len(prices) > outcomeIndex:
-                        return float(prices[outcomeIndex])
+        return market_cache.get_outcome_price(slug, conditionId, outcomeIndex, http, timeout=10)
     except:
-        pass
-    return None
+        return None
 
 def calculate_slippage_pnl(transactions, slippage_pct=0.05):
     """
@@ -62,7 +49,6 @@ def calculate_slippage_pnl(transactions, slippage_pct=0.05):
         
         # 2. 형제 가치 조회
         current_price = fetch_market_current_value(slug, cond_id, outcome_idx)
-        time.sleep(0.5) # API 밴 방지
         
         if current_price is None:
             # Cannot find market, skip
@@ -104,18 +90,14 @@ def calculate_slippage_pnl(transactions, slippage_pct=0.05):
     print(f"Win/Loss/Open             : {wins} W / {losses} L / {open_pos} O")
     win_rate = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0
     print(f"Win Rate (Closed Only)    : {win_rate:.1f}%")
+    market_cache.persist(force=True)
 
 def fetch_whale_trades(address, limit=50):
-    headers = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
     url = f"https://data-api.polymarket.com/activity?user={address}&limit={limit}"
     
     try:
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code == 200:
-            activities = r.json()
-            trades = [a for a in activities if a.get('type') == 'TRADE']
-            return trades
-        return []
+        activities = http.get_json(url, "history")
+        return [a for a in activities if a.get('type') == 'TRADE']
     except Exception as e:
         print(f"Request failed: {e}")
         return []
@@ -1,25 +1,131 @@
-import sys
-
 import time
 import json
 import os
+import heapq
+import math
 import requests
 import threading
-from datetime import datetime, timedelta, timezone
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+import clock
 from config import config
 from client_wrapper import PolymarketClient
 from whale_manager import run_manager
 from whale_scorer import WhaleScorer
+from tx_dedup import SeenTxCache
+from state_journal import StateJournal
+from log_writer import JsonlLogWriter
+from status_channel import StatusWriter
+from bot_metrics import LatencyTracker, MetricsServer, escape_label, profiler, render_prometheus, request_metrics
+from market_cache import market_cache, parse_outcome_prices
+from whale_registry import WhaleRegistry
+from whale_db import get_whale_db
+from rate_budget import CRITICAL, SETTLEMENT, call_with_priority, rate_budget
+from http_client import get_client
+
+class WhalePollScheduler:
+    """고래별 적응형 폴링 스케줄러 (deadline heap)
+
+    고래마다 score / 30일 거래 빈도 / 마지막 신규 tx 시각으로 조회 주기를 산출하고,
+    마감 시각(deadline)이 지난 고래만 힙에서 꺼내 조회한다.
+    전체 요청량(Σ 1/주기)이 초당 예산을 넘으면 모든 주기를 같은 비율로 늘려 예산을 지킨다.
+    """
+    BASE_INTERVAL = 5.0    # 기준 주기 (score 50, 하루 10회 거래 고래)
+    MIN_INTERVAL = 2.0
+    MAX_INTERVAL = 120.0
+
+    def __init__(self, budget_per_sec):
+        self.budget_per_sec = budget_per_sec
+        self.whales = {}
+        self.deadlines = {}     # addr -> 다음 조회 시각 (힙의 유효 엔트리 판별용)
+        self.last_tx_time = {}  # addr -> 마지막으로 감지한 신규 tx 시각
+        self.heap = []          # (deadline, addr), 무효 엔트리는 pop 시 버림 (lazy deletion)
+        self.scale = 1.0
+
+    def sync(self, whales, now):
+        """활성 고래 목록 반영: 신규 고래는 즉시 조회, 빠진 고래는 스케줄에서 제거"""
+        self.whales = whales
+        for addr in list(self.deadlines):
+            if addr not in whales:
+                del self.deadlines[addr]
+        for addr in whales:
+            if addr not in self.deadlines:
+                self._push(addr, now)
+        demand = sum(1.0 / self._raw_interval(addr, now) for addr in whales)
+        self.scale = max(1.0, demand / self.budget_per_sec) if self.budget_per_sec > 0 else 1.0
+
+    def _raw_interval(self, addr, now):
+        info = self.whales.get(addr, {})
+        score = max(0.0, min(float(info.get('score', 50) or 0), 100.0))
+        trades_per_day = (info.get('metrics') or {}).get('30d_trades', 0) / 30.0
+
+        # 하루 10회 거래 기준 1.0, 거래가 잦을수록 짧게 / 드물수록 길게
+        freq_factor = min(max(math.sqrt(10.0 / max(trades_per_day, 0.1)), 0.5), 6.0)
+        # score 100 → 0.5배, 50 → 1.0배, 0 → 1.5배
+        score_factor = 1.5 - score / 100.0
+
+        recency_factor = 1.0
+        last_tx = self.last_tx_time.get(addr)
+        if last_tx is not None:
+            age = now - last_tx
+            if age < 600:
+                recency_factor = 0.4   # 10분 내 활동: 연속 매매 가능성 높음
+            elif age < 3600:
+                recency_factor = 0.7
+
+        interval = self.BASE_INTERVAL * freq_factor * score_factor * recency_factor
+        return min(max(interval, self.MIN_INTERVAL), self.MAX_INTERVAL)
+
+    def interval_for(self, addr, now):
+        return self._raw_interval(addr, now) * self.scale
+
+    def _push(self, addr, deadline):
+        self.deadlines[addr] = deadline
+        heapq.heappush(self.heap, (deadline, addr))
+
+    def pop_due(self, now):
+        """마감 시각이 지난 고래 주소 목록 반환"""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, addr = heapq.heappop(self.heap)
+            if self.deadlines.get(addr) != deadline:
+                continue
+            del self.deadlines[addr]
+            due.append(addr)
+        return due
+
+    def reschedule(self, addr, now, last_tx_time=None):
+        """조회 완료 후 다음 마감 시각 등록"""
+        if addr not in self.whales:
+            return
+        if last_tx_time is not None and last_tx_time > self.last_tx_time.get(addr, 0):
+            self.last_tx_time[addr] = last_tx_time
+        self._push(addr, now + self.interval_for(addr, now))
+
+    def next_deadline(self):
+        while self.heap and self.deadlines.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
 
 class WhaleCopyBot:
-    def __init__(self):
-        self.db_file = "whales.json"
+    def __init__(self, base_dir=None, db=None, top_n=30, maintenance=True):
+        """
+        Args:
+            base_dir: 상태 / 로그 / status 파일 디렉터리 (기본: 스크립트 위치)
+            db: 고래 DB (기본: whales.db 싱글톤)
+            top_n: 조회 대상 상위 고래 수
+            maintenance: 백그라운드 고래 갱신 / 스코어링 스레드 실행 여부 (벤치마크에서는 끔)
+        """
+        self.registry = WhaleRegistry(db or get_whale_db(), top_n=top_n)  # DB 변경 시에만 재로드
         
         # 상태 기록 (이전에 본 트랜잭션 아이디를 저장해 중복 매매 방지)
-        self.seen_txs = set()
+        self.seen_txs = SeenTxCache(config.SEEN_TX_MAX, config.SEEN_TX_BLOOM_BITS)
+        self.activity_cursors = {}  # 고래별 high-water mark {addr: {'ts': 마지막 tx 시각, 'tx': transactionHash}}
         self.positions = {}
         self.pending_orders = [] # 지정가 대기 큐
-        self.startup_time = int(time.time())  # 봇 시작 시각 (백로그 필터용)
+        self.startup_time = int(clock.time())  # 봇 시작 시각 (백로그 필터용)
         self.MAX_POSITIONS = config.MAX_POSITIONS  # .env에서 설정
         
         # 페이퍼 트레이딩 공통 자산
@@ -38,23 +144,84 @@ class WhaleCopyBot:
         self.slippage_pct = 0.03
         
         # 파일 경로
-        self.trade_log_path = os.path.join(os.path.dirname(__file__), "trade_history.jsonl")
-        self.status_file_path = os.path.join(os.path.dirname(__file__), "status_WhaleCopy.json")
-        self.state_file_path = os.path.join(os.path.dirname(__file__), "state_WhaleCopy.json")
+        base_dir = base_dir or os.path.dirname(__file__)
+        self.trade_log_path = os.path.join(base_dir, "trade_history.jsonl")
+        self.status_file_path = os.path.join(base_dir, "status_WhaleCopy.json")
+        self.status_shm_path = os.path.join(base_dir, "status_WhaleCopy.shm")
+        self.profile_path = os.path.join(base_dir, "profile_WhaleCopy.json")
+        self.state_file_path = os.path.join(base_dir, "state_WhaleCopy.json")
+        self.settle_debug_path = os.path.join(base_dir, "settle_debug.jsonl")
+
+        # 로그는 백그라운드 스레드에서 일괄 기록 (거래 스레드는 큐에 넣기만 함)
+        # trade_history.jsonl은 대시보드/성과 분석이 전체를 읽으므로 로테이션하지 않음
+        self.trade_log = JsonlLogWriter(self.trade_log_path, flush_interval=config.LOG_FLUSH_INTERVAL)
+        self.settle_debug_log = JsonlLogWriter(
+            self.settle_debug_path,
+            flush_interval=config.LOG_FLUSH_INTERVAL,
+            rotate_bytes=config.SETTLE_DEBUG_ROTATE_BYTES,
+        )
+        self._settle_debug_last = {}  # tid -> 마지막으로 기록한 마켓 필드 (변경 시에만 기록)
+
+        # 상태 저널 (state_WhaleCopy.json 스냅샷 + 변경분 append 저널)
+        self.journal = StateJournal(
+            self.state_file_path,
+            fsync_interval=config.STATE_FSYNC_INTERVAL,
+            compact_bytes=config.STATE_COMPACT_BYTES,
+            compact_interval=config.STATE_COMPACT_INTERVAL,
+        )
+        self._committed_positions = {}  # 마지막으로 저널에 기록한 포지션 {tid: dict}
+        self._committed_account = None
+        self._committed_cursors = {}
 
         # 이전 세션 상태 복구
         self._load_state()
+        atexit.register(self._close_state)
 
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": "Mozilla/5.0"})
+        # 공용 전송 계층 (호스트별 커넥션 풀, 요청 예산은 유지보수 스레드와 공유하되 감지 요청이 항상 우선)
+        # HTTP 요청 지표 (엔드포인트별 건수 / 지연)는 http_client가 세션 생성 시 자동 수집
+        self.http = get_client(CRITICAL)
         self.client = PolymarketClient()
 
+        # 고래 Activity 병렬 조회용 워커 풀 (HTTP 조회만 담당, 카피 판단은 메인 스레드에서 순차 처리)
+        self.poll_executor = ThreadPoolExecutor(max_workers=config.POLL_WORKERS, thread_name_prefix="whale-poll")
+        self.polls_pending = 0  # 워커 풀에 제출됐지만 아직 끝나지 않은 조회 수 (대기 + 실행 중)
+        self._polls_lock = threading.Lock()
+        self.poll_scheduler = WhalePollScheduler(config.POLL_BUDGET_PER_SEC)
+        self.ordered_polls = False  # True: 도착 순서 대신 요청 순서대로 카피 판단 (시뮬레이션 재현성용)
+        self.last_sweep_seconds = 0.0
+        self.last_housekeeping = 0.0
+        self.last_loop_seconds = 0.0
+        self.loop_iterations = 0
+        self.last_status = {}  # 마지막 대시보드 스냅샷 (메트릭 엔드포인트용)
+        self.copy_latency = LatencyTracker(window=200)  # 고래별 감지→체결 구간 지연 분위수
+        self.last_profile_report = time.time()
+
         # 자동 유지보수 설정 (Background Scheduler)
-        self.maintenance_thread = threading.Thread(target=self._maintenance_loop, daemon=True)
-        self.maintenance_thread.start()
+        self.maintenance_thread = None
+        if maintenance:
+            self.maintenance_thread = threading.Thread(target=self._maintenance_loop, daemon=True)
+            self.maintenance_thread.start()
+
+        # 대시보드 상태 채널 (공유 메모리 + heartbeat). 실패 시 status JSON 파일만 사용
+        self.status_channel = None
+        self.last_status_json = 0.0
+        try:
+            self.status_channel = StatusWriter(self.status_shm_path)
+            atexit.register(self.status_channel.close)
+        except Exception as e:
+            print(f"[WARN] 상태 채널(.shm) 생성 실패 (status JSON만 사용): {e}")
 
         # 봇 시작 시 status 파일 초기화 (이전 세션 PnL 잔상 제거)
-        self._update_dashboard()
+        self._update_dashboard(force_json=True)
+
+        # localhost 메트릭 / 상태 엔드포인트 (선택)
+        self.metrics_server = None
+        if config.METRICS_PORT:
+            try:
+                self.metrics_server = MetricsServer(self.metrics_status, self.metrics_text, config.METRICS_PORT)
+                print(f"[METRICS] http://127.0.0.1:{self.metrics_server.port}/metrics , /status")
+            except Exception as e:
+                print(f"[WARN] 메트릭 서버 시작 실패 (포트 {config.METRICS_PORT}): {e}")
 
         print("=== 🐋 WHALE COPY BOT (PAPER MODE) ===")
         print(f"  초기 자본금: ${self.bankroll:.2f}")
@@ -62,53 +229,178 @@ class WhaleCopyBot:
         print("=====================================\n")
 
     def load_whales(self):
-        """Active 고래 명단 로드 (score 순 상위 50개 제한)"""
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, "r", encoding="utf-8") as f:
-                    db = json.load(f)
-                actives = {k: v for k, v in db.items() if v.get('status') == 'active'}
-                sorted_whales = sorted(actives.items(), key=lambda x: x[1].get('score', 0), reverse=True)
-                return dict(sorted_whales[:30])
-            except Exception as e:
-                print(f"[WARN] whales.json 파싱 실패: {e}")
-                return {}
-        return {}
+        """Active 고래 명단 (score 순 상위 30명, 읽기 전용 매핑). 고래 DB가 바뀐 경우에만 재로드"""
+        return self.registry.snapshot().top
 
     def run_loop(self):
-        """메인 모니터링 루프"""
+        """메인 모니터링 루프 (시뮬레이션 시계에서는 대기 = 가상 시각 전진)"""
         while True:
-            try:
-                # 1. 고래 목록 갱신 (1분마다)
-                active_whales = self.load_whales()
-                if not active_whales:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] ⚠️ Active 상태인 고래가 없습니다. whales.json을 확인하세요.")
-                    time.sleep(30)
-                    continue
+            clock.sleep(self.run_iteration())
 
-                # 2. 각 고래의 최신 Activity 조회
-                for whale_addr, info in active_whales.items():
-                    score = info.get('score', 50) # 기본 50점으로 간주
-                    self._check_whale_activity(whale_addr, info['name'], score, info)
+    def run_iteration(self, poll_all=False, force_housekeeping=False):
+        """루프 1회 (고래 조회 → 대기열 / 정산 / 대시보드). 다음 반복까지 대기할 초 반환
 
+        poll_all: 조회 주기와 무관하게 모든 고래 조회 (벤치마크용)
+        force_housekeeping: 5초 간격과 무관하게 대기열 / 정산 / 대시보드 수행 (벤치마크용)
+        """
+        loop_start = time.time()
+        if self.status_channel is not None:
+            self.status_channel.beat()
+        try:
+            # 1. 고래 목록 갱신 (1분마다)
+            active_whales = self.load_whales()
+            if not active_whales:
+                print(f"[{clock.now().strftime('%H:%M:%S')}] ⚠️ Active 상태인 고래가 없습니다. 고래 DB(whales.db)를 확인하세요.")
+                return 30
+
+            # 2. 조회 주기가 도래한 고래만 Activity 병렬 조회
+            self.poll_scheduler.sync(active_whales, clock.time())
+            due_addrs = self.poll_scheduler.pop_due(clock.time())
+            if poll_all:
+                due_addrs = list(active_whales)
+            if due_addrs:
+                sweep_start = time.time()
+                with profiler.stage("poll"):
+                    results = self._poll_whales({addr: active_whales[addr] for addr in due_addrs})
+                self.last_sweep_seconds = time.time() - sweep_start
+                now = clock.time()
+                for addr in due_addrs:
+                    self.poll_scheduler.reschedule(addr, now, results.get(addr))
+                if config.DEBUG_MODE:
+                    print(f"[SWEEP] 고래 {len(due_addrs)}/{len(active_whales)}명 조회 완료 ({self.last_sweep_seconds:.2f}s, 주기 배율 x{self.poll_scheduler.scale:.2f})")
+
+            # 대기열 / 정산 / 대시보드는 고래 조회 주기와 무관하게 5초 간격 유지
+            if force_housekeeping or clock.time() - self.last_housekeeping >= 5:
                 # 스마트 진입(대기열) 처리
-                self._process_pending_orders()
+                with profiler.stage("pending"):
+                    self._process_pending_orders()
 
                 # 3. 진행 중인 포지션 정산
-                self._settle_positions()
+                with profiler.stage("settle"):
+                    self._settle_positions()
+
+                # 신선도 필터(30분)를 지난 tx는 다시 카피될 일이 없으므로 시각 기준으로도 축출 (크기 상한과 별개)
+                if config.SEEN_TX_HORIZON:
+                    self.seen_txs.evict_before(clock.time() - max(config.SEEN_TX_HORIZON, 1800))
 
                 # 4. 대시보드 스냅샷 업데이트
-                self._update_dashboard()
+                with profiler.stage("dashboard"):
+                    self._update_dashboard()
+                self.last_housekeeping = clock.time()
 
-            except Exception as e:
-                print(f"❌ 루프 에러: {e}")
-                time.sleep(5)
-                
-            # 폴링 간격 (5초: 초당 API 1회 수준이므로 충분히 안전함)
-            time.sleep(5)
+        except Exception as e:
+            print(f"❌ 루프 에러: {e}")
+            return 5
+
+        self.last_loop_seconds = time.time() - loop_start
+        self.loop_iterations += 1
+        profiler.observe("loop", self.last_loop_seconds)
+        self._report_profile()
+
+        # 다음 고래 마감 시각까지 대기 (최소 0.2초, 최대 5초)
+        next_deadline = self.poll_scheduler.next_deadline()
+        wait = 5.0 if next_deadline is None else next_deadline - clock.time()
+        return min(max(wait, 0.2), 5.0)
+
+    def _report_profile(self):
+        """단계별 소요 시간 요약을 주기적으로 출력 + profile_WhaleCopy.json 저장"""
+        interval = config.PROFILE_REPORT_INTERVAL
+        if not interval or time.time() - self.last_profile_report < interval:
+            return
+        self.last_profile_report = time.time()
+        print(f"\n[PROFILE] 루프 단계별 소요 시간 (최근 {profiler.window}회 기준)\n{profiler.report()}\n")
+        try:
+            profiler.export(self.profile_path)
+        except Exception as e:
+            print(f"[WARN] 프로파일 저장 실패: {e}")
+
+    def metrics_status(self):
+        """/status 응답: 메모리 상의 카운터만으로 조립 (디스크 읽기 없음, 메트릭 서버 스레드에서 호출)"""
+        return {
+            "strategy": "WhaleCopy",
+            "summary": self.last_status,
+            "positions": len(self.positions),
+            "pending_orders": len(self.pending_orders),
+            "bankroll": round(self.bankroll, 2),
+            "equity": self.last_status.get("equity", round(self.bankroll, 2)),
+            "loop": {
+                "iterations": self.loop_iterations,
+                "last_seconds": round(self.last_loop_seconds, 4),
+                "last_sweep_seconds": round(self.last_sweep_seconds, 4),
+                "poll_interval_scale": round(self.poll_scheduler.scale, 3),
+            },
+            "caches": {
+                "market": market_cache.stats(),
+                "book": dict(self.client.book_stats),
+                "seen_txs": len(self.seen_txs),
+            },
+            "queues": {
+                "poll_executor": self.polls_pending,
+                "trade_log": self.trade_log.qsize(),
+                "settle_debug_log": self.settle_debug_log.qsize(),
+                "log_dropped": self.trade_log.dropped + self.settle_debug_log.dropped,
+            },
+            "requests": {
+                label: {k: ep[k] for k in ("count", "errors", "avg_ms")}
+                for label, ep in request_metrics.snapshot().items()
+            },
+            "copy_latency": self.copy_latency.summary(),
+            "profile": profiler.summary(),
+            "slowest_whales": self.copy_latency.slowest(),
+            "rate_budget": rate_budget.stats(),
+        }
+
+    def metrics_text(self):
+        """/metrics 응답 (Prometheus text format)"""
+        status = self.metrics_status()
+        book = status["caches"]["book"]
+        book_total = book.get("hits", 0) + book.get("misses", 0)
+        gauges = {
+            "positions": status["positions"],
+            "pending_orders": status["pending_orders"],
+            "bankroll_usdc": status["bankroll"],
+            "equity_usdc": status["equity"],
+            "loop_iterations": status["loop"]["iterations"],
+            "loop_seconds": status["loop"]["last_seconds"],
+            "sweep_seconds": status["loop"]["last_sweep_seconds"],
+            "poll_interval_scale": status["loop"]["poll_interval_scale"],
+            "market_cache_hit_rate": status["caches"]["market"]["hit_rate"],
+            "market_cache_entries": status["caches"]["market"]["entries"],
+            "book_cache_hit_rate": round(book.get("hits", 0) / book_total, 4) if book_total else 0.0,
+            "seen_txs": status["caches"]["seen_txs"],
+            "queue_depth": {f'queue="{name}"': depth for name, depth in status["queues"].items() if name != "log_dropped"},
+            "log_dropped": status["queues"]["log_dropped"],
+            "stage_seconds": {
+                f'stage="{escape_label(stage)}",quantile="{q}"': row[key]
+                for stage, row in status["profile"].items() if row.get("n")
+                for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+            },
+            "stage_share": {
+                f'stage="{escape_label(stage)}"': row["share"]
+                for stage, row in status["profile"].items() if row.get("n")
+            },
+            "copy_latency_seconds": {
+                f'whale="{escape_label(whale)}",stage="{stage}",quantile="{q}"': summary[key]
+                for whale, stages in status["copy_latency"].items()
+                for stage, summary in stages.items() if summary.get("n")
+                for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+            },
+            "rate_budget_tokens": {
+                f'host="{escape_label(host)}"': row["tokens"]
+                for host, row in status["rate_budget"]["hosts"].items()
+            },
+            "rate_budget_wait_seconds": {
+                f'priority="{prio}"': waited for prio, waited in status["rate_budget"]["waited_s"].items()
+            },
+            "rate_budget_throttled": status["rate_budget"]["throttled"],
+        }
+        return render_prometheus(gauges, request_metrics.snapshot())
 
     def _maintenance_loop(self):
-        """백그라운드에서 주기적으로 고래 목록 갱신 및 스코어링 수행"""
+        """백그라운드에서 주기적으로 고래 목록 갱신 및 스코어링 수행
+
+        실제 API를 직접 조회하므로 주입된 시계(clock)가 아닌 실제 시각 기준으로 동작 (시뮬레이션에서는 끔)
+        """
         print("[Maintenance] Background maintenance thread started.")
         
         # 주기에 따른 실행 간격 정의
@@ -144,29 +436,127 @@ class WhaleCopyBot:
             # 메인 거래 루프에 영향을 주지 않으려 아주 가끔씩만 체크 (1분 간격)
             time.sleep(60)
 
+    def _submit_poll(self, fn, *args, **kwargs):
+        """워커 풀 제출 + 미완료 조회 수 집계 (메트릭용)"""
+        with self._polls_lock:
+            self.polls_pending += 1
+        future = self.poll_executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._poll_done)
+        return future
+
+    def _poll_done(self, _future):
+        with self._polls_lock:
+            self.polls_pending -= 1
+
+    def _poll_whales(self, active_whales):
+        """고래 Activity를 워커 풀에서 병렬 조회하고, 응답이 도착하는 순서대로 메인 스레드에서 카피 판단
+
+        positions / bankroll / seen_txs 변경은 전부 메인 스레드에서만 일어나므로 별도 락이 필요 없다.
+        Returns: {addr: 새로 본 tx 중 가장 최근 tx 시각 (없으면 None)}
+        """
+        results = {}
+        futures = {
+            self._submit_poll(
+                self._fetch_whale_activity_timed, addr, info.get('name', addr), self.activity_cursors.get(addr)
+            ): addr
+            for addr, info in active_whales.items()
+        }
+        for future in (futures if self.ordered_polls else as_completed(futures)):
+            addr = futures[future]
+            activities, seen_at = future.result()
+            if activities is None:
+                continue
+            info = active_whales[addr]
+            score = info.get('score', 50) # 기본 50점으로 간주
+            results[addr] = self._process_whale_activity(addr, info['name'], score, activities, info, seen_at=seen_at)
+        return results
+
+    def _fetch_whale_activity_timed(self, addr, name, cursor=None):
+        """_fetch_whale_activity + 응답 수신 시각 (카피 지연 추적의 '감지' 시점)"""
+        activities = self._fetch_whale_activity(addr, name, cursor)
+        return activities, clock.time()
+
+    def _fetch_whale_activity(self, addr, name, cursor=None):
+        """특정 고래의 최근 트랜잭션 조회 (워커 스레드에서 실행, 상태 변경 금지)
+
+        cursor가 있으면 start 파라미터로 cursor 시각 이후 활동만 요청한다.
+        (같은 초에 찍힌 tx가 있을 수 있으므로 start는 cursor 시각 포함)
+        """
+        url = f"https://data-api.polymarket.com/activity?user={addr}&limit=10&sortBy=TIMESTAMP&sortDirection=DESC"
+        if cursor:
+            url += f"&start={cursor['ts']}"
+        try:
+            with profiler.stage("http.activity"):
+                return self.http.get_json(url, "activity")
+        except requests.HTTPError:
+            return None
+        except Exception as e:
+            print(f"[WARN] {name} 고래 활동 조회 중 예외 발생: {e}")
+            return None
+
     def _check_whale_activity(self, addr, name, score, info=None):
-        """특정 고래의 최근 트랜잭션 조회 및 카피"""
+        """특정 고래의 최근 트랜잭션 조회 및 카피 (단건 동기 실행)"""
+        activities = self._fetch_whale_activity(addr, name, self.activity_cursors.get(addr))
+        if activities is not None:
+            self._process_whale_activity(addr, name, score, activities, info)
+
+    @staticmethod
+    def _parse_tx_time(timestamp_val):
+        """Activity timestamp(초/밀리초 정수, 숫자 문자열, ISO 문자열) → UTC epoch 초. 실패 시 None"""
+        try:
+            if isinstance(timestamp_val, (int, float)):
+                tx_time = int(timestamp_val)
+                # 밀리초 단위 감지 (1e12 초 = 서기 33658년 → 불가능, 밀리초임)
+                if tx_time > 1_000_000_000_000:
+                    tx_time = tx_time // 1000
+                return tx_time
+            api_time_str = str(timestamp_val).split('.')[0]
+            # 숫자형 문자열인 경우 (e.g. "1740743100")
+            if api_time_str.isdigit():
+                tx_time = int(api_time_str)
+                if tx_time > 1_000_000_000_000:
+                    tx_time = tx_time // 1000
+                return tx_time
+            return int(datetime.strptime(api_time_str, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
+        except Exception:
+            return None
+
+    def _process_whale_activity(self, addr, name, score, activities, info=None, seen_at=None):
+        """조회된 트랜잭션 목록을 필터링하여 카피 (메인 스레드 전용)
+
+        seen_at: 폴링 응답 수신 시각 (카피 지연 추적용, 없으면 처리 시작 시각)
+        Returns: 새로 본 tx 중 가장 최근 tx 시각 (스케줄러 최근성 판단용, 없으면 None)
+        """
         if info is None:
             info = {}
-        url = f"https://data-api.polymarket.com/activity?user={addr}&limit=10"
+        if seen_at is None:
+            seen_at = clock.time()
+        latest_tx_time = None
         try:
-            r = self.session.get(url, timeout=5)
-            if r.status_code != 200:
-                return
-
-            activities = r.json()
-            now = int(time.time())
+            now = int(clock.time())
 
-            # seen_txs 메모리 한계 방어 (10,000건 초과 시 절반 삭제)
-            if len(self.seen_txs) > 10000:
-                self.seen_txs = set(list(self.seen_txs)[5000:])
+            cursor = self.activity_cursors.get(addr)
+            new_cursor = None
 
             for tx in activities:
                 # BUG FIX4: 'id' 필드는 없음. transactionHash 사용
                 tx_id = tx.get('transactionHash') or tx.get('id')
-                if not tx_id or tx_id in self.seen_txs:
+                tx_time = self._parse_tx_time(tx.get('timestamp'))
+
+                # 최신순 응답이므로 cursor 시각보다 이전 tx가 나오면 이후 항목은 전부 이미 처리한 tx
+                # (같은 초 안의 순서는 보장되지 않으므로 cursor tx에서 멈추지 않음 → 같은 초의 처리분은 seen_txs가 거름)
+                if cursor and tx_time is not None and tx_time < cursor['ts']:
+                    break
+                if new_cursor is None and tx_id and tx_time is not None:
+                    new_cursor = {'ts': tx_time, 'tx': tx_id}
+
+                if not tx_id or self.seen_txs.contains(tx_id, tx_time):
                     continue
-                self.seen_txs.add(tx_id)
+                self.seen_txs.add(tx_id, tx_time)
+                self.journal.record('tx_seen', tx=tx_id, ts=tx_time)
+
+                if tx_time is not None and (latest_tx_time is None or tx_time > latest_tx_time):
+                    latest_tx_time = tx_time
 
                 tx_type = tx.get('type')
                 tx_side = tx.get('side')
@@ -194,23 +584,7 @@ class WhaleCopyBot:
                     continue
 
                 # [Filter 1] startup_time 백로그 방지 (봇 시작 전 거래 스킵)
-                timestamp_val = tx.get('timestamp')
-                try:
-                    if isinstance(timestamp_val, (int, float)):
-                        tx_time = int(timestamp_val)
-                        # 밀리초 단위 감지 (1e12 초 = 서기 33658년 → 불가능, 밀리초임)
-                        if tx_time > 1_000_000_000_000:
-                            tx_time = tx_time // 1000
-                    else:
-                        api_time_str = str(timestamp_val).split('.')[0]
-                        # 숫자형 문자열인 경우 (e.g. "1740743100")
-                        if api_time_str.isdigit():
-                            tx_time = int(api_time_str)
-                            if tx_time > 1_000_000_000_000:
-                                tx_time = tx_time // 1000
-                        else:
-                            tx_time = int(datetime.strptime(api_time_str, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
-                except Exception:
+                if tx_time is None:
                     continue
 
                 if tx_time < self.startup_time:
@@ -241,12 +615,10 @@ class WhaleCopyBot:
                 _cid = tx.get('conditionId') or ''
                 _oidx = int(tx.get('outcomeIndex', 0))
 
-                # [Filter 5] Gamma API 마켓 상태 확인
-                target_market_url = f"https://gamma-api.polymarket.com/events?slug={slug}"
+                # [Filter 5] Gamma API 마켓 상태 확인 (tags / endDate는 장기 캐시)
                 try:
-                    mr_res = self.session.get(target_market_url, timeout=3)
-                    if mr_res.status_code == 200 and mr_res.json():
-                        ev_data = mr_res.json()[0]
+                    ev_data = market_cache.get_event(slug, self.http, fields=('endDate', 'tags'), timeout=3)
+                    if ev_data:
                         end_date_str = ev_data.get('endDate')
 
                         # 만기일 검증 (30일 초과 장기마켓 차단)
@@ -259,15 +631,17 @@ class WhaleCopyBot:
 
                         # 고래 카테고리(주종목) 검증
                         market_tags = [t.get('label') for t in ev_data.get('tags', []) if t.get('label')]
-                        whale_top_tags = info.get('metrics', {}).get('top_categories', {})
+                        whale_top_tags = self.registry.current().categories.get(addr, frozenset())
                         if whale_top_tags and market_tags:
-                            matched_tags = set(market_tags).intersection(set(whale_top_tags.keys()))
-                            if not matched_tags:
-                                print(f"🚫 [SKIP] {name} 전공 외 픽 (마켓: {market_tags}, 전공: {list(whale_top_tags.keys())})")
+                            if whale_top_tags.isdisjoint(market_tags):
+                                print(f"🚫 [SKIP] {name} 전공 외 픽 (마켓: {market_tags}, 전공: {sorted(whale_top_tags)})")
                                 continue
                 except Exception as e:
                     print(f"[WARN] Gamma 마켓 필터 API 실패 ({name}): {e} → Fail Open으로 진행")
 
+                # 카피 지연 추적: 고래 체결 → 응답 수신 → 필터 통과 → VWAP 산출 → 체결
+                trace = {'whale_ts': tx_time, 'seen': seen_at, 'filtered': clock.time()}
+
                 # 다이나믹 슬리피지
                 if whale_size >= 5000:
                     slippage_modifier = 0.05
@@ -299,6 +673,7 @@ class WhaleCopyBot:
                     print(f"📉 [HALVING] 동일 마켓 기존 포지션 {existing_in_market}개 → 베팅 ${bet_size:.2f} (반감기 적용)")
 
                 vwap_price = self.client.simulate_market_buy_vwap(token_id, bet_size)
+                trace['priced'] = clock.time()
 
                 # [Filter 6] VWAP 최소가격 체크 (VWAP < 0.05 → 시장 유동성 극히 낮음, shares 폭등 방지)
                 if vwap_price is not None and vwap_price < 0.05:
@@ -308,7 +683,7 @@ class WhaleCopyBot:
                 if vwap_price is not None and vwap_price <= target_price:
                     print(f"\n⚡ [FAST EXECUTE] 🐋 {name} 픽, 즉시 매수!")
                     print(f"  고래매수가: ${whale_price:.3f} (규모: ${whale_size:.0f}) | VWAP: ${vwap_price:.3f} | 한도: ${target_price:.3f}")
-                    self._execute_copy_trade(tx, name, score, vwap_price)
+                    self._execute_copy_trade(tx, name, score, vwap_price, trace=trace)
                 else:
                     print(f"\n⏳ [PENDING] 🐋 {name} 픽 → 대기열 등록 (1분)")
                     if vwap_price:
@@ -325,25 +700,19 @@ class WhaleCopyBot:
                         "target_price": target_price,
                         "bet_size": bet_size,
                         "expires_at": now + 60,
+                        "trace": trace,
                     })
 
+            if new_cursor:
+                self.activity_cursors[addr] = new_cursor
+
         except Exception as e:
-            print(f"[WARN] {name} 고래 활동 조회 중 예외 발생: {e}")
+            print(f"[WARN] {name} 고래 활동 처리 중 예외 발생: {e}")
+        return latest_tx_time
 
     def _get_gamma_price(self, slug, conditionId, outcomeIndex):
-        url = f"https://gamma-api.polymarket.com/events?slug={slug}"
         try:
-            r = self.session.get(url, timeout=5)
-            events = r.json()
-            if not events: return None
-            for m in events[0].get('markets', []):
-                if m.get('conditionId') == conditionId:
-                    prices = m.get('outcomePrices', [])
-                    if isinstance(prices, str):
-                        try: prices = json.loads(prices)
-                        except: pass
-                    if isinstance(prices, list) and len(prices) > outcomeIndex:
-                        return float(prices[outcomeIndex])
+            return market_cache.get_outcome_price(slug, conditionId, outcomeIndex, self.http)
         except Exception as e:
             print(f"[WARN] _get_gamma_price 실패 ({slug}): {e}")
         return None
@@ -352,9 +721,12 @@ class WhaleCopyBot:
         if not self.pending_orders:
             return
 
-        now = int(time.time())
+        now = int(clock.time())
         active_orders = []
-        active_whale_addrs = set(self.load_whales().keys())
+        active_whale_addrs = self.registry.snapshot().top_addrs
+
+        # 대기 주문들의 호가창을 토큰 단위로 한 번에 조회 (같은 토큰 주문은 캐시된 스냅샷 공유)
+        self.client.get_order_books([order['tx'].get('asset') for order in self.pending_orders])
 
         for order in self.pending_orders:
             # 고래가 비활성화된 경우 즉시 취소
@@ -373,6 +745,7 @@ class WhaleCopyBot:
             
             # 큐에서도 호가창 긁어서 (VWAP) 바로 체결각 재기
             vwap_price = self.client.simulate_market_buy_vwap(token_id, bet_size)
+            priced_at = clock.time()
             
             if vwap_price is not None and vwap_price < 0.05:
                 print(f"🚫 [CANCELLED] PENDING VWAP 저유동성 ({vwap_price:.3f} < 0.05) → 주문 취소")
@@ -380,14 +753,18 @@ class WhaleCopyBot:
 
             if vwap_price is not None and vwap_price <= order['target_price']:
                 print(f"✅ [PENDING Filled] 🐋 {order['whale_name']} 픽 체결! (VWAP: ${vwap_price:.3f} <= ${order['target_price']:.3f})")
-                self._execute_copy_trade(tx, order['whale_name'], order['score'], vwap_price)
+                trace = dict(order.get('trace') or {}, priced=priced_at, pending=True)
+                self._execute_copy_trade(tx, order['whale_name'], order['score'], vwap_price, trace=trace)
             else:
                 active_orders.append(order)
                 
         self.pending_orders = active_orders
 
-    def _execute_copy_trade(self, tx, whale_name, score, executed_price):
-        """가상 매매 집행 (bet_size가 외부에서 주어지거나 여기서 계산되지만 일원화를 위해 여기서 계산 유지)"""
+    def _execute_copy_trade(self, tx, whale_name, score, executed_price, trace=None):
+        """가상 매매 집행 (bet_size가 외부에서 주어지거나 여기서 계산되지만 일원화를 위해 여기서 계산 유지)
+
+        trace: 단계별 시각 {'whale_ts', 'seen', 'filtered', 'priced'} (체결 시각을 더해 지연 기록)
+        """
         # 켈리 배팅이 아니라 고정 $10 혹은 자산의 1% 투자 (예시: 잔고의 5% 최대 $100)
         base_bet_size = min(self.bankroll * 0.05, 100.0) 
         
@@ -430,7 +807,7 @@ class WhaleCopyBot:
             'marketId': tx.get('marketId'), # if exists
             'token_id': tx.get('asset'),    # 청산 시 bid 오더북 조회용
             'slug': slug,
-            'timestamp': int(time.time()),
+            'timestamp': int(clock.time()),
             'current_price': executed_price,
             'peak_price': executed_price,       # 트레일링 스탑용 고점 추적
         }
@@ -441,121 +818,145 @@ class WhaleCopyBot:
         print(f"  상대가: ${whale_price:.3f} | 실제 체결가: ${executed_price:.3f}")
         print(f"  배팅금: ${bet_size:.2f} | 남은자본금: ${self.bankroll:.2f}")
         
+        # 감지→체결 지연 (고래별 분위수 + 거래 로그)
+        latency = None
+        if trace is not None:
+            trace = dict(trace, executed=clock.time())
+            deltas = self.copy_latency.record(whale_name, trace)
+            latency = {'trace': trace, 'stages': deltas}
+            print(f"  지연: 총 {deltas.get('total', 0):.1f}s (감지 {deltas.get('detect', 0):.1f}s | 필터 {deltas.get('filter', 0):.2f}s | "
+                  f"가격 {deltas.get('price', 0):.2f}s | 체결 {deltas.get('fill', 0):.3f}s)")
+
         # 호환성 위해 Trade Log 기록 (strategy 이름으로 분리)
-        self._log_trade(tid, "WHL", "YES", tx.get('title'), executed_price, bet_size, "OPEN", tx.get('marketId'))
+        self._log_trade(tid, "WHL", "YES", tx.get('title'), executed_price, bet_size, "OPEN", tx.get('marketId'), latency=latency)
         self._save_state()  # 포지션 진입 즉시 저장
 
     def _settle_positions(self):
-        """진행 중인 포지션의 현재가 조회 및 Hybrid Exit 청산 판단"""
-        to_remove = []
-        for tid, pos in list(self.positions.items()):
-            slug = pos['slug']
-            cond_id = pos['conditionId']
+        """진행 중인 포지션의 현재가 조회 및 Hybrid Exit 청산 판단
+
+        포지션을 이벤트(slug) 단위로 묶어 이벤트당 1회만 조회하고 (서로 다른 이벤트는 워커 풀에서 병렬 조회),
+        같은 마켓(conditionId) 포지션들은 동일 payload와 승자 판정을 공유한다.
+        """
+        if not self.positions:
+            return
 
-            url = f"https://gamma-api.polymarket.com/events?slug={slug}"
+        groups = {}
+        for tid, pos in self.positions.items():
+            groups.setdefault(pos['slug'], []).append((tid, pos))
+
+        futures = {
+            slug: self._submit_poll(
+                call_with_priority, SETTLEMENT,
+                market_cache.get_event, slug, self.http, fields=('outcomePrices', 'closed')
+            )
+            for slug in groups
+        }
+
+        to_remove = []
+        for slug, members in groups.items():
             try:
-                r = self.session.get(url, timeout=5)
-                events = r.json()
-                if not events:
-                    # slug 없거나 이미 삭제된 이벤트 → 타임아웃 기반 청산 폴백
-                    held_seconds = int(time.time()) - pos.get('timestamp', int(time.time()))
-                    if held_seconds > 259200:
-                        self._execute_early_exit(tid, pos, pos['entry_price'] * 0.5, "TIMEOUT")
-                        to_remove.append(tid)
-                    continue
-                market_found = False
-                for m in events[0].get('markets', []):
-                    if m.get('conditionId') != cond_id:
-                        continue
-                    market_found = True
-
-                    closed = m.get('closed', False)
-                    winner = self.client.get_market_winner(m.get('id', ''))
-                    self._log_settle_debug(pos, m, winner, closed)
-
-                    # [우선순위 1] 마켓 자연 정산
-                    if winner not in ['WAITING', None] or closed:
-                        outcome = str(pos.get('outcome') or '')
-                        outcome_up = outcome.upper()
-                        is_yes = any(k in outcome_up for k in ('YES', 'UP', 'ABOVE', 'HIGH'))
-                        won = (winner == 'YES' and is_yes) or (winner == 'NO' and not is_yes) or (winner == outcome)
-                        if won:
-                            self._settle_as_win(tid, pos)
-                        else:
-                            self._settle_as_loss(tid, pos)
-                        to_remove.append(tid)
-                        break
-
-                    # 현재가 파싱
-                    current_price = None
-                    try:
-                        prices = m.get('outcomePrices')
-                        if isinstance(prices, str):
-                            prices = json.loads(prices)
-                        if isinstance(prices, list):
-                            outcome_idx = pos.get('outcomeIndex', 0)
-                            if len(prices) > outcome_idx:
-                                current_price = float(prices[outcome_idx])
-                                pos['current_price'] = current_price
-                                # 고점 갱신 (트레일링 스탑용)
-                                if current_price > pos.get('peak_price', pos['entry_price']):
-                                    pos['peak_price'] = current_price
-                    except Exception as e:
-                        print(f"[WARN] 현재가 파싱 실패 ({pos.get('title', '')}): {e}")
-
-                    if current_price is None:
-                        # current_price 없어도 타임아웃은 실행 (죽은 포지션 강제 청산)
-                        held_seconds = int(time.time()) - pos.get('timestamp', int(time.time()))
+                event = futures[slug].result()
+            except Exception as e:
+                print(f"[WARN] 포지션 정산 이벤트 조회 실패 ({slug}, 포지션 {len(members)}개): {e}")
+                continue
+
+            markets = {}
+            for m in (event or {}).get('markets', []):
+                markets.setdefault(m.get('conditionId'), m)
+            winners = {}  # conditionId -> 승자 판정 (같은 마켓 포지션끼리 공유)
+
+            for tid, pos in members:
+                try:
+                    m = markets.get(pos['conditionId'])
+                    if m is None:
+                        # slug 없거나 이미 삭제된 이벤트 / conditionId 매칭 마켓 없음 → 타임아웃 기반 청산 폴백
+                        held_seconds = int(clock.time()) - pos.get('timestamp', int(clock.time()))
                         if held_seconds > 259200:
                             self._execute_early_exit(tid, pos, pos['entry_price'] * 0.5, "TIMEOUT")
                             to_remove.append(tid)
-                        break
-
-                    roi = (current_price - pos['entry_price']) / pos['entry_price']
-                    peak_price = pos.get('peak_price', pos['entry_price'])
-                    peak_roi = (peak_price - pos['entry_price']) / pos['entry_price']
+                        continue
 
-                    # [우선순위 2] Take Profit +30%
-                    if roi >= 0.30:
-                        self._execute_early_exit(tid, pos, current_price, "TAKE_PROFIT")
+                    cond_id = pos['conditionId']
+                    if cond_id not in winners:
+                        winners[cond_id] = self.client.get_market_winner(m.get('id', ''), market=m)
+                    if self._evaluate_position(tid, pos, m, winners[cond_id]):
                         to_remove.append(tid)
-                        break
+                except Exception as e:
+                    print(f"[WARN] 포지션 정산 처리 실패 ({pos.get('title', tid)}): {e}")
 
-                    # [우선순위 3] Trailing Stop (고점 +10% 달성 후 고점 대비 -15% 하락)
-                    if peak_roi >= 0.10 and (current_price - peak_price) / peak_price <= -0.15:
-                        self._execute_early_exit(tid, pos, current_price, "TRAILING_STOP")
-                        to_remove.append(tid)
-                        break
+        for tid in to_remove:
+            self.positions.pop(tid, None)
+        for tid in [tid for tid in self._settle_debug_last if tid not in self.positions]:
+            del self._settle_debug_last[tid]
+        if to_remove:
+            self._save_state()  # 청산 후 즉시 저장
 
-                    # [우선순위 4] Stop Loss -20%
-                    if roi <= -0.20:
-                        self._execute_early_exit(tid, pos, current_price, "STOP_LOSS")
-                        to_remove.append(tid)
-                        break
+    def _evaluate_position(self, tid, pos, m, winner):
+        """마켓 payload 기준 단일 포지션 청산 판단. 청산했으면 True"""
+        closed = m.get('closed', False)
+        self._log_settle_debug(tid, pos, m, winner, closed)
+
+        # [우선순위 1] 마켓 자연 정산
+        if winner not in ['WAITING', None] or closed:
+            outcome = str(pos.get('outcome') or '')
+            outcome_up = outcome.upper()
+            is_yes = any(k in outcome_up for k in ('YES', 'UP', 'ABOVE', 'HIGH'))
+            won = (winner == 'YES' and is_yes) or (winner == 'NO' and not is_yes) or (winner == outcome)
+            if won:
+                self._settle_as_win(tid, pos)
+            else:
+                self._settle_as_loss(tid, pos)
+            return True
 
-                    # [우선순위 5] Timeout 3일 (259200초)
-                    held_seconds = int(time.time()) - pos.get('timestamp', int(time.time()))
-                    if held_seconds > 259200:
-                        self._execute_early_exit(tid, pos, current_price, "TIMEOUT")
-                        to_remove.append(tid)
-                        break
+        # 현재가 파싱
+        current_price = None
+        try:
+            prices = parse_outcome_prices(m)
+            if isinstance(prices, list):
+                outcome_idx = pos.get('outcomeIndex', 0)
+                if len(prices) > outcome_idx:
+                    current_price = float(prices[outcome_idx])
+                    pos['current_price'] = current_price
+                    # 고점 갱신 (트레일링 스탑용)
+                    if current_price > pos.get('peak_price', pos['entry_price']):
+                        pos['peak_price'] = current_price
+        except Exception as e:
+            print(f"[WARN] 현재가 파싱 실패 ({pos.get('title', '')}): {e}")
 
-                    break  # conditionId 매칭 마켓 처리 완료
+        held_seconds = int(clock.time()) - pos.get('timestamp', int(clock.time()))
 
-                # conditionId 매칭 마켓이 이벤트에 없는 경우 → 타임아웃 폴백
-                if not market_found:
-                    held_seconds = int(time.time()) - pos.get('timestamp', int(time.time()))
-                    if held_seconds > 259200:
-                        self._execute_early_exit(tid, pos, pos['entry_price'] * 0.5, "TIMEOUT")
-                        to_remove.append(tid)
+        if current_price is None:
+            # current_price 없어도 타임아웃은 실행 (죽은 포지션 강제 청산)
+            if held_seconds > 259200:
+                self._execute_early_exit(tid, pos, pos['entry_price'] * 0.5, "TIMEOUT")
+                return True
+            return False
 
-            except Exception as e:
-                print(f"[WARN] 포지션 정산 처리 실패 ({pos.get('title', tid)}): {e}")
+        roi = (current_price - pos['entry_price']) / pos['entry_price']
+        peak_price = pos.get('peak_price', pos['entry_price'])
+        peak_roi = (peak_price - pos['entry_price']) / pos['entry_price']
 
-        for tid in to_remove:
-            self.positions.pop(tid, None)
-        if to_remove:
-            self._save_state()  # 청산 후 즉시 저장
+        # [우선순위 2] Take Profit +30%
+        if roi >= 0.30:
+            self._execute_early_exit(tid, pos, current_price, "TAKE_PROFIT")
+            return True
+
+        # [우선순위 3] Trailing Stop (고점 +10% 달성 후 고점 대비 -15% 하락)
+        if peak_roi >= 0.10 and (current_price - peak_price) / peak_price <= -0.15:
+            self._execute_early_exit(tid, pos, current_price, "TRAILING_STOP")
+            return True
+
+        # [우선순위 4] Stop Loss -20%
+        if roi <= -0.20:
+            self._execute_early_exit(tid, pos, current_price, "STOP_LOSS")
+            return True
+
+        # [우선순위 5] Timeout 3일 (259200초)
+        if held_seconds > 259200:
+            self._execute_early_exit(tid, pos, current_price, "TIMEOUT")
+            return True
+
+        return False
 
     def _execute_early_exit(self, tid, pos, current_price, reason):
         """TP / SL / Trailing Stop / Timeout 조기 청산"""
@@ -618,10 +1019,10 @@ class WhaleCopyBot:
         print(f"\n❌ [LOSS] {pos['title']} 손실: ${loss:.2f}")
         self._log_trade(tid, "WHL", pos.get('outcome', ''), pos['title'], 0.0, pos['size_usdc'], "LOSS", pos.get('marketId', ''), pnl=loss)
 
-    def _log_trade(self, tid, coin, side, question, price, size, action, market_id="", pnl=0.0):
+    def _log_trade(self, tid, coin, side, question, price, size, action, market_id="", pnl=0.0, latency=None):
         record = {
             "strategy": "WhaleCopy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": clock.now().isoformat(),
             "action": action,
             "coin": coin,
             "side": side,
@@ -633,13 +1034,21 @@ class WhaleCopyBot:
             "marketId": market_id,
             "bankroll_after": round(self.bankroll, 2)
         }
-        with open(self.trade_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-
-    def _log_settle_debug(self, pos, market_data, winner, closed):
-        """정산 시도마다 winner/closed/raw 필드를 파일로 기록 (분석용)"""
+        if latency is not None:
+            record["latency"] = latency
+        self.trade_log.write(record)
+
+    def _log_settle_debug(self, tid, pos, market_data, winner, closed):
+        """정산 시도 시 winner/closed/raw 필드를 파일로 기록 (분석용). 직전 기록과 필드가 같으면 생략"""
+        fields = (
+            winner, closed, market_data.get('id', ''), str(market_data.get('outcomePrices')),
+            market_data.get('winnerOutcome'), market_data.get('resolved'),
+        )
+        if self._settle_debug_last.get(tid) == fields:
+            return
+        self._settle_debug_last[tid] = fields
         record = {
-            "ts": datetime.now().isoformat()[:19],
+            "ts": clock.now().isoformat()[:19],
             "title": (pos.get('title') or '')[:50],
             "winner": winner,
             "closed": closed,
@@ -650,60 +1059,103 @@ class WhaleCopyBot:
             "resolved": market_data.get('resolved'),
             "pos_outcome": pos.get('outcome'),
         }
-        path = os.path.join(os.path.dirname(__file__), "settle_debug.jsonl")
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.settle_debug_log.write(record)
+
+    def _state_snapshot(self):
+        """스냅샷(state_WhaleCopy.json)에 저장할 전체 상태"""
+        return {
+            'positions': self.positions,
+            'bankroll': self.bankroll,
+            'peak_bankroll': self.peak_bankroll,
+            'stats': self.stats,
+            # seen_txs는 최근 2000개만 보존 (메모리 & 파일 크기 제한, 과거분은 Bloom tier로 보존)
+            'seen_txs': self.seen_txs.to_state(limit=2000),
+            'activity_cursors': self.activity_cursors,
+        }
+
+    def _journal_changes(self):
+        """직전 기록 이후 바뀐 포지션 / 자산 / cursor만 저널 op로 기록 (seen tx는 추가 시점에 기록됨)"""
+        committed = self._committed_positions
+        for tid, pos in self.positions.items():
+            prev = committed.get(tid)
+            if prev is None:
+                self.journal.record('pos_open', tid=tid, pos=pos)
+            else:
+                changed = {k: v for k, v in pos.items() if k not in prev or prev[k] != v}
+                if not changed:
+                    continue
+                self.journal.record('pos_update', tid=tid, fields=changed)
+            committed[tid] = dict(pos)
+        for tid in [tid for tid in committed if tid not in self.positions]:
+            self.journal.record('pos_close', tid=tid)
+            del committed[tid]
+
+        account = (self.bankroll, self.peak_bankroll, tuple(self.stats.items()))
+        if account != self._committed_account:
+            self.journal.record('account', bankroll=self.bankroll, peak_bankroll=self.peak_bankroll, stats=self.stats)
+            self._committed_account = account
+
+        for addr, cursor in self.activity_cursors.items():
+            if self._committed_cursors.get(addr) != cursor:
+                self.journal.record('cursor', addr=addr, cursor=cursor)
+                self._committed_cursors[addr] = dict(cursor)
+
+    def _mark_committed(self):
+        """현재 메모리 상태를 '저널에 기록됨'으로 표시 (복구 직후 기준점)"""
+        self._committed_positions = {tid: dict(pos) for tid, pos in self.positions.items()}
+        self._committed_account = (self.bankroll, self.peak_bankroll, tuple(self.stats.items()))
+        self._committed_cursors = {addr: dict(c) for addr, c in self.activity_cursors.items()}
 
     def _save_state(self):
-        """positions, bankroll, stats, seen_txs를 JSON 파일로 영속화"""
+        """변경분을 저널에 append (디스크 쓰기량은 전체 상태가 아닌 변경량에 비례)
+
+        저널이 커지거나 오래되면 전체 상태를 스냅샷으로 압축한다.
+        """
         try:
-            # seen_txs는 최근 2000개만 보존 (메모리 & 파일 크기 제한)
-            recent_txs = list(self.seen_txs)[-2000:]
-            state = {
-                'positions': self.positions,
-                'bankroll': self.bankroll,
-                'peak_bankroll': self.peak_bankroll,
-                'stats': self.stats,
-                'seen_txs': recent_txs,
-            }
-            tmp_path = self.state_file_path + '.tmp'
-            with open(tmp_path, 'w', encoding='utf-8') as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
-            # 원자적 교체 (Windows에서는 기존 파일 먼저 삭제 필요)
-            if os.path.exists(self.state_file_path):
-                os.remove(self.state_file_path)
-            os.rename(tmp_path, self.state_file_path)
+            self._journal_changes()
+            self.journal.commit()
+            if self.journal.needs_compaction():
+                self.journal.compact(self._state_snapshot())
         except Exception as e:
             print(f"[WARN] 상태 저장 실패: {e}")
 
+    def _close_state(self):
+        """종료 시 남은 변경분 기록 + fsync"""
+        try:
+            self._journal_changes()
+            self.journal.close()
+        except Exception as e:
+            print(f"[WARN] 상태 저널 종료 처리 실패: {e}")
+
     def _load_state(self):
-        """이전 세션의 상태를 state_WhaleCopy.json에서 복구"""
-        if not os.path.exists(self.state_file_path):
-            return
+        """이전 세션의 상태를 스냅샷(state_WhaleCopy.json) + 저널 재생으로 복구"""
         try:
-            with open(self.state_file_path, 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            state = self.journal.load()
+            if state is None:
+                return
             self.positions = state.get('positions', {})
             self.bankroll = state.get('bankroll', self.bankroll)
             self.peak_bankroll = state.get('peak_bankroll', self.peak_bankroll)
             self.stats = state.get('stats', self.stats)
-            self.seen_txs = set(state.get('seen_txs', []))
+            self.seen_txs = SeenTxCache.from_state(state.get('seen_txs'), config.SEEN_TX_MAX, config.SEEN_TX_BLOOM_BITS)
+            self.activity_cursors = state.get('activity_cursors', {})
+            self._mark_committed()
             settled = self.stats['wins'] + self.stats['losses']
-            print(f"[STATE] 이전 세션 복구 완료:")
+            print(f"[STATE] 이전 세션 복구 완료 (저널 {self.journal.replayed}건 재생):")
             print(f"  포지션: {len(self.positions)}개 | 자본금: ${self.bankroll:.2f}")
             print(f"  통계: {settled}건 (W{self.stats['wins']}/L{self.stats['losses']}) | PnL: ${self.stats['total_pnl']:+.2f}")
             print(f"  seen_txs: {len(self.seen_txs)}건 복구")
         except Exception as e:
             print(f"[WARN] 상태 복구 실패 (초기값 사용): {e}")
 
-    def _update_dashboard(self):
+    def _update_dashboard(self, force_json=False):
         settled = self.stats['wins'] + self.stats['losses']
         win_rate = (self.stats['wins'] / settled * 100) if settled > 0 else 0.0
         roi = (self.stats['total_pnl'] / config.INITIAL_BANKROLL * 100)
         
         data = {
             "strategy": "WhaleCopy",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": clock.now().isoformat(),
             "pnl": round(self.stats['total_pnl'], 2),
             "equity": round(self.bankroll + sum(p['size_usdc'] for p in self.positions.values()), 2),
             "balance": round(self.bankroll, 2),
@@ -712,13 +1164,32 @@ class WhaleCopyBot:
             "trades": settled,
             "active_bets": len(self.positions),
             "total_bet": round(sum(p['size_usdc'] for p in self.positions.values()), 2),
-            "last_action": datetime.now().isoformat()[:19]
+            "last_action": clock.now().isoformat()[:19]
         }
-        with open(self.status_file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        self.last_status = data
+        # 대시보드는 공유 메모리 채널을 우선 읽음 (파일 I/O 없음)
+        if self.status_channel is not None:
+            try:
+                self.status_channel.publish(data)
+            except Exception as e:
+                print(f"[WARN] 상태 채널 기록 실패: {e}")
+
+        # 구버전 대시보드 / 외부 도구용 status JSON (간격 제한 + 원자적 교체)
+        json_interval = config.STATUS_JSON_INTERVAL
+        if force_json or self.status_channel is None or (json_interval > 0 and time.time() - self.last_status_json >= json_interval):
+            try:
+                tmp_path = self.status_file_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.status_file_path)
+                self.last_status_json = time.time()
+            except Exception as e:
+                print(f"[WARN] status 파일 기록 실패: {e}")
 
-        # 상태 영속화 (대시보드 업데이트마다 함께 저장)
+        # 상태 영속화 (대시보드 업데이트마다 변경분만 저널에 기록)
         self._save_state()
+        # Gamma 이벤트 캐시 warm start용 디스크 저장 (5분 간격)
+        market_cache.persist()
 
 if __name__ == '__main__':
     bot = WhaleCopyBot()
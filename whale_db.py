@@ -0,0 +1,243 @@
+"""
+고래 DB (SQLite)
+
+whales.json 전체 재작성 대신 행 단위 upsert로 갱신한다.
+- whales / whale_metrics / whale_categories 테이블
+- (status, score) 인덱스로 상위 N명 조회
+- WAL 모드: 봇 / 유지보수 스레드(매니저, 스코어러) / 대시보드가 동시에 읽어도 쓰기와 충돌 없음
+- meta.version: 쓰기 트랜잭션마다 +1 → 읽는 쪽은 숫자 하나로 변경 여부 판단
+- 최초 사용 시 기존 whales.json 자동 import (get_whale_db() 첫 호출)
+
+CLI:
+    python whale_db.py import [whales.json]   # JSON → DB (행 단위 upsert)
+    python whale_db.py export [whales.json]   # DB → JSON (백업/확인용)
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(BASE_DIR, "whales.db")
+LEGACY_JSON_PATH = os.path.join(BASE_DIR, "whales.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+
+CREATE TABLE IF NOT EXISTS whales (
+    address      TEXT PRIMARY KEY,
+    name         TEXT,
+    status       TEXT NOT NULL DEFAULT 'inactive',
+    score        REAL,
+    win_rate     REAL,
+    roi          REAL,
+    added_at     INTEGER,
+    last_updated INTEGER,
+    extra        TEXT            -- 스키마에 없는 필드 (JSON)
+);
+CREATE INDEX IF NOT EXISTS idx_whales_status_score ON whales (status, score DESC);
+
+CREATE TABLE IF NOT EXISTS whale_metrics (
+    address    TEXT PRIMARY KEY REFERENCES whales (address) ON DELETE CASCADE,
+    trades_30d INTEGER,
+    win_rate   REAL,
+    roi        REAL,
+    updated_at INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS whale_categories (
+    address TEXT NOT NULL REFERENCES whales (address) ON DELETE CASCADE,
+    label   TEXT NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (address, label)
+);
+"""
+
+WHALE_COLUMNS = ("name", "status", "score", "win_rate", "roi", "added_at", "last_updated")
+
+
+class WhaleDB:
+    def __init__(self, path=DB_PATH, legacy_json=LEGACY_JSON_PATH):
+        self.path = path
+        self._local = threading.local()  # sqlite3 연결은 스레드별로 분리
+        conn = self._conn()
+        with conn:
+            conn.executescript(SCHEMA)
+        if legacy_json and os.path.exists(legacy_json) and self.count() == 0:
+            imported = self.import_json(legacy_json)
+            print(f"[WhaleDB] {legacy_json} → {path} import 완료 ({imported}명)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # --- 쓰기 ---
+    def _write_whale(self, conn, address, info):
+        extra = {k: v for k, v in info.items() if k not in WHALE_COLUMNS and k != "metrics"}
+        conn.execute(
+            """
+            INSERT INTO whales (address, name, status, score, win_rate, roi, added_at, last_updated, extra)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (address) DO UPDATE SET
+                name = excluded.name, status = excluded.status, score = excluded.score,
+                win_rate = excluded.win_rate, roi = excluded.roi, added_at = excluded.added_at,
+                last_updated = excluded.last_updated, extra = excluded.extra
+            """,
+            (address, info.get("name"), info.get("status") or "inactive", info.get("score"),
+             info.get("win_rate"), info.get("roi"), info.get("added_at"), info.get("last_updated"),
+             json.dumps(extra, ensure_ascii=False) if extra else None),
+        )
+        # 고래 1명의 레코드는 통째로 교체 (metrics 없는 info면 기존 metrics/카테고리도 제거)
+        conn.execute("DELETE FROM whale_metrics WHERE address = ?", (address,))
+        conn.execute("DELETE FROM whale_categories WHERE address = ?", (address,))
+        metrics = info.get("metrics")
+        if metrics:
+            self._write_metrics(conn, address, metrics)
+
+    def _write_metrics(self, conn, address, metrics):
+        conn.execute(
+            "INSERT OR REPLACE INTO whale_metrics (address, trades_30d, win_rate, roi, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (address, metrics.get("30d_trades"), metrics.get("win_rate"), metrics.get("roi"), int(time.time())),
+        )
+        conn.execute("DELETE FROM whale_categories WHERE address = ?", (address,))
+        conn.executemany(
+            "INSERT INTO whale_categories (address, label, count) VALUES (?, ?, ?)",
+            [(address, label, count) for label, count in (metrics.get("top_categories") or {}).items()],
+        )
+
+    @staticmethod
+    def _bump_version(conn):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def upsert_whale(self, address, info):
+        """고래 1명 레코드 upsert (whales.json의 값 형식 그대로)"""
+        conn = self._conn()
+        with conn:
+            self._write_whale(conn, address, info)
+            self._bump_version(conn)
+
+    def upsert_many(self, whales):
+        """{address: info} 일괄 upsert (단일 트랜잭션)"""
+        conn = self._conn()
+        with conn:
+            for address, info in whales.items():
+                self._write_whale(conn, address, info)
+            self._bump_version(conn)
+        return len(whales)
+
+    def update_score(self, address, score, metrics):
+        """스코어러 결과 반영 (score + metrics/카테고리만 갱신)"""
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE whales SET score = ? WHERE address = ?", (score, address))
+            self._write_metrics(conn, address, metrics)
+            self._bump_version(conn)
+
+    def import_json(self, json_path=LEGACY_JSON_PATH):
+        with open(json_path, "r", encoding="utf-8") as f:
+            return self.upsert_many(json.load(f))
+
+    # --- 읽기 ---
+    def version(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def count(self, status=None):
+        if status is None:
+            return self._conn().execute("SELECT COUNT(*) FROM whales").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM whales WHERE status = ?", (status,)).fetchone()[0]
+
+    def _rows_to_dict(self, rows):
+        whales = {}
+        for row in rows:
+            info = {"name": row["name"], "win_rate": row["win_rate"], "roi": row["roi"],
+                    "added_at": row["added_at"], "last_updated": row["last_updated"], "status": row["status"]}
+            if row["score"] is not None:
+                info["score"] = row["score"]
+            if row["extra"]:
+                info.update(json.loads(row["extra"]))
+            whales[row["address"]] = info
+        if not whales:
+            return whales
+
+        conn = self._conn()
+        addrs = list(whales)
+        for i in range(0, len(addrs), 500):
+            chunk = addrs[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for m in conn.execute(f"SELECT * FROM whale_metrics WHERE address IN ({marks})", chunk):
+                whales[m["address"]]["metrics"] = {
+                    "30d_trades": m["trades_30d"], "win_rate": m["win_rate"], "roi": m["roi"], "top_categories": {},
+                }
+            for c in conn.execute(
+                f"SELECT address, label, count FROM whale_categories WHERE address IN ({marks}) ORDER BY address, count DESC",
+                chunk,
+            ):
+                metrics = whales[c["address"]].get("metrics")
+                if metrics is not None:
+                    metrics["top_categories"][c["label"]] = c["count"]
+        return whales
+
+    def load_all(self, status=None):
+        """{address: info} (whales.json과 같은 형식). status 지정 시 해당 상태만"""
+        if status is None:
+            rows = self._conn().execute("SELECT * FROM whales")
+        else:
+            rows = self._conn().execute("SELECT * FROM whales WHERE status = ?", (status,))
+        return self._rows_to_dict(rows.fetchall())
+
+    def top_active(self, n=30):
+        """score 상위 n명 active 고래 {address: info} (score 내림차순, (status, score) 인덱스 사용)"""
+        rows = self._conn().execute(
+            "SELECT * FROM whales WHERE status = 'active' ORDER BY score DESC LIMIT ?", (n,)
+        ).fetchall()
+        return self._rows_to_dict(rows)
+
+    def active_addresses(self):
+        return {r[0] for r in self._conn().execute("SELECT address FROM whales WHERE status = 'active'")}
+
+    def export_json(self, json_path):
+        tmp_path = json_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.load_all(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, json_path)
+
+
+_default_db = None
+_default_lock = threading.Lock()
+
+
+def get_whale_db():
+    """기본 고래 DB (whales.db 또는 WHALE_DB_PATH) 싱글톤. 첫 호출 시 생성 → import만으로는 DB 파일 생성 / whales.json import가 일어나지 않음"""
+    global _default_db
+    with _default_lock:
+        if _default_db is None:
+            from config import config
+            _default_db = WhaleDB(config.WHALE_DB_PATH or DB_PATH)
+        return _default_db
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else ""
+    target = sys.argv[2] if len(sys.argv) > 2 else LEGACY_JSON_PATH
+    if cmd == "import":
+        db = get_whale_db()
+        print(f"✅ {db.import_json(target)}명 import 완료 → {db.path}")
+    elif cmd == "export":
+        get_whale_db().export_json(target)
+        print(f"✅ {target} 로 export 완료")
+    else:
+        print(__doc__)
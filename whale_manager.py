@@ -1,13 +1,13 @@
-import os
-import json
 import time
-import requests
 from datetime import datetime
+from market_cache import market_cache
+from whale_db import get_whale_db
+from rate_budget import MAINTENANCE
+from http_client import get_client
 
 # API 엔드포인트 세팅
 DATA_API_BASE = "https://data-api.polymarket.com"
 GAMMA_API_BASE = "https://gamma-api.polymarket.com"
-DB_FILE = "whales.json"
 
 # 백테스팅 설정값
 SLIPPAGE_PCT = 0.03   # 3% 슬리피지 가정
@@ -15,49 +15,30 @@ MIN_WIN_RATE = 75.0   # 최소 75% 이상의 승률 요구
 MIN_ROI = 0.5         # 최소 0.5% 이상의 '슬리피지 후' 가상 ROI 요구
 MIN_TRADES = 10       # 최소 10건 이상의 거래 내역이 있어야 함
 
-def load_whales_db():
-    if os.path.exists(DB_FILE):
-        try:
-            with open(DB_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {}
-    return {}
+def load_whales_db(status=None):
+    try:
+        return get_whale_db().load_all(status)
+    except Exception as e:
+        print(f"[WARN] 고래 DB 로드 실패: {e}")
+        return {}
 
 def save_whales_db(db):
-    with open(DB_FILE, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=2, ensure_ascii=False)
+    # 전체 파일 재작성 대신 행 단위 upsert (단일 트랜잭션)
+    get_whale_db().upsert_many(db)
 
-def fetch_market_current_value(slug, conditionId, outcomeIndex, session):
-    url = f"{GAMMA_API_BASE}/events?slug={slug}"
+def fetch_market_current_value(slug, conditionId, outcomeIndex, http):
     try:
-        r = session.get(url, timeout=10)
-        if r.status_code == 200:
-            events = r.json()
-            if not events: return None
-            for m in events[0].get('markets', []):
-                if m.get('conditionId') == conditionId:
-                    prices = m.get('outcomePrices', [])
-                    if isinstance(prices, str):
-                        try: prices = json.loads(prices)
-                        except: pass
-                    if isinstance(prices, list) and len(prices) > outcomeIndex:
-                        return float(prices[outcomeIndex])
+        return market_cache.get_outcome_price(slug, conditionId, outcomeIndex, http, timeout=10)
     except:
-        pass
-    return None
+        return None
 
-def evaluate_whale_edge(address, session, limit=50):
+def evaluate_whale_edge(address, http, limit=50):
     """
     해당 주소의 최근 거래를 바탕으로 1분 뒤 매수(슬리피지 적용) 가상 PnL 산출
     """
     url = f"{DATA_API_BASE}/activity?user={address}&limit={limit}"
     try:
-        r = session.get(url, timeout=10)
-        if r.status_code != 200:
-            return None
-            
-        activities = r.json()
+        activities = http.get_json(url, "history")
         buys = [a for a in activities if a.get('type') == 'TRADE' and a.get('side') == 'BUY']
         
         if len(buys) < MIN_TRADES:
@@ -76,8 +57,8 @@ def evaluate_whale_edge(address, session, limit=50):
             our_price = min(0.99, whale_price * (1 + SLIPPAGE_PCT))
             investment = size * our_price
             
-            current_price = fetch_market_current_value(t.get('slug'), t.get('conditionId'), outcome_idx, session)
-            time.sleep(0.2) # API 밴 방지
+            slug = t.get('slug')
+            current_price = fetch_market_current_value(slug, t.get('conditionId'), outcome_idx, http)
             
             if current_price is None:
                 continue
@@ -104,7 +85,7 @@ def evaluate_whale_edge(address, session, limit=50):
         print(f"Error evaluating {address}: {e}")
         return None
 
-def fetch_top_leaderboard(session, limit=500):
+def fetch_top_leaderboard(http, limit=500):
     """
     Polymarket Leaderboard API (최대 50건 반환 한계 극복)
     limit으로 요청한 수량만큼 offset을 조절하며 페이지네이션(Pagination) 수집
@@ -118,8 +99,7 @@ def fetch_top_leaderboard(session, limit=500):
     for offset in offsets:
         url = f"{DATA_API_BASE}/v1/leaderboard?limit={batch_size}&offset={offset}&timePeriod=MONTH&orderBy=PNL"
         try:
-            r = session.get(url, timeout=10)
-            data = r.json()
+            data = http.get_json(url, "history")
             items = data if isinstance(data, list) else data.get('data', [])
             if not items and isinstance(data, dict):
                 items = data.get('results', []) or data.get('leaderboard', [])
@@ -132,8 +112,6 @@ def fetch_top_leaderboard(session, limit=500):
                 name = item.get('userName', 'Unknown')
                 if addr:
                     whales.append({"address": addr, "name": name})
-                    
-            time.sleep(1) # IP 밴 제한 회피용
         except Exception as e:
             print(f"Error fetching leaderboard at offset {offset}: {e}")
             break
@@ -142,25 +120,22 @@ def fetch_top_leaderboard(session, limit=500):
 
 def run_manager():
     print(f"[{datetime.now()}] 🐋 Starting Whale Manager...")
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    http = get_client(MAINTENANCE)  # 요청 간격은 공용 예산이 조절 (봇 감지 요청에 양보)
     
-    db = load_whales_db()
+    # 재평가 대상은 active 고래만 로드 (평가 이력이 쌓여도 전체를 읽지 않음)
+    db = load_whales_db(status='active')
     
-    # 1. Pruning: 기존 DB의 고래들 성적 재평가
+    # 1. Pruning: 기존 DB의 고래들 성적 재평가 (평가 즉시 해당 행만 upsert)
     print("\n--- 1. Pruning Existing Whales ---")
-    keys_to_remove = []
     
     for addr, info in list(db.items()):
-        if info.get('status') == 'active':
-            print(f"Re-evaluating {info['name']} ({addr})...")
-            result = evaluate_whale_edge(addr, session, limit=30) # 재평가는 최근 30개만
-            
-            if result is None:
-                print(f"  -> Insufficient data or error. Marking inactive.")
-                info['status'] = 'inactive'
-                continue
-                
+        print(f"Re-evaluating {info['name']} ({addr})...")
+        result = evaluate_whale_edge(addr, http, limit=30) # 재평가는 최근 30개만
+        
+        if result is None:
+            print(f"  -> Insufficient data or error. Marking inactive.")
+            info['status'] = 'inactive'
+        else:
             roi = result['roi']
             win_rate = result['win_rate']
             
@@ -174,10 +149,11 @@ def run_manager():
                 info['last_updated'] = int(time.time())
                 info['roi'] = roi
                 info['win_rate'] = win_rate
+        get_whale_db().upsert_whale(addr, info)
                 
     # 2. Discovery: 리더보드에서 새로운 고래 발굴
     print("\n--- 2. Discovering New Whales (Top 300 Pagination) ---")
-    candidates = fetch_top_leaderboard(session, limit=300)
+    candidates = fetch_top_leaderboard(http, limit=300)
     print(f"✅ Fetched {len(candidates)} candidates from Leaderboard.")
     
     new_found = 0
@@ -190,7 +166,7 @@ def run_manager():
             continue
             
         print(f"Evaluating candidate: {name} ({addr})...")
-        result = evaluate_whale_edge(addr, session, limit=50) # 신규는 50개 빡세게 검증
+        result = evaluate_whale_edge(addr, http, limit=50) # 신규는 50개 빡세게 검증
         
         if result:
             roi = result['roi']
@@ -207,17 +183,16 @@ def run_manager():
                     "last_updated": int(time.time()),
                     "status": "active"
                 }
+                get_whale_db().upsert_whale(addr, db[addr])
                 new_found += 1
             else:
                 print("  -> Failed edge criteria.")
         else:
             print("  -> Insufficient data or error.")
-            
-        time.sleep(1) # Rate limit
-        
-    save_whales_db(db)
+
+    market_cache.persist(force=True)
     
-    active_count = sum(1 for v in db.values() if v.get('status') == 'active')
+    active_count = get_whale_db().count(status='active')
     print(f"\n[{datetime.now()}] 🐋 Manager Finished.")
     print(f"Current Active Whales: {active_count}")
     print(f"Newly Added: {new_found}")
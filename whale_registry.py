@@ -0,0 +1,84 @@
+"""
+고래 레지스트리 (고래 DB 변경 감지 캐시)
+
+고래 DB를 매 루프마다 다시 읽지 않고, DB 버전(meta.version)이 바뀐 경우에만 score 상위 N명 active 고래만
+(status, score) 인덱스 쿼리(WhaleDB.top_active)로 재로드한다.
+재로드 시 상위 N명, 주소 집합, 전공 카테고리(frozenset)를 미리 계산해
+불변(immutable) 스냅샷으로 제공 → 메인 루프와 유지보수 스레드가 쓰는 중인 데이터를 볼 일이 없음.
+"""
+
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+WhaleSnapshot = namedtuple("WhaleSnapshot", [
+    "version",        # 로드한 DB 버전 (WhaleDB.version())
+    "top",            # score 상위 N명 active 고래 {addr: info} (정렬 순서 유지)
+    "top_addrs",      # 상위 N명 주소 frozenset
+    "categories",     # 상위 N명 {addr: frozenset(전공 카테고리)}
+])
+
+EMPTY_SNAPSHOT = WhaleSnapshot(None, MappingProxyType({}), frozenset(), MappingProxyType({}))
+
+
+def _freeze(value):
+    """dict/list를 읽기 전용 구조(MappingProxyType/tuple)로 변환"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def build_snapshot(db, version=None, top_n=30):
+    """{addr: info} → 스냅샷 (active만, score 내림차순 상위 top_n명)"""
+    active = sorted(
+        (addr for addr, info in db.items() if info.get('status') == 'active'),
+        key=lambda addr: db[addr].get('score') or 0, reverse=True,
+    )
+    top = {addr: _freeze(db[addr]) for addr in active[:top_n]}
+    categories = {
+        addr: frozenset((info.get('metrics') or {}).get('top_categories') or {})
+        for addr, info in top.items()
+    }
+    return WhaleSnapshot(
+        version=version,
+        top=MappingProxyType(top),
+        top_addrs=frozenset(top),
+        categories=MappingProxyType(categories),
+    )
+
+
+class WhaleRegistry:
+    def __init__(self, db, top_n=30):
+        self.db = db
+        self.top_n = top_n
+        self._snapshot = EMPTY_SNAPSHOT
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def current(self):
+        """마지막으로 로드한 스냅샷 (DB 확인 없음)"""
+        return self._snapshot
+
+    def snapshot(self):
+        """DB가 바뀌었으면 재로드 후 스냅샷 반환. 조회 실패 시 직전 스냅샷 유지"""
+        try:
+            version = self.db.version()
+        except Exception as e:
+            print(f"[WARN] 고래 DB 버전 조회 실패 (직전 스냅샷 유지): {e}")
+            return self._snapshot
+        if version == self._snapshot.version:
+            return self._snapshot
+
+        with self._lock:
+            if version == self._snapshot.version:
+                return self._snapshot
+            try:
+                whales = self.db.top_active(self.top_n)
+            except Exception as e:
+                print(f"[WARN] 고래 DB 로드 실패 (직전 스냅샷 유지): {e}")
+                return self._snapshot
+            self._snapshot = build_snapshot(whales, version, self.top_n)
+            self.reloads += 1
+            return self._snapshot
@@ -1,12 +1,9 @@
-import json
-import os
 import requests
-import time
 from datetime import datetime, timedelta, timezone
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-
-DB_FILE = "whales.json"
+from market_cache import market_cache
+from whale_db import get_whale_db
+from rate_budget import MAINTENANCE
+from http_client import get_client
 
 # 점수 부여 기준 (가중치)
 WEIGHT_PROFIT = 0.40
@@ -15,27 +12,14 @@ WEIGHT_FREQUENCY = 0.20
 
 class WhaleScorer:
     def __init__(self):
-        self.session = requests.Session()
-        
-        # 재시도 로직 추가 (타임아웃 방지)
-        retry = Retry(total=3, backoff_factor=1, status_forcelist=[ 500, 502, 503, 504, 520, 524 ])
-        adapter = HTTPAdapter(max_retries=retry)
-        self.session.mount('http://', adapter)
-        self.session.mount('https://', adapter)
-        
-        self.session.headers.update({"User-Agent": "Mozilla/5.0", "Accept": "application/json"})
-        self.db_file = os.path.join(os.path.dirname(__file__), DB_FILE)
+        # 공용 전송 계층 (재시도 / 커넥션 풀). 요청 간격은 공용 예산(rate_budget)이 조절 — 봇 감지 요청에 양보
+        self.http = get_client(MAINTENANCE)
+        self.db = get_whale_db()
         
     def load_db(self):
-        if os.path.exists(self.db_file):
-            with open(self.db_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+        # 스코어링 대상(active) 고래만 로드
+        return self.db.load_all(status='active')
         
-    def save_db(self, db):
-        with open(self.db_file, "w", encoding="utf-8") as f:
-            json.dump(db, f, indent=4, ensure_ascii=False)
-            
     def fetch_whale_stats(self, address):
         """감마 API를 통해 고래의 전체적인 수익 통계를 가져옵니다."""
         url = f"https://gamma-api.polymarket.com/events?slug={address}" # 실제로는 /users/{address}/profit 등 적절한 엔드포인트 필요. 폴리마켓 공식 통계 API 한계상, 이 부분은 클록(Clob)이나 퍼블릭 프로필 데이터를 긁어야 할 수 있습니다.
@@ -51,17 +35,15 @@ class WhaleScorer:
         """특정 고래의 최근 30일치 활동을 바탕으로 점수를 계산합니다."""
         url = f'https://data-api.polymarket.com/activity?user={address}&limit=500'
         try:
-            r = self.session.get(url, timeout=10)
-            if r.status_code != 200:
-                print(f"[{address}] API 에러: {r.status_code}")
+            try:
+                activities = self.http.get_json(url, "history")
+            except requests.HTTPError as e:
+                print(f"[{address}] API 에러: {e.response.status_code}")
                 return None
-                
-            activities = r.json()
             
             # 거래 빈도 및 카테고리 분포 분석 (단일 루프로 통합)
             trade_count = 0
             category_stats = {}
-            market_tags_cache = {}  # 중복 API 호출 방지
 
             for t in activities:
                 if t.get('type') != 'TRADE' or t.get('side') != 'BUY':
@@ -97,21 +79,13 @@ class WhaleScorer:
                 if not slug:
                     continue
 
-                if slug not in market_tags_cache:
-                    gamma_url = f"https://gamma-api.polymarket.com/events?slug={slug}"
-                    try:
-                        gr = self.session.get(gamma_url, timeout=3)
-                        if gr.status_code == 200 and gr.json():
-                            ev = gr.json()[0]
-                            tags = ev.get('tags', [])
-                            market_tags_cache[slug] = [tag.get('label') for tag in tags if tag.get('label')]
-                        else:
-                            market_tags_cache[slug] = []
-                        time.sleep(0.1)
-                    except Exception:
-                        market_tags_cache[slug] = []
+                # 공용 캐시로 중복 API 호출 방지 (tags는 장기 TTL)
+                try:
+                    ev = market_cache.get_event(slug, self.http, fields=('tags',), timeout=3)
+                    tags = [tag.get('label') for tag in ev.get('tags', []) if tag.get('label')] if ev else []
+                except Exception:
+                    tags = []
 
-                tags = market_tags_cache.get(slug, [])
                 if not tags:
                     tags = ["Unknown"]
 
@@ -124,7 +98,7 @@ class WhaleScorer:
             sorted_categories = sorted(category_stats.items(), key=lambda x: x[1], reverse=True)[:3]
             top_tags = {k: v for k, v in sorted_categories}
             
-            # 2. 로컬 DB(whales.json)에 저장된 승률과 수익률 가져오기
+            # 2. 고래 DB에 저장된 승률과 수익률 가져오기
             win_rate = float(info.get('win_rate', 0.0))
             roi = float(info.get('roi', 0.0))
             
@@ -173,12 +147,11 @@ class WhaleScorer:
             if stats:
                 db[addr]['score'] = stats['score']
                 db[addr]['metrics'] = stats['metrics']
+                self.db.update_score(addr, stats['score'], stats['metrics'])  # 해당 고래 행만 갱신
                 print(f"  👉 최종 점수: {stats['score']}점 (거래:{stats['metrics']['30d_trades']}회, 승률:{stats['metrics']['win_rate']}%, 수익률:{stats['metrics']['roi']}%)")
-            
-            time.sleep(1) # Rate limit
-            
-        self.save_db(db)
-        print("\n✅ whales.json 에 스코어 업데이트 완료!")
+
+        market_cache.persist(force=True)
+        print("\n✅ 고래 DB에 스코어 업데이트 완료!")
 
 if __name__ == "__main__":
     scorer = WhaleScorer()